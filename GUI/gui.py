@@ -3,6 +3,9 @@ import importlib.machinery
 import re
 from PyQt4 import QtGui, QtCore
 from pycella.automaton.automaton import CA
+from pycella.automaton.history import History
+from pycella.GUI.stepper import Stepper
+from pycella.GUI.viewport import Pyramid, Viewport
 
 
 class CaGui(QtGui.QMainWindow):
@@ -12,8 +15,12 @@ class CaGui(QtGui.QMainWindow):
         self.init_toolbar_and_menu()
         self._grid = Grid(self)
         self.setCentralWidget(self._grid)
+        # shows the frames of the stepper, independent of its speed
         self._timer = QtCore.QBasicTimer()
+        # milliseconds between two steps
         self._interval = 1000
+        self._max_speed = False
+        self._grid.set_interval(self._interval)
 
         self.statusBar()
         self.setWindowTitle('Pycella')
@@ -31,6 +38,11 @@ class CaGui(QtGui.QMainWindow):
         step_action.triggered.connect(self.step)
         self._toolbar.addAction(step_action)
 
+        back_action = QtGui.QAction('&Back', self)
+        back_action.setShortcut('Left')
+        back_action.triggered.connect(self.back)
+        self._toolbar.addAction(back_action)
+
         play_action = QtGui.QAction(QtGui.QIcon('Play.png'),
                                     '&Play', self)
         play_action.triggered.connect(self.play)
@@ -63,58 +75,105 @@ class CaGui(QtGui.QMainWindow):
         speed_up_action.triggered.connect(self.speed_up)
         self._toolbar.addAction(speed_up_action)
 
+        max_speed_action = QtGui.QAction('&Max Speed', self)
+        max_speed_action.setShortcut('M')
+        max_speed_action.setCheckable(True)
+        max_speed_action.triggered.connect(self.max_speed)
+        self._toolbar.addAction(max_speed_action)
+
         control_menu = self.menuBar().addMenu('&Control')
         control_menu.addAction(step_action)
+        control_menu.addAction(back_action)
         control_menu.addAction(play_action)
         control_menu.addAction(pause_action)
         control_menu.addAction(toggle_action)
         control_menu.addAction(reset_action)
         control_menu.addAction(speed_down_action)
         control_menu.addAction(speed_up_action)
+        control_menu.addAction(max_speed_action)
+
+        zoom_in_action = QtGui.QAction('Zoom &In', self)
+        zoom_in_action.setShortcut('+')
+        zoom_in_action.triggered.connect(self.zoom_in)
+
+        zoom_out_action = QtGui.QAction('Zoom &Out', self)
+        zoom_out_action.setShortcut('-')
+        zoom_out_action.triggered.connect(self.zoom_out)
+
+        fit_action = QtGui.QAction('&Fit', self)
+        fit_action.setShortcut('F')
+        fit_action.triggered.connect(self.fit)
+
+        view_menu = self.menuBar().addMenu('&View')
+        view_menu.addAction(zoom_in_action)
+        view_menu.addAction(zoom_out_action)
+        view_menu.addAction(fit_action)
 
     def step(self):
-        self._grid.step()
+        if not self._timer.isActive():
+            self._grid.step()
+
+    def back(self):
+        if not self._timer.isActive():
+            self._grid.back()
 
     def play(self):
         if not self._timer.isActive():
-            self._timer.start(self._interval, self)
+            self._grid.play()
+            self._timer.start(CaGui.FRAME_INTERVAL, self)
 
     def pause(self):
         if self._timer.isActive():
             self._timer.stop()
+            self._grid.pause()
 
     def toggle(self):
         if self._timer.isActive():
-            self._timer.stop()
+            self.pause()
         else:
-            self._timer.start(self._interval, self)
+            self.play()
 
     def reset(self):
+        self.pause()
+        self._grid.stop()
         self._grid = Grid(self)
         while self._grid._automaton is None:
             self._grid = Grid(self)
+        self._grid.set_interval(0 if self._max_speed else self._interval)
         self.setCentralWidget(self._grid)
-        print('repainting')
-        self.repaint()
-        print('repainted')
+        self.update()
 
     def speed_up(self):
         if not self._timer.isActive():
             return
         if self._interval / CaGui.FACTOR > 1:
             self._interval /= CaGui.FACTOR
-        self._timer.start(self._interval, self)
+        if not self._max_speed:
+            self._grid.set_interval(self._interval)
 
     def speed_down(self):
         if not self._timer.isActive():
             return
         self._interval *= CaGui.FACTOR
-        self._timer.start(self._interval, self)
+        if not self._max_speed:
+            self._grid.set_interval(self._interval)
+
+    def max_speed(self, checked):
+        self._max_speed = checked
+        self._grid.set_interval(0 if checked else self._interval)
+
+    def zoom_in(self):
+        self._grid.zoom(CaGui.FACTOR)
+
+    def zoom_out(self):
+        self._grid.zoom(1 / CaGui.FACTOR)
+
+    def fit(self):
+        self._grid.fit()
 
     def timerEvent(self, event):
         if event.timerId() == self._timer.timerId():
-            self._grid._automaton.step()
-            self.repaint()
+            self._grid.show_frames()
 
     def closeEvent(self, event):
         message_box = QtGui.QMessageBox(self)
@@ -125,10 +184,13 @@ class CaGui(QtGui.QMainWindow):
                                      QtGui.QMessageBox.No,
                                      QtGui.QMessageBox.No)
         if reply == QtGui.QMessageBox.Yes:
+            self._grid.stop()
             event.accept()
         else:
             event.ignore()
     FACTOR = 1.5
+    # milliseconds between two displayed frames, about 60 per second
+    FRAME_INTERVAL = 16
 
 
 class Grid(QtGui.QFrame):
@@ -138,7 +200,20 @@ class Grid(QtGui.QFrame):
         self._window = window
         self._horizontal_count = 25
         self._vertical_count = 15
-        self._color = QtCore.Qt.darkGray
+        self._color = QtGui.QColor(QtCore.Qt.darkGray)
+        self._viewport = Viewport(zoom=Grid.INITIAL_ZOOM)
+        # block counts of the displayed generation for every level of
+        # detail and their images, one pixel per block, scaled when
+        # painted
+        self._pyramid = None
+        self._images = []
+        # the grid lines, drawn again only when the view changes
+        self._lines = None
+        self._lines_key = None
+        self._stepper = None
+        # the last position of a drag of the board
+        self._drag = None
+        self._dragged = False
         while True:
             try:
                 self.create_automaton()
@@ -156,9 +231,6 @@ class Grid(QtGui.QFrame):
                     self._automaton = None
             break
 
-        self.MIN_BOX_HEIGHT = 20
-        self.MIN_BOX_WIDTH = 20
-
     def create_automaton(self):
         dialog = QtGui.QFileDialog(self)
         dialog.setFocus()
@@ -189,16 +261,14 @@ class Grid(QtGui.QFrame):
                         for i in range(self._vertical_count)]
         self._automaton = CA(initial_buff, rules, self._empty_cell,
                              bounded=False)
-        self._automaton._expand_callback = self._box_limit
-
-    def _box_limit(self):
-        rect = self.contentsRect()
-        box_width = rect.width() // self._horizontal_count
-        box_height = rect.height() // self._vertical_count
-        if box_width < self.MIN_BOX_WIDTH or box_height < self.MIN_BOX_HEIGHT:
-            return False
-        else:
-            return True
+        # the steps list their changes, so only those cells are drawn
+        self._automaton.track_changes = True
+        self._history = None
+        if getattr(module, 'record_history', True):
+            self._history = History()
+        self._stepper = Stepper(self._automaton, self._history)
+        self._generation = self._automaton.generation
+        self.update_image()
 
     def paintEvent(self, e):
         painter = QtGui.QPainter()
@@ -206,74 +276,258 @@ class Grid(QtGui.QFrame):
         self.draw_grid(painter)
         painter.end()
         self._window.statusBar().clearMessage()
-        generation = self._automaton.generation
         self._window.statusBar().showMessage("generation={} {}"
-                                .format(generation, self._rules_name))
+                                .format(self._generation, self._rules_name))
 
     def draw_grid(self, painter):
-        pen = QtGui.QPen(QtCore.Qt.black, 1, QtCore.Qt.SolidLine)
-        painter.setPen(pen)
-
+        """
+        Draw the visible part of the displayed generation, from the
+        level of detail whose blocks are about a pixel large
+        """
         rect = self.contentsRect()
-        left = rect.left()
-        right = rect.right()
-        top = rect.top()
-        bottom = rect.bottom()
-        self._horizontal_count = self._automaton.width
-        self._vertical_count = self._automaton.height
-        box_width = rect.width() // self._horizontal_count
-        box_height = rect.height() // self._vertical_count
-        y = top
-        right_max = self._horizontal_count * box_width
-        for i in range(self._vertical_count+1):
-            painter.drawLine(left, y, right_max, y)
-            y += box_height
-        y -= box_height
-
-        x = left
-        bottom_max = y
-        for i in range(self._horizontal_count+1):
-            painter.drawLine(x, top, x, bottom_max)
-            x += box_width
-
-        pen = QtGui.QPen(self._color, 1, QtCore.Qt.SolidLine)
-        painter.setPen(pen)
-        #fill living cells
-        coordinates = ((i, j) for i in range(self._vertical_count)
-                       for j in range(self._horizontal_count))
-        for cell in self._automaton:
-            y, x = next(coordinates)
-            # starting from inside the box
-            x = x * box_width + 1
-            y = y * box_height + 1
-            if cell:
-                painter.fillRect(x, y, box_width-1, box_height-1, self._color)
+        view = self._viewport
+        pyramid = self._pyramid
+        level = view.level(len(pyramid))
+        self.sync_image(level)
+        block = 1 << level
+        top, left, bottom, right = view.visible(
+            pyramid.width, pyramid.height, rect.width(), rect.height(), block)
+        if top == bottom or left == right:
+            return
+        x, y = view.position(top, left)
+        target = QtCore.QRectF(rect.left() + x, rect.top() + y,
+                               (right - left) * view.zoom,
+                               (bottom - top) * view.zoom)
+        source = QtCore.QRectF(left / block, top / block,
+                               (right - left) / block, (bottom - top) / block)
+        painter.drawImage(target, self._images[level], source)
+        if view.zoom >= Grid.MIN_LINES_ZOOM:
+            painter.drawPixmap(rect.topLeft(), self.grid_lines(rect))
+
+    def update_image(self, changes=None, snapshot=None):
+        """
+        Draw the cells in the images of the levels of detail.
+
+        :param changes: the (row, column, old, new) cells that changed
+            since the images were drawn, None to draw every cell
+        :param snapshot: the generation to draw every cell of, by
+            default the current one of the paused automaton
+        """
+        empty = self._empty_cell()
+        if changes is not None:
+            level = self._viewport.level(len(self._pyramid))
+            self.draw_blocks(level,
+                             self._pyramid.apply(changes, empty, level))
+            return
+        if snapshot is None:
+            snapshot = self._automaton._snapshot()
+        width, height, cells = snapshot[:3]
+        pyramid = self._pyramid
+        if pyramid is not None and \
+           (pyramid.width, pyramid.height) != (width, height):
+            self._viewport.resized(pyramid.width, pyramid.height,
+                                   width, height)
+        pyramid = self._pyramid = Pyramid(width, height, cells, empty)
+        # drawn when their level is displayed
+        self._images = [None] * len(pyramid)
+        self._horizontal_count = pyramid.width
+        self._vertical_count = pyramid.height
+        self._lines_key = None
+
+    def sync_image(self, level):
+        """
+        Bring the image of a level up to date with the changes its
+        blocks were spared of while another level was displayed
+        """
+        self.draw_blocks(level, self._pyramid.sync(level))
+
+    def draw_blocks(self, level, blocks):
+        """
+        :param blocks: the (x, y, shade) blocks of the level to draw,
+            None to draw all of them in a new image, which a level
+            without an image gets anyway
+        """
+        image = self._images[level]
+        if blocks is not None and image is not None:
+            for x, y, shade in blocks:
+                image.setPixel(x, y, shade)
+            return
+        pyramid = self._pyramid
+        width, height = pyramid.size(level)
+        image = QtGui.QImage(pyramid.shades(level), width, height, width,
+                             QtGui.QImage.Format_Indexed8).copy()
+        image.setColorTable(self.shade_colors())
+        self._images[level] = image
+
+    def shade_colors(self):
+        """
+        :returns: the color table of the images, from the background
+            for empty blocks to the color of the cells for full ones
+        """
+        background = self.palette().color(QtGui.QPalette.Window).getRgb()
+        color = self._color.getRgb()
+        return [QtGui.qRgb(*(b + (c - b) * shade // 255
+                             for b, c in zip(background[:3], color[:3])))
+                for shade in range(256)]
+
+    def grid_lines(self, rect):
+        """
+        :returns: a transparent pixmap with the lines between the
+            visible boxes
+        """
+        view = self._viewport
+        key = (rect.width(), rect.height(), view.zoom, view.top, view.left,
+               self._horizontal_count, self._vertical_count)
+        if key == self._lines_key:
+            return self._lines
+        top, left, bottom, right = view.visible(
+            self._horizontal_count, self._vertical_count,
+            rect.width(), rect.height())
+        x_min, y_min = view.position(top, left)
+        x_max, y_max = view.position(bottom, right)
+        pixmap = QtGui.QPixmap(rect.size())
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter()
+        painter.begin(pixmap)
+        painter.setPen(QtGui.QPen(QtCore.Qt.black, 1, QtCore.Qt.SolidLine))
+        lines = []
+        for i in range(top, bottom+1):
+            y = view.position(i, left)[1]
+            lines.append(QtCore.QLineF(x_min, y, x_max, y))
+        for j in range(left, right+1):
+            x = view.position(top, j)[0]
+            lines.append(QtCore.QLineF(x, y_min, x, y_max))
+        painter.drawLines(lines)
+        painter.end()
+        self._lines = pixmap
+        self._lines_key = key
+        return pixmap
 
     def pix_to_row_col(self, event):
+        """
+        :returns: the (row, column) of the automaton under the mouse,
+            or None outside of the board
+        """
         rect = self.contentsRect()
-        box_width = int(rect.width() / self._horizontal_count) - 1
-        box_height = int(rect.height() / self._vertical_count) - 1
-        col = event.x() // box_width
-        row = event.y() // box_height
-        # this is to account for the border width
-        col = (event.x() - col) // box_width
-        row = (event.y() - row) // box_height
+        row, col = self._viewport.cell_at(event.x() - rect.left(),
+                                          event.y() - rect.top())
+        if not (0 <= row < self._vertical_count and
+                0 <= col < self._horizontal_count):
+            return None
         # accounting that the automaton indices start from 1
         return row + 1, col + 1
 
+    def mousePressEvent(self, event):
+        self._drag = event.pos()
+        self._dragged = False
+
+    def mouseMoveEvent(self, event):
+        if self._drag is None:
+            return
+        delta = event.pos() - self._drag
+        if not self._dragged and delta.manhattanLength() < Grid.DRAG_DISTANCE:
+            return
+        self._dragged = True
+        self._drag = event.pos()
+        self._viewport.pan(delta.x(), delta.y())
+        self.update()
+
     def mouseReleaseEvent(self, event):
-        if self._window._timer.isActive():
+        self._drag = None
+        if self._dragged or self._window._timer.isActive():
             return
-        row, col = self.pix_to_row_col(event)
-        if self._automaton[row, col]:
-            self._automaton[row, col] = self._empty_cell()
+        coords = self.pix_to_row_col(event)
+        if coords is None:
+            return
+        old = self._automaton[coords]
+        if old:
+            self._automaton[coords] = self._empty_cell()
         else:
-            self._automaton[row, col] = self._default_cell()
-        self.repaint()
+            self._automaton[coords] = self._default_cell()
+        if self._history is not None:
+            self._history.record(self._automaton)
+        self.update_image([coords + (old, self._automaton[coords])])
+        self.update()
+
+    def wheelEvent(self, event):
+        rect = self.contentsRect()
+        self._viewport.zoom_at(Grid.ZOOM_FACTOR ** (event.delta() / 120),
+                               event.x() - rect.left(),
+                               event.y() - rect.top())
+        self.update()
+
+    def zoom(self, factor):
+        """
+        Zoom in or out around the center
+        """
+        rect = self.contentsRect()
+        self._viewport.zoom_at(factor, rect.width() / 2, rect.height() / 2)
+        self.update()
+
+    def fit(self):
+        """
+        Zoom to show the whole board
+        """
+        rect = self.contentsRect()
+        self._viewport.fit(self._horizontal_count, self._vertical_count,
+                           rect.width(), rect.height())
+        self.update()
+
+    def show_frames(self):
+        """
+        Show the latest generation produced by the stepper, drawing the
+        changes of the skipped ones merged per cell, or every cell when
+        they are a large part of the board
+        """
+        cells = self._horizontal_count * self._vertical_count
+        frame = self._stepper.latest(int(cells * Grid.MAX_CHANGES_SHARE))
+        if frame is None:
+            return
+        generation, changes, snapshot = frame
+        self.update_image(changes, snapshot)
+        self._generation = generation
+        self.update()
 
     def step(self):
-        self._automaton.step()
-        self.repaint()
+        self._stepper.step()
+        self.show_frames()
+
+    def back(self):
+        if self._history is not None and len(self._history) > 1:
+            self._generation = self._stepper.rewind()
+            self.update_image()
+            self.update()
+
+    def play(self):
+        self._stepper.start()
+
+    def pause(self):
+        self._stepper.pause()
+        self.show_frames()
+
+    def set_interval(self, interval):
+        """
+        :param interval: the milliseconds between two steps
+        """
+        self._stepper.interval = interval / 1000
+
+    def stop(self):
+        """
+        Stop the stepper thread
+        """
+        if self._stepper is not None:
+            self._stepper.close()
+            self._stepper = None
+
+    INITIAL_ZOOM = 20
+    # grid lines are drawn only when boxes are at least this large
+    MIN_LINES_ZOOM = 4
+    # the share of the cells whose changes are drawn one by one, beyond
+    # it every cell of the generation is drawn again
+    MAX_CHANGES_SHARE = 0.25
+    # pixels the mouse must move with a button held to drag the board
+    DRAG_DISTANCE = 4
+    ZOOM_FACTOR = 1.25
 
 if __name__ == '__main__':
     app = QtGui.QApplication([])
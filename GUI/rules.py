@@ -1,19 +1,27 @@
+from pycella.automaton.rules import totalistic
+
+
+@totalistic(birth={3}, survive={2, 3})
 def rules(proxy):
-    s = sum(proxy.neighbors)
+    s = proxy.neighbor_sum
     if s < 2 or s > 3:
         return 0
-    elif s == 3 and proxy[0, 0] == 0:
+    elif s == 3 and proxy.center == 0:
         return 1
     else:
-        return proxy[0, 0]
+        return proxy.center
 
 #def rules(proxy):
-#    s = sum(proxy.neighbors)
-#    if s == 2 and proxy[0, 0] == 0:
+#    s = proxy.neighbor_sum
+#    if s == 2 and proxy.center == 0:
 #        return 1
 #    else:
 #        return 0
 
+# the same rules can be given declaratively
+#from pycella.automaton.rules import Rule
+#rules = Rule.from_rulestring("B3/S23")
+
 def empty_cell():
     return 0
 
@@ -22,3 +30,6 @@ def default_cell():
 
 rules_name = "Game of Life"
 alive_color = "00 ee 99"
+# False to not keep the generations for stepping back, which saves the
+# memory of their changes
+record_history = True
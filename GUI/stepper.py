@@ -0,0 +1,172 @@
+import threading
+from collections import deque
+
+
+class Stepper:
+    """
+    Steps an automaton in a background thread, so slow rules or big
+    boards don't block the thread that displays it.
+
+    The generations are produced ahead into a bounded queue of frames.
+    A frame is (generation, changes): the (row, column, old, new) cells
+    that changed since the previous frame, or None when they aren't
+    known. The consumer takes all the queued frames at once, merged as
+    one frame of the newest generation by latest, which copies the
+    whole generation only once when the changes aren't known.
+
+    The automaton must not be used by other threads while running.
+    After pause returns it is safe to use again, also through step and
+    rewind, which hold the same lock as the background thread.
+    """
+    def __init__(self, automaton, history=None, interval=0.0, queue_size=4):
+        """
+        :param history: a History recording every generation, which
+            also gives the changes of the frames. Without one they are
+            the changes the automaton lists, see CA._step_changes.
+        :param interval: the seconds between two steps, 0 to step as
+            fast as possible
+        """
+        self._automaton = automaton
+        self._history = history
+        self.interval = interval
+        self.queue_size = queue_size
+        self._frames = deque()
+        self._running = False
+        self._closed = False
+        # held while the automaton is used
+        self._lock = threading.Lock()
+        # signals the changes of the state and the queue
+        self._condition = threading.Condition()
+        if history is not None:
+            history.record(automaton)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        with self._condition:
+            self._running = True
+            self._condition.notify_all()
+
+    def pause(self):
+        """
+        Stop stepping and wait for the step in progress to finish
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        with self._lock:
+            pass
+
+    def close(self):
+        """
+        Stop the background thread
+        """
+        with self._condition:
+            self._running = False
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def step(self):
+        """
+        Advance one generation in the calling thread, meant for
+        stepping while paused. The frame is queued like any other.
+        """
+        with self._lock:
+            self._frames.append(self._advance())
+
+    def rewind(self, steps=1):
+        """
+        Bring the automaton back `steps` generations of the history
+        and drop the queued frames
+
+        :returns: the generation the automaton is at
+        """
+        with self._lock:
+            self._frames.clear()
+            return self._history.rewind(self._automaton, steps)
+
+    def frames(self):
+        """
+        :returns: the queued frames, oldest first, emptying the queue
+        """
+        with self._condition:
+            frames = list(self._frames)
+            self._frames.clear()
+            self._condition.notify_all()
+        return frames
+
+    def latest(self, max_changes=None):
+        """
+        Take the queued frames at once as a single frame of the newest
+        generation, with their changes merged into one per cell
+
+        :param max_changes: the most changes worth drawing one by one,
+            with more of them the frame has a snapshot instead
+        :returns: (generation, changes, snapshot) with either the
+            changes or a snapshot of the generation, or None if no
+            frames are queued
+        """
+        with self._lock:
+            frames = self.frames()
+            if not frames:
+                return None
+            changes = _merge_changes(frame[1] for frame in frames)
+            if changes is None or \
+               max_changes is not None and len(changes) > max_changes:
+                return frames[-1][0], None, self._automaton._snapshot()
+            return frames[-1][0], changes, None
+
+    def _advance(self):
+        """
+        Step the automaton
+
+        :returns: the frame of the new generation
+        """
+        automaton = self._automaton
+        automaton.step()
+        if self._history is not None:
+            self._history.record(automaton)
+            changes = self._history.changes
+        else:
+            changes = automaton._step_changes()
+        return automaton.generation, changes
+
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                while not self._closed and (
+                        not self._running or
+                        len(self._frames) >= self.queue_size):
+                    condition.wait()
+                if self._closed:
+                    return
+            with self._lock:
+                # paused while waiting for the lock
+                if not self._running:
+                    continue
+                self._frames.append(self._advance())
+            if self.interval:
+                with condition:
+                    condition.wait_for(lambda: not self._running or
+                                       self._closed, self.interval)
+
+
+def _merge_changes(changes_of_frames):
+    """
+    :returns: the changes of consecutive frames as one (row, column,
+        old, new) change per cell, None if any of them isn't known
+    """
+    merged = {}
+    for changes in changes_of_frames:
+        if changes is None:
+            return None
+        for i, j, old, new in changes:
+            merged.setdefault((i, j), [old, new])[1] = new
+    return [(i, j, old, new) for (i, j), (old, new) in merged.items()
+            if old != new]
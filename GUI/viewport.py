@@ -0,0 +1,266 @@
+from array import array
+from math import ceil, floor, log2
+from operator import add
+
+
+class Viewport:
+    """
+    The part of a board of cells shown on the screen: the cell at the
+    top left corner of the screen, which can be fractional, and the
+    zoom in screen pixels per cell, below 1 when zoomed out.
+    Cells are counted from 0 here, screen coordinates from the top
+    left corner of the drawing area.
+    """
+    MIN_ZOOM = 1 / 4096
+    MAX_ZOOM = 256
+
+    def __init__(self, zoom=20.0, top=0.0, left=0.0):
+        self.zoom = zoom
+        self.top = top
+        self.left = left
+
+    def fit(self, width, height, screen_width, screen_height):
+        """
+        Zoom and pan to show the whole board in the center of the screen
+        """
+        self.zoom = max(self.MIN_ZOOM, min(screen_width / width,
+                                           screen_height / height,
+                                           self.MAX_ZOOM))
+        self.left = (width - screen_width / self.zoom) / 2
+        self.top = (height - screen_height / self.zoom) / 2
+
+    def cell_at(self, x, y):
+        """
+        :returns: the (row, column) of the cell at a screen position
+        """
+        return (int(floor(self.top + y / self.zoom)),
+                int(floor(self.left + x / self.zoom)))
+
+    def position(self, row, column):
+        """
+        :returns: the (x, y) screen position of the top left corner of
+            a cell
+        """
+        return ((column - self.left) * self.zoom,
+                (row - self.top) * self.zoom)
+
+    def pan(self, dx, dy):
+        """
+        Move the board by dx, dy screen pixels
+        """
+        self.left -= dx / self.zoom
+        self.top -= dy / self.zoom
+
+    def zoom_at(self, factor, x, y):
+        """
+        Multiply the zoom by a factor, keeping the cell at the screen
+        position x, y in place
+        """
+        zoom = max(self.MIN_ZOOM, min(self.zoom * factor, self.MAX_ZOOM))
+        self.left += x / self.zoom - x / zoom
+        self.top += y / self.zoom - y / zoom
+        self.zoom = zoom
+
+    def resized(self, width, height, new_width, new_height):
+        """
+        Follow the content of a board expanded from width x height to
+        new_width x new_height cells, with the old cells in the center
+        """
+        self.left += ceil((new_width - width) / 2)
+        self.top += ceil((new_height - height) / 2)
+
+    def visible(self, width, height, screen_width, screen_height, block=1):
+        """
+        :param block: round the range outwards to multiples of it
+        :returns: (top, left, bottom, right) - the range of rows and
+            columns of a width x height board on the screen, bottom and
+            right exclusive. It is empty if the board isn't visible.
+        """
+        top = max(0, int(floor(self.top)))
+        left = max(0, int(floor(self.left)))
+        bottom = min(height, int(ceil(self.top + screen_height / self.zoom)))
+        right = min(width, int(ceil(self.left + screen_width / self.zoom)))
+        top -= top % block
+        left -= left % block
+        bottom = min(height, bottom + -bottom % block)
+        right = min(width, right + -right % block)
+        return top, left, max(top, bottom), max(left, right)
+
+    def level(self, levels):
+        """
+        :returns: the level of detail to draw with, the smallest one
+            whose blocks of 2**level x 2**level cells are at least a
+            screen pixel large
+        """
+        if self.zoom >= 1:
+            return 0
+        return min(levels - 1, int(ceil(log2(1 / self.zoom) - 1e-9)))
+
+
+class Pyramid:
+    """
+    The counts of non empty cells of a board in square blocks of
+    2**k x 2**k cells, for every level k from 0 (single cells) until a
+    block covers the board. A zoomed out board is drawn from the level
+    whose blocks are about a screen pixel large, every block shaded by
+    how full it is.
+
+    The changes of the cells are kept in a log and a level is brought
+    up to date with them only when it is synced, like the displayed
+    level on every change, so a change costs the update of one level
+    instead of all of them. A level behind by more changes than it has
+    blocks is merged again from the one below.
+    """
+    def __init__(self, width, height, cells, empty=0):
+        """
+        :param cells: the cells of the board row by row
+        """
+        self.width = width
+        self.height = height
+        counts = array('I', (cell != empty for cell in cells))
+        self._counts = [counts]
+        self._sizes = [(width, height)]
+        while width > 1 or height > 1:
+            counts, width, height = _merge(counts, width, height)
+            self._counts.append(counts)
+            self._sizes.append((width, height))
+        # (x, y, delta) changes of the cells, and for every level the
+        # number of them it has been updated with, None to merge it again
+        self._log = []
+        self._synced = [0] * len(self._counts)
+        # the levels whose counts were updated without their blocks
+        self._redraw = set()
+
+    def __len__(self):
+        return len(self._counts)
+
+    def size(self, level):
+        """
+        :returns: the (width, height) in blocks of a level
+        """
+        return self._sizes[level]
+
+    def shades(self, level):
+        """
+        :returns: the shades of the blocks of a level row by row as
+            bytes, 0 for empty blocks and 64 to 255 for blocks from one
+            to all cells non empty
+        """
+        self.sync(level)
+        cells = 1 << 2 * level
+        return bytes(_shade(count, cells) for count in self._counts[level])
+
+    def apply(self, changes, empty=0, level=0):
+        """
+        Log the changed cells and sync one level with them
+
+        :param changes: (row, column, old, new) cells with rows and
+            columns counted from 1, like the changes of a History
+        :param level: the level to sync, the displayed one
+        :returns: like sync
+        """
+        log = self._log
+        for i, j, old, new in changes:
+            delta = (new != empty) - (old != empty)
+            if delta:
+                log.append((j - 1, i - 1, delta))
+        if len(log) > len(self._counts[0]):
+            self._compact()
+        return self.sync(level)
+
+    def sync(self, level):
+        """
+        Update the counts of a level with the changes logged since it
+        was last synced
+
+        :returns: the (x, y, shade) blocks of the level with a new
+            shade, or None if the counts were updated in bulk since it
+            was last synced and any block may have a new shade
+        """
+        start = self._synced[level]
+        if start is None or \
+           level and len(self._log) - start > len(self._counts[level]):
+            self._remerge(level)
+        elif level not in self._redraw:
+            width = self._sizes[level][0]
+            cells = 1 << 2 * level
+            counts = self._counts[level]
+            return [(index % width, index // width,
+                     _shade(counts[index], cells))
+                    for index in self._update(level)]
+        else:
+            self._update(level)
+        self._redraw.discard(level)
+        return None
+
+    def _update(self, level):
+        """
+        Apply the changes logged since a level was last synced to its
+        counts
+
+        :returns: the indices of the counts that were changed
+        """
+        log = self._log
+        width = self._sizes[level][0]
+        counts = self._counts[level]
+        touched = set()
+        for x, y, delta in log[self._synced[level]:]:
+            index = (y >> level) * width + (x >> level)
+            counts[index] += delta
+            touched.add(index)
+        self._synced[level] = len(log)
+        return touched
+
+    def _remerge(self, level):
+        """
+        Merge the counts of a level again from the nearest level below
+        it that can be updated, and the levels in between
+        """
+        below = level - 1
+        while self._synced[below] is None:
+            below -= 1
+        if self._update(below):
+            self._redraw.add(below)
+        counts = self._counts[below]
+        width, height = self._sizes[below]
+        for k in range(below + 1, level + 1):
+            counts, width, height = _merge(counts, width, height)
+            self._counts[k] = counts
+            self._synced[k] = len(self._log)
+            self._redraw.add(k)
+
+    def _compact(self):
+        """
+        Drop the log, after bringing the cells up to date with it. The
+        levels that weren't synced with all of it are merged again when
+        they are synced next.
+        """
+        if self._update(0):
+            self._redraw.add(0)
+        end = len(self._log)
+        self._synced = [0 if synced == end else None
+                        for synced in self._synced]
+        self._log = []
+
+
+def _merge(counts, width, height):
+    """
+    :returns: (counts, width, height) of the level above, with blocks
+        of 2x2 blocks of the given one
+    """
+    new_width = (width + 1) // 2
+    new_height = (height + 1) // 2
+    merged = array('I')
+    empty = array('I', bytes(4 * width))
+    for y in range(0, height, 2):
+        row = counts[y*width:(y+1)*width]
+        below = counts[(y+1)*width:(y+2)*width] if y + 1 < height else empty
+        pairs = array('I', map(add, row, below))
+        if width % 2:
+            pairs.append(0)
+        merged.extend(map(add, pairs[0::2], pairs[1::2]))
+    return merged, new_width, new_height
+
+
+def _shade(count, cells):
+    return 64 + count * 191 // cells if count else 0
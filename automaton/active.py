@@ -0,0 +1,141 @@
+from itertools import chain
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import MOORE
+
+
+class ActiveCA(CA):
+    """
+    An automaton which remembers which cells changed in the previous
+    step and evaluates only them and their neighbors in the next one.
+    Every other cell has the same neighborhood as before, so it keeps
+    its value. This gives the same results as CA for any deterministic
+    rules depending only on the neighborhood the proxy exposes, while
+    settled areas of the buffer cost nothing.
+
+    The first step evaluates every cell. The number of cells evaluated
+    in the last step is kept in `active`. The cells it changed are
+    always listed, like CA does with track_changes, so a History
+    records them without comparing generations.
+    """
+    def __init__(self, buff, rules, empty_cell, bounded=True,
+                 directional=False, neighborhood=None, toroidal=False):
+        super().__init__(buff, rules, empty_cell, bounded, directional,
+                         neighborhood, toroidal)
+        # None means every cell is active
+        self._changed = None
+        self.active = 0
+        empty = empty_cell()
+        self.population = sum(1 for cell in self if cell != empty)
+
+    def __setitem__(self, coords, cell):
+        shift = self._pad - 1
+        i, j = coords[0] + shift, coords[1] + shift
+        try:
+            old = self._buffer[i][j]
+        except IndexError:
+            return super().__setitem__(coords, cell)
+        super().__setitem__(coords, cell)
+        empty = self._empty_cell()
+        self.population += (cell != empty) - (old != empty)
+        if self._changed is not None:
+            self._changed.add((i % self._height, j % self._width))
+
+    def _expand(self, factor=2):
+        """
+        Create a roughly two times larger buffer and
+        copy the current buffer in the center of the new one. The cells
+        of the former padding ring are inside the new buffer, where
+        cells can be born next to ones that didn't change, so they are
+        marked as changed.
+        """
+        new_width, new_height, h_margin, w_margin = self._growth(factor)
+        pad = self._pad
+        width = self._width
+        height = self._height
+        super()._expand(factor)
+        if self._changed is not None:
+            ring = [(i, j) for i in range(height) for j in range(width)
+                    if not (pad <= i < height-pad and pad <= j < width-pad)]
+            self._changed = {(i + h_margin - pad, j + w_margin - pad)
+                             for i, j in chain(self._changed, ring)}
+
+    def _restore(self, snapshot):
+        super()._restore(snapshot)
+        self._changed = None
+        empty = self._empty_cell()
+        self.population = sum(1 for cell in self if cell != empty)
+
+    def _active_cells(self):
+        """
+        :returns: the coordinates of the cells that have to be evaluated
+        """
+        height = self._height
+        width = self._width
+        pad = self._pad
+        if self._changed is None:
+            return [(i, j) for i in range(pad, height-pad)
+                    for j in range(pad, width-pad)]
+        active = set()
+        if self.neighborhood == MOORE:
+            for i, j in self._changed:
+                active.update(((i-1, j-1), (i-1, j), (i-1, j+1),
+                               (i,   j-1), (i,   j), (i,   j+1),
+                               (i+1, j-1), (i+1, j), (i+1, j+1)))
+        else:
+            # the cells which have a changed cell in their neighborhood
+            offsets = self.neighborhood.offsets
+            for i, j in self._changed:
+                active.add((i, j))
+                active.update((i - di, j - dj) for di, dj in offsets)
+        if self._toroidal:
+            # the cells beyond an edge are the ones along the opposite one
+            rows = height - 2*pad
+            columns = width - 2*pad
+            return list({((i - pad) % rows + pad, (j - pad) % columns + pad)
+                         for i, j in active})
+        return [(i, j) for i, j in active
+                if pad <= i < height-pad and pad <= j < width-pad]
+
+    def step(self):
+        """
+        Apply the rules to the cells around the ones that changed in
+        the previous step
+        """
+        known = not self._edited
+        self._edited = False
+        if not self._bounded and self._boundary_check():
+            self._expand()
+            known = False
+        self.generation += 1
+        if self._toroidal:
+            self._wrap()
+
+        buff = self._buffer
+        rules = self._rules
+        proxy = self._proxy
+        active = self._active_cells()
+        updates = []
+        for i, j in active:
+            proxy._i = i
+            proxy._j = j
+            cell = rules(proxy)
+            if cell != buff[i][j]:
+                updates.append((i, j, cell))
+        proxy._reset()
+
+        empty = self._empty_cell()
+        shift = self._pad - 1
+        changes = []
+        for i, j, cell in updates:
+            old = buff[i][j]
+            self.population += (cell != empty) - (old != empty)
+            buff[i][j] = cell
+            self._track_edges(i, j, old, cell)
+            changes.append((i - shift, j - shift, old, cell))
+        self._changed = {(i, j) for i, j, cell in updates}
+        self._changes = changes if known else None
+        self.active = len(active)
+
+    def _census_end(self, state):
+        return len(self._changed), self.population
@@ -1,39 +1,106 @@
-from collections import deque
+from functools import partial
 from itertools import chain
 from math import sqrt, ceil
+from time import perf_counter
 import sys
 
+from pycella.automaton.instrumentation import StepStats
+from pycella.automaton.neighborhood import MOORE, row_sums, summed_area
+
 
 class CA:
-    def __init__(self, buff, rules, empty_cell, bounded=True):
-        self._width = len(buff[0]) + 2
-        self._height = len(buff) + 2
-
-        first_row = list(empty_cell() for _ in range(self._width))
-        middle_rows = [[empty_cell()] + row + [empty_cell()] for row in buff]
-        last_row = list(empty_cell() for _ in range(self._width))
-        self._buffer = [first_row] + middle_rows + [last_row]
+    # list the cells every step changes, for _step_changes
+    track_changes = False
+    # the changes of the last step, None when they aren't known, and
+    # whether cells were set or restored since it
+    _changes = None
+    _edited = True
+
+    def __init__(self, buff, rules, empty_cell, bounded=True,
+                 directional=False, neighborhood=None, toroidal=False):
+        """
+        :param neighborhood: the Neighborhood the rules see through the
+            proxy, by default the 3x3 Moore one. The buffer is padded
+            with a ring of empty cells as wide as its radius, the cells
+            are still indexed from 1.
+        :param toroidal: join the opposite edges, so the cells along an
+            edge are neighbors of the ones along the opposite edge.
+            The padding is refreshed with copies of them before every
+            step. A toroidal automaton is bounded.
+        """
+        self.neighborhood = neighborhood or MOORE
+        self._pad = self.neighborhood.radius
+        self._width = len(buff[0]) + 2 * self._pad
+        self._height = len(buff) + 2 * self._pad
+        if toroidal:
+            if not bounded:
+                raise ValueError("a toroidal automaton can't grow")
+            if min(len(buff), len(buff[0])) < self._pad:
+                raise ValueError("a toroidal automaton must be at least as "
+                                 "large as the radius of its neighborhood")
+        self._toroidal = toroidal
+        self._empty_cell = empty_cell
+        self._buffer = self._load(buff)
         self._expand_callback = None
+        self._directional = directional
+        self._edges = self._count_edges()
 
         self._rules = rules
-        self._empty_cell = empty_cell
         self._bounded = bounded
         self.generation = 0
-        self._proxy = CA.Proxy(self)
+        if self.neighborhood == MOORE:
+            self._proxy = CA.Proxy(self)
+        else:
+            self._proxy = CA.NeighborhoodProxy(self)
+        # allocated by the first step, the next generation is written in it
+        self._next_buffer = None
+        self._collector = None
+
+    def _load(self, buff):
+        """
+        :returns: the buffer with the content of `buff` surrounded by
+            a ring of empty cells
+        """
+        empty_cell = self._empty_cell
+        pad = self._pad
+        first_rows = [list(empty_cell() for _ in range(self._width))
+                      for _ in range(pad)]
+        middle_rows = [[empty_cell() for _ in range(pad)] + row +
+                       [empty_cell() for _ in range(pad)] for row in buff]
+        last_rows = [list(empty_cell() for _ in range(self._width))
+                     for _ in range(pad)]
+        return first_rows + middle_rows + last_rows
+
+    def _new_buffer(self, width, height):
+        """
+        :returns: a buffer of empty cells with the given dimensions
+        """
+        return [[self._empty_cell() for j in range(width)]
+                for i in range(height)]
 
     def __getitem__(self, coords):
-        return self._buffer[coords[0]][coords[1]]
+        shift = self._pad - 1
+        return self._buffer[coords[0] + shift][coords[1] + shift]
 
     def __setitem__(self, coords, cell):
+        shift = self._pad - 1
+        self._edited = True
         try:
-            self._buffer[coords[0]][coords[1]] = cell
+            row = self._buffer[coords[0] + shift]
+            old = row[coords[1] + shift]
+            row[coords[1] + shift] = cell
         except IndexError:
             print("index error (w, h) = ({}, {}), attempted ({}, {})".format(
                 self.width, self.height, coords[0], coords[1]))
+        else:
+            self._track_edges((coords[0] + shift) % self._height,
+                              (coords[1] + shift) % self._width, old, cell)
+            self._proxy._forget()
 
     def __iter__(self):
-        for i in range(1, self._height-1):
-            for j in range(1, self._width-1):
+        pad = self._pad
+        for i in range(pad, self._height-pad):
+            for j in range(pad, self._width-pad):
                 yield self._buffer[i][j]
 
     def __eq__(self, other):
@@ -48,14 +115,14 @@ class CA:
         """
         :returns: the effective width of the buffer
         """
-        return self._width - 2
+        return self._width - 2 * self._pad
 
     @property
     def height(self):
         """
         :returns: the effective height of the buffer
         """
-        return self._height - 2
+        return self._height - 2 * self._pad
 
     def _boundary_check(self):
         """
@@ -65,71 +132,411 @@ class CA:
         if check is not None and not check():
             return
 
+        return any(self._edges)
+
+    def _count_edges(self):
+        """
+        :returns: the counts of non empty cells in the top and bottom
+            rows and the left and right columns of the effective buffer,
+            or in as many of them as the radius of the neighborhood
+        """
+        empty = self._empty_cell()
         buff = self._buffer
-        for i in range(1, self._width-1):
-            if buff[1][i] != self._empty_cell():
-                return True
-            if buff[self._height-2][i] != self._empty_cell():
-                return True
-        for i in range(1, self._height-1):
-            if buff[i][1] != self._empty_cell():
-                return True
-            if buff[i][self._width-2] != self._empty_cell():
-                return True
-        return False
+        height = self._height
+        width = self._width
+        pad = self._pad
+        if pad == 1:
+            return [_occupied(buff[1][1:width-1], empty),
+                    _occupied(buff[height-2][1:width-1], empty),
+                    sum(1 for i in range(1, height-1) if buff[i][1] != empty),
+                    sum(1 for i in range(1, height-1)
+                        if buff[i][width-2] != empty)]
+        rows = range(pad, height-pad)
+        return [sum(_occupied(buff[i][pad:width-pad], empty)
+                    for i in range(pad, 2*pad)),
+                sum(_occupied(buff[i][pad:width-pad], empty)
+                    for i in range(height-2*pad, height-pad)),
+                sum(_occupied(buff[i][pad:2*pad], empty) for i in rows),
+                sum(_occupied(buff[i][width-2*pad:width-pad], empty)
+                    for i in rows)]
 
-    def _expand(self, factor=2):
+    def _track_edges(self, i, j, old, cell):
         """
-        Create a roughly two times larger buffer and
-        copy the current buffer in the center of the new one
+        Update the edge counts after the cell at (i, j) of the buffer
+        changed from `old` to `cell`
+        """
+        height = self._height
+        width = self._width
+        pad = self._pad
+        if not (pad <= i < height-pad and pad <= j < width-pad):
+            return
+        empty = self._empty_cell()
+        delta = int(cell != empty) - int(old != empty)
+        if delta:
+            edges = self._edges
+            if i < 2*pad:
+                edges[0] += delta
+            if i >= height-2*pad:
+                edges[1] += delta
+            if j < 2*pad:
+                edges[2] += delta
+            if j >= width-2*pad:
+                edges[3] += delta
+
+    def _expanded_size(self, factor):
+        """
+        :returns: (new_width, new_height, h_margin, w_margin) - the
+            dimensions of a buffer roughly `factor` times larger than the
+            current one and the offset at which the current content is
+            placed in it
         """
         factor = sqrt(factor)
-        width = self._width - 2
-        height = self._height - 2
-        new_width = int(ceil(width*factor + 2))
-        new_height = int(ceil(height*factor + 2))
-        new_buffer = [[self._empty_cell() for i in range(new_width)]
-                      for j in range(new_height)]
+        pad = self._pad
+        width = self._width - 2*pad
+        height = self._height - 2*pad
+        new_width = int(ceil(width*factor + 2*pad))
+        new_height = int(ceil(height*factor + 2*pad))
+        if pad > 1:
+            # cells can be born as far as the radius from the content
+            new_width = max(new_width, width + 4*pad)
+            new_height = max(new_height, height + 4*pad)
         h_margin = int(ceil((new_height - height) / 2))
         w_margin = int(ceil((new_width - width) / 2))
+        return new_width, new_height, h_margin, w_margin
+
+    def _growth(self, factor):
+        """
+        :returns: (new_width, new_height, h_margin, w_margin) like
+            _expanded_size. A directional automaton grows only on the
+            sides where there are non empty cells, by a fraction
+            (factor - 1) / 2 of its size, otherwise it grows evenly.
+        """
+        if not self._directional or not any(self._edges):
+            return self._expanded_size(factor)
+        pad = self._pad
+        width = self._width - 2*pad
+        height = self._height - 2*pad
+        rows = max(pad, int(ceil(height * (factor - 1) / 2)))
+        columns = max(pad, int(ceil(width * (factor - 1) / 2)))
+        top, bottom, left, right = (bool(edge) for edge in self._edges)
+        return (width + columns * (left + right) + 2*pad,
+                height + rows * (top + bottom) + 2*pad,
+                pad + rows * top,
+                pad + columns * left)
+
+    def _expand(self, factor=2):
+        """
+        Create a roughly two times larger buffer and
+        copy the current buffer in the center of the new one
+        (or towards the sides that aren't touched, when directional)
+        """
+        pad = self._pad
+        width = self._width - 2*pad
+        height = self._height - 2*pad
+        new_width, new_height, h_margin, w_margin = self._growth(factor)
+        new_buffer = self._new_buffer(new_width, new_height)
         for i in range(height):
-            for j in range(width):
-                new_buffer[h_margin+i][w_margin+j] = self._buffer[1+i][1+j]
+            new_buffer[h_margin+i][w_margin:w_margin+width] = \
+                self._buffer[pad+i][pad:pad+width]
         self._buffer = new_buffer
         self._width = new_width
         self._height = new_height
+        self._next_buffer = None
+        self._edges = self._count_edges()
+
+    def _wrap(self):
+        """
+        Copy the cells along every edge into the padding beyond the
+        opposite one, so the neighbors of toroidal automata are read
+        by plain indexing
+        """
+        buff = self._buffer
+        height = self._height
+        width = self._width
+        pad = self._pad
+        for k in range(pad):
+            buff[k][:] = buff[height - 2*pad + k]
+            buff[height - pad + k][:] = buff[pad + k]
+        for row in buff:
+            row[:pad] = row[width - 2*pad:width - pad]
+            row[width - pad:] = row[pad:2*pad]
 
     def step(self):
         """
         Apply the rules to every cell in the buffer.
-        Equivalent to placing the new cells in a new buffer.
+        The new cells are written in a second buffer of the same size,
+        which then swaps roles with the current one.
         """
+        self._step(self._empty_cell())
+
+    def _step(self, empty, carry=True):
+        """
+        The step, given the empty cell.
+
+        :param carry: copy the padding into the second buffer, which
+            can be skipped when it already has the same padding. A new
+            second buffer always gets it.
+        """
+        known = not self._edited
+        self._edited = False
         if not self._bounded and self._boundary_check():
             self._expand()
+            known = False
+        self.generation += 1
+        if self._toroidal:
+            self._wrap()
 
+        buff = self._buffer
         width = self._width
         height = self._height
-        update_buffer = deque()
-        self.generation += 1
+        next_buffer = self._next_buffer
+        if next_buffer is None or len(next_buffer) != height or \
+           len(next_buffer[0]) != width:
+            next_buffer = self._new_buffer(width, height)
+            carry = True
+        pad = self._pad
+        if carry:
+            self._carry_padding(buff, next_buffer)
 
-        #get a head start with the first two rows
-        #the proxy starts from (1, 1)
-        for i in range(1, 3):
-            for j in range(1, width-1):
-                update_buffer.append(self._apply_rules(self._proxy))
-                self._proxy.move()
-        #update cells at a safe distance from the read position
-        #and push new updates in the update_buffer
-        for i in range(1, height-3):
-            for j in range(1, width-1):
-                self._buffer[i][j] = update_buffer.popleft()
-                update_buffer.append(self._apply_rules(self._proxy))
-                self._proxy.move()
-        #push the updates left in the update_buffer
-        for i in range(height-3, height-1):
-            for j in range(1, width-1):
-                self._buffer[i][j] = update_buffer.popleft()
-        self._proxy._reset()
+        rules = self._rules
+        proxy = self._proxy
+        changes = [] if self.track_changes else None
+        shift = pad - 1
+        left = right = 0
+        for i in range(pad, height-pad):
+            row = next_buffer[i]
+            proxy._i = i
+            for j in range(pad, width-pad):
+                proxy._j = j
+                row[j] = rules(proxy)
+            left += row[pad] != empty
+            right += row[width-pad-1] != empty
+            if changes is not None:
+                old = buff[i]
+                changes.extend((i - shift, j - shift, old[j], row[j])
+                               for j in range(pad, width-pad)
+                               if row[j] != old[j])
+        self._changes = changes if known else None
+        self._next_buffer = buff
+        self._buffer = next_buffer
+        if pad == 1:
+            self._edges = [_occupied(next_buffer[1][1:width-1], empty),
+                           _occupied(next_buffer[height-2][1:width-1], empty),
+                           left, right]
+        else:
+            self._edges = self._count_edges()
+        proxy._reset()
+
+    def _carry_padding(self, buff, next_buffer):
+        """
+        Copy the padding of a buffer, which isn't computed, into the
+        second one
+        """
+        width = self._width
+        height = self._height
+        pad = self._pad
+        for i in range(pad):
+            next_buffer[i][:] = buff[i]
+            next_buffer[height-1-i][:] = buff[height-1-i]
+        for i in range(pad, height-pad):
+            for j in range(pad):
+                next_buffer[i][j] = buff[i][j]
+                next_buffer[i][width-1-j] = buff[i][width-1-j]
+
+    def _run_step(self):
+        """
+        :returns: the function run calls for every generation. For CA
+            the empty cell is created and the padding carried over to
+            the second buffer once: the steps don't change the padding,
+            and the one of a toroidal automaton is refreshed before it
+            is read. Engines with their own step, or instrumented
+            automata, use it.
+        """
+        if type(self).step is not CA.step or 'step' in self.__dict__:
+            return self.step
+        next_buffer = self._next_buffer
+        if next_buffer is not None and len(next_buffer) == self._height \
+           and len(next_buffer[0]) == self._width:
+            self._carry_padding(self._buffer, next_buffer)
+        return partial(self._step, self._empty_cell(), False)
+
+    def run(self, n, detect_cycles=False):
+        """
+        Advance up to n generations.
+
+        :param detect_cycles: stop when a generation repeats, i.e. when
+            the automaton has settled into a still life or an
+            oscillator. The cycle is found with Brent's algorithm,
+            which keeps a single generation to compare the following
+            ones with, so the run stops after fewer than twice the
+            generations it takes to enter the cycle plus its period.
+        :returns: the period of the detected cycle (1 for a still life)
+            or None if no cycle was detected
+        """
+        step = self._run_step()
+        if not detect_cycles:
+            for _ in range(n):
+                step()
+            return None
+
+        state_key = self._state_key
+        saved = state_key()
+        # the saved generation moves ahead every `power` generations,
+        # doubling it, until a cycle is longer than it is
+        power = period = 1
+        for _ in range(n):
+            step()
+            key = state_key()
+            if key == saved:
+                return period
+            if period == power:
+                saved = key
+                power *= 2
+                period = 0
+            period += 1
+        return None
+
+    def generations(self, limit=None, history=None):
+        """
+        Step the automaton lazily, one generation per iteration.
+        Nothing but the current generation is kept, unless a history
+        is given.
+
+        :param limit: the number of generations to advance, None to
+            advance until the iteration is stopped
+        :param history: a History recording the current and every
+            following generation
+        :returns: an iterator yielding the automaton itself after
+            every step
+        """
+        if history is not None:
+            history.record(self)
+        count = 0
+        while limit is None or count < limit:
+            self.step()
+            count += 1
+            if history is not None:
+                history.record(self)
+            yield self
+
+    def _state_key(self):
+        """
+        :returns: a copy of the current generation, equal to the one of
+            an equal generation, used to detect cycles
+        """
+        return self._width, self._height, tuple(self)
+
+    def _snapshot(self):
+        """
+        :returns: (width, height, cells) - a copy of the current
+            generation with the cells listed row by row, that can be
+            given back to _restore. Engines may append more items.
+        """
+        return self.width, self.height, list(self)
+
+    def _restore(self, snapshot):
+        """
+        Replace the buffer with the generation saved by _snapshot
+        """
+        width, height, cells = snapshot[:3]
+        self._width = width + 2 * self._pad
+        self._height = height + 2 * self._pad
+        self._buffer = self._load([cells[i*width:(i+1)*width]
+                                   for i in range(height)])
+        self._next_buffer = None
+        self._edges = self._count_edges()
+        self._edited = True
+
+    def _step_changes(self):
+        """
+        :returns: the (row, column, old, new) cells changed by the last
+            step, or None if they aren't known. They are known when the
+            engine lists them, like CA with track_changes set, and only
+            when the generation before the step, with them applied,
+            gives the current one: not after an expansion or after
+            cells were set since the previous step.
+        """
+        return None if self._edited else self._changes
+
+    def instrument(self, collector):
+        """
+        Report measurements of every following step.
+
+        :param collector: a callable receiving the StepStats of every
+            step, like a StepLog, or None to stop the instrumentation.
+            Without a collector step runs uninstrumented.
+        """
+        if collector is None:
+            self.__dict__.pop('step', None)
+        else:
+            self.step = self._instrumented_step
+        self._collector = collector
+
+    def _instrumented_step(self):
+        """
+        Run the step of the automaton with timed rules, boundary check
+        and expansion and report the measurements to the collector
+        """
+        stats = StepStats(self.generation + 1)
+        rules = self._rules
+        boundary_check = self._boundary_check
+        expand = self._expand
+        empty = self._empty_cell()
+        census = [self._census_start()]
+
+        def timed_rules(proxy):
+            start = perf_counter()
+            cell = rules(proxy)
+            stats.rules_time += perf_counter() - start
+            stats.evaluated += 1
+            stats.changed += cell != proxy.center
+            stats.live += cell != empty
+            return cell
+
+        def timed_boundary_check():
+            start = perf_counter()
+            result = boundary_check()
+            stats.boundary_time += perf_counter() - start
+            return result
+
+        def timed_expand(*args):
+            start = perf_counter()
+            expand(*args)
+            stats.expand_time += perf_counter() - start
+            stats.expanded = True
+            census[0] = self._census_start()
+
+        self._rules = timed_rules
+        self._boundary_check = timed_boundary_check
+        self._expand = timed_expand
+        start = perf_counter()
+        try:
+            type(self).step(self)
+        finally:
+            stats.step_time = perf_counter() - start
+            self._rules = rules
+            del self._boundary_check
+            del self._expand
+        counts = self._census_end(census[0])
+        if counts is not None:
+            stats.changed, stats.live = counts
+        self._collector(stats)
+
+    def _census_start(self):
+        """
+        Called by the instrumentation before the cells are updated, for
+        engines that don't call the rules per cell to remember what
+        they need to count the changed and live cells afterwards.
+        """
+        return None
+
+    def _census_end(self, state):
+        """
+        :returns: (changed, live) cell counts of the last step, given the
+            state returned by _census_start before it, or None if they
+            were counted in the calls of the rules
+        """
+        return None
 
     def _apply_rules(self, proxy):
         """
@@ -154,16 +561,33 @@ class CA:
         """
         An iterator that provides read access to a current cell and it's
         neighbors to the external rules function.
+
+        Besides indexing with (row, column) deltas and the neighbors
+        list it has cheaper primitives for the common rules: `center`,
+        `neighbor_sum`, `live_count` and `neighbor_view`, which read the
+        rows of the buffer directly. The engines move the proxy along
+        the rows, so `neighbor_sum` and `live_count` keep the sums of
+        the columns of the previous cell and read only the new column
+        when the proxy moves one cell to the right. `key` is a hashable
+        key of the contents of the neighborhood, for memoized rules.
         """
+        # the offsets of the neighbors, in the order of neighbors
+        _offsets = MOORE.offsets
+
         def __init__(self, CA):
             self._ca = CA
-            self._i = 1
-            self._j = 1
+            self._pad = CA._pad
+            self._i = self._pad
+            self._j = self._pad
+            self._empty = CA._empty_cell()
+            self.neighbor_view = NeighborView(self)
+            self._forget()
 
         def __getitem__(self, deltas):
-            if abs(deltas[1]) > 1 or abs(deltas[0]) > 1:
+            di, dj = deltas
+            if not -1 <= di <= 1 or not -1 <= dj <= 1:
                 raise IndexError
-            return self._ca[self._i + deltas[0], self._j + deltas[1]]
+            return self._ca._buffer[self._i + di][self._j + dj]
 
         def move(self):
             """
@@ -171,16 +595,35 @@ class CA:
             Changes rows automaticaly.
             """
             self._j += 1
-            j_is_too_large = self._j + 1 >= self._ca._width
+            j_is_too_large = self._j + self._pad >= self._ca._width
             if j_is_too_large:
-                self._j = 1
+                self._j = self._pad
             self._i += j_is_too_large
-            if self._i + 1 > self._ca._height:
+            if self._i + self._pad >= self._ca._height:
                 raise IndexError
 
         def _reset(self):
-            self._i = 1
-            self._j = 1
+            self._i = self._pad
+            self._j = self._pad
+            self._forget()
+
+        def _forget(self):
+            """
+            Drop the cached column sums, the cells may have changed
+            """
+            self._sum_buffer = None
+            self._sum_i = self._sum_j = 0
+            self._sum_middle = self._sum_right = 0
+            self._count_buffer = None
+            self._count_i = self._count_j = 0
+            self._count_middle = self._count_right = 0
+
+        @property
+        def center(self):
+            """
+            :returns: the current cell, like proxy[0, 0]
+            """
+            return self._ca._buffer[self._i][self._j]
 
         @property
         def neighbors(self):
@@ -189,7 +632,239 @@ class CA:
             """
             i = self._i
             j = self._j
-            ca = self._ca
-            return [ca[i-1, j-1], ca[i-1, j], ca[i-1, j+1],
-                    ca[i,   j-1],             ca[i,   j+1],
-                    ca[i+1, j-1], ca[i+1, j], ca[i+1, j+1]]
+            buff = self._ca._buffer
+            above = buff[i-1]
+            row = buff[i]
+            below = buff[i+1]
+            return [above[j-1], above[j], above[j+1],
+                    row[j-1],             row[j+1],
+                    below[j-1], below[j], below[j+1]]
+
+        @property
+        def neighbor_sum(self):
+            """
+            :returns: the sum of the neighbor cells, like
+                sum(proxy.neighbors), for numeric cells
+            """
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            above = buff[i-1]
+            row = buff[i]
+            below = buff[i+1]
+            if j == self._sum_j + 1 and i == self._sum_i and \
+               buff is self._sum_buffer:
+                left = self._sum_middle
+                middle = self._sum_right
+            else:
+                left = above[j-1] + row[j-1] + below[j-1]
+                middle = above[j] + row[j] + below[j]
+                self._sum_i = i
+                self._sum_buffer = buff
+            right = above[j+1] + row[j+1] + below[j+1]
+            self._sum_j = j
+            self._sum_middle = middle
+            self._sum_right = right
+            return left + middle + right - row[j]
+
+        @property
+        def live_count(self):
+            """
+            :returns: the number of non empty neighbor cells
+            """
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            empty = self._empty
+            above = buff[i-1]
+            row = buff[i]
+            below = buff[i+1]
+            if j == self._count_j + 1 and i == self._count_i and \
+               buff is self._count_buffer:
+                left = self._count_middle
+                middle = self._count_right
+            else:
+                left = ((above[j-1] != empty) + (row[j-1] != empty) +
+                        (below[j-1] != empty))
+                middle = ((above[j] != empty) + (row[j] != empty) +
+                          (below[j] != empty))
+                self._count_i = i
+                self._count_buffer = buff
+            right = ((above[j+1] != empty) + (row[j+1] != empty) +
+                     (below[j+1] != empty))
+            self._count_j = j
+            self._count_middle = middle
+            self._count_right = right
+            return left + middle + right - (row[j] != empty)
+
+        @property
+        def key(self):
+            """
+            :returns: a hashable key of the contents of the
+                neighborhood, equal for equal neighborhoods: the tuple
+                of the current cell and the neighbors, in their order
+            """
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            above = buff[i-1]
+            row = buff[i]
+            below = buff[i+1]
+            return (row[j], above[j-1], above[j], above[j+1], row[j-1],
+                    row[j+1], below[j-1], below[j], below[j+1])
+
+        def _neighbors(self):
+            """
+            :returns: an iterator over the neighbor cells, in the order
+                of the neighbors list
+            """
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            above = buff[i-1]
+            row = buff[i]
+            below = buff[i+1]
+            yield above[j-1]
+            yield above[j]
+            yield above[j+1]
+            yield row[j-1]
+            yield row[j+1]
+            yield below[j-1]
+            yield below[j]
+            yield below[j+1]
+
+    class NeighborhoodProxy(Proxy):
+        """
+        A proxy for any other neighborhood, which can be indexed with
+        deltas up to its radius. Above a few cells `neighbor_sum` and
+        `live_count` are computed from tables of running sums of the
+        rows, built once per generation: a Moore neighborhood sums a
+        box of a summed area table and the others every row of their
+        runs of consecutive cells, instead of every cell.
+        """
+        # neighborhoods up to this size sum their cells directly
+        DIRECT_SUM = 8
+
+        def __init__(self, CA):
+            super().__init__(CA)
+            neighborhood = CA.neighborhood
+            self._offsets = neighborhood.offsets
+            self._runs = neighborhood.runs
+            self._box = neighborhood.is_box
+            self._tabulate = len(neighborhood) > self.DIRECT_SUM
+            # the current cell first, then the neighbors
+            self._key_offsets = ((0, 0),) + self._offsets
+
+        def __getitem__(self, deltas):
+            di, dj = deltas
+            pad = self._pad
+            if not -pad <= di <= pad or not -pad <= dj <= pad:
+                raise IndexError
+            return self._ca._buffer[self._i + di][self._j + dj]
+
+        @property
+        def neighbors(self):
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            return [buff[i + di][j + dj] for di, dj in self._offsets]
+
+        @property
+        def neighbor_sum(self):
+            buff = self._ca._buffer
+            if not self._tabulate:
+                i = self._i
+                j = self._j
+                return sum(buff[i + di][j + dj] for di, dj in self._offsets)
+            if buff is not self._sum_buffer:
+                self._sum_table = self._table(buff, None)
+                self._sum_buffer = buff
+            return self._lookup(self._sum_table, buff[self._i][self._j])
+
+        @property
+        def live_count(self):
+            buff = self._ca._buffer
+            empty = self._empty
+            if not self._tabulate:
+                i = self._i
+                j = self._j
+                return sum(buff[i + di][j + dj] != empty
+                           for di, dj in self._offsets)
+            if buff is not self._count_buffer:
+                self._count_table = self._table(buff,
+                                                lambda cell: cell != empty)
+                self._count_buffer = buff
+            return self._lookup(self._count_table,
+                                buff[self._i][self._j] != empty)
+
+        @property
+        def key(self):
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            return tuple([buff[i + di][j + dj]
+                          for di, dj in self._key_offsets])
+
+        def _table(self, buff, value):
+            if self._box:
+                return summed_area(buff, value)
+            return row_sums(buff, value)
+
+        def _lookup(self, table, center):
+            """
+            :param center: the value of the current cell in the table
+            :returns: the sum of the neighborhood in a table
+            """
+            i = self._i
+            j = self._j
+            if self._box:
+                r = self._pad
+                top = table[i - r]
+                bottom = table[i + r + 1]
+                return (bottom[j + r + 1] - top[j + r + 1] -
+                        bottom[j - r] + top[j - r] - center)
+            total = 0
+            for di, first, last in self._runs:
+                row = table[i + di]
+                total += row[j + last + 1] - row[j + first]
+            return total
+
+        def _neighbors(self):
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            for di, dj in self._offsets:
+                yield buff[i + di][j + dj]
+
+
+class NeighborView:
+    """
+    A sequence of the neighbor cells of the current position of a
+    proxy, in the order of Proxy.neighbors. It reads the cells when
+    they are accessed, so a single view follows the proxy and no list
+    is built for every cell.
+    """
+    def __init__(self, proxy):
+        self._proxy = proxy
+
+    def __len__(self):
+        return len(self._proxy._offsets)
+
+    def __getitem__(self, index):
+        proxy = self._proxy
+        if isinstance(index, slice):
+            return [proxy[offset] for offset in proxy._offsets[index]]
+        return proxy[proxy._offsets[index]]
+
+    def __iter__(self):
+        return self._proxy._neighbors()
+
+
+def _occupied(cells, empty):
+    """
+    :returns: the number of non empty cells in a sequence
+    """
+    try:
+        return len(cells) - cells.count(empty)
+    except AttributeError:
+        return sum(1 for cell in cells if cell != empty)
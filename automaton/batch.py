@@ -0,0 +1,236 @@
+"""
+Run automata without a display: every initial state file is advanced
+a number of generations with the rules of a rules module, in a pool
+of worker processes, and its final state is written next to the
+statistics of all the runs. Final states never overwrite the initial
+ones or each other: colliding names get a .final suffix.
+
+    python -m pycella.automaton.batch GUI/rules.py glider.rle gun.pyca \
+        --generations 1000 --output results
+
+The rules module has the format of GUI/rules.py: it defines `rules`,
+`empty_cell` and `default_cell`. The initial states are RLE patterns
+(.rle) or files saved with pycella.automaton.storage (.pyca).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from itertools import chain, count
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+from pycella.automaton import rle, storage
+from pycella.automaton.active import ActiveCA
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import CompactCA
+from pycella.automaton.interned import InternedCA
+from pycella.automaton.sparse import SparseCA
+
+ENGINES = {'python': CA, 'active': ActiveCA, 'compact': CompactCA,
+           'sparse': SparseCA, 'interned': InternedCA}
+try:
+    from pycella.automaton.vectorized import VectorizedCA
+    ENGINES['vectorized'] = VectorizedCA
+except ImportError:
+    pass
+
+FORMATS = ('.rle', '.pyca')
+
+
+def load_rules(path):
+    """
+    :returns: the module of a rules file
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None:
+        raise ValueError("can't load rules from {!r}".format(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name in ('rules', 'empty_cell', 'default_cell'):
+        if not hasattr(module, name):
+            raise ValueError("the rules file {!r} doesn't define {}".format(
+                path, name))
+    return module
+
+
+def read_state(path, module, engine, bounded=True):
+    """
+    :returns: an automaton of the given engine with the initial state
+        in a file, with the rules of a rules module
+    """
+    kwargs = {} if engine is SparseCA else {'bounded': bounded}
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.rle':
+        with open(path) as file:
+            return rle.read(file, module.rules, module.empty_cell, engine,
+                            **kwargs)[0]
+    if extension == '.pyca':
+        return storage.load(path, module.rules, module.empty_cell, engine,
+                            **kwargs)
+    raise ValueError("unknown state file format {!r}, expected one of "
+                     "{}".format(extension, ', '.join(FORMATS)))
+
+
+def write_state(ca, path, module):
+    """
+    Write the current generation of an automaton in the format of the
+    extension of the path
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.rle':
+        with open(path, 'w') as file:
+            rle.write(ca, file, module.rules)
+    elif extension == '.pyca':
+        storage.save(ca, path)
+    else:
+        raise ValueError("unknown state file format {!r}".format(extension))
+
+
+def population(ca, empty):
+    """
+    :returns: the number of non empty cells
+    """
+    return sum(1 for cell in ca if cell != empty)
+
+
+def run_job(job):
+    """
+    Advance the automaton of one initial state file and write its
+    final state. Runs in the worker processes.
+
+    :param job: (rules_path, state_path, output_path, generations,
+        engine, bounded, detect_cycles)
+    :returns: the statistics of the run as a dict
+    """
+    (rules_path, state_path, output_path, generations, engine, bounded,
+     detect_cycles) = job
+    stats = {'state': state_path, 'output': output_path, 'engine': engine}
+    try:
+        module = load_rules(rules_path)
+        empty = module.empty_cell()
+        start = perf_counter()
+        ca = read_state(state_path, module, ENGINES[engine], bounded)
+        stats['load_time'] = perf_counter() - start
+        stats['initial_population'] = population(ca, empty)
+        stats['initial_size'] = [ca.width, ca.height]
+
+        start = perf_counter()
+        stats['period'] = ca.run(generations, detect_cycles)
+        stats['run_time'] = perf_counter() - start
+        stats['generations'] = ca.generation
+
+        stats['population'] = population(ca, empty)
+        stats['size'] = [ca.width, ca.height]
+        start = perf_counter()
+        write_state(ca, output_path, module)
+        stats['write_time'] = perf_counter() - start
+    except Exception as e:
+        stats['error'] = '{}: {}'.format(type(e).__name__, e)
+    return stats
+
+
+def jobs(rules_path, states, output, generations, engine='python',
+         bounded=True, detect_cycles=False, output_format=None):
+    """
+    :returns: the jobs for run_job, one per state file, with the final
+        state written in the output directory under the same name. A
+        name that would overwrite an initial state, or the final state
+        of another file with the same name, gets a .final suffix, then
+        .final-2, .final-3 and so on.
+    """
+    taken = {_path_key(state) for state in states}
+    result = []
+    for state in states:
+        name, extension = os.path.splitext(os.path.basename(state))
+        extension = output_format or extension
+        names = chain([name, name + '.final'],
+                      ('{}.final-{}'.format(name, n) for n in count(2)))
+        for candidate in names:
+            path = os.path.join(output, candidate + extension)
+            if _path_key(path) not in taken:
+                break
+        taken.add(_path_key(path))
+        result.append((rules_path, state, path, generations, engine,
+                       bounded, detect_cycles))
+    return result
+
+
+def _path_key(path):
+    """
+    :returns: the path normalized so that paths of the same file are
+        equal
+    """
+    return os.path.normcase(os.path.realpath(path))
+
+
+def run(jobs, workers=None):
+    """
+    Run the jobs in a pool of worker processes, or in this process
+    with workers=1
+
+    :returns: an iterator over the statistics of the runs, in the
+        order they finish
+    """
+    workers = workers or cpu_count()
+    if workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+    with Pool(min(workers, len(jobs))) as pool:
+        yield from pool.imap_unordered(run_job, jobs)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('rules', help="the rules module")
+    parser.add_argument('states', nargs='+', help="initial state files")
+    parser.add_argument('-g', '--generations', type=int, required=True)
+    parser.add_argument('-o', '--output', default='.',
+                        help="the directory of the final states")
+    parser.add_argument('--stats', help="the JSON file of the statistics, "
+                        "by default stats.json in the output directory")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="the format of the final states, by default "
+                        "the one of the initial state")
+    parser.add_argument('--engine', choices=sorted(ENGINES),
+                        default='python')
+    parser.add_argument('--unbounded', action='store_true',
+                        help="let the automata grow")
+    parser.add_argument('--detect-cycles', action='store_true',
+                        help="stop when a generation repeats")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="worker processes, by default one per core")
+    args = parser.parse_args(args)
+
+    os.makedirs(args.output, exist_ok=True)
+    stats = []
+    failed = False
+    print("{:<30} {:>11} {:>10} {:>10} {:>8}".format(
+        'state', 'generations', 'population', 'run s', 'period'))
+    for result in run(jobs(args.rules, args.states, args.output,
+                           args.generations, args.engine, not args.unbounded,
+                           args.detect_cycles, args.format), args.workers):
+        stats.append(result)
+        name = os.path.basename(result['state'])
+        if 'error' in result:
+            failed = True
+            print("{:<30} {}".format(name, result['error']))
+            continue
+        print("{:<30} {:>11} {:>10} {:>10.3f} {:>8}".format(
+            name, result['generations'], result['population'],
+            result['run_time'], result['period'] or '-'))
+
+    stats.sort(key=lambda result: args.states.index(result['state']))
+    with open(args.stats or os.path.join(args.output, 'stats.json'),
+              'w') as file:
+        json.dump({'rules': args.rules, 'runs': stats}, file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+from pycella.automaton.automaton import CA
+
+
+class BitRow:
+    """
+    A row of binary cells packed as bits in a bytearray shared by all
+    the rows of a buffer. Supports indexing, slicing and iteration
+    like a list of 0 and 1.
+    """
+    __slots__ = ('_data', '_offset', '_length')
+
+    def __init__(self, data, offset, length):
+        """
+        :param data: the bytearray the row lives in
+        :param offset: the index of the first bit of the row in `data`,
+            a multiple of 8
+        :param length: the number of cells in the row
+        """
+        self._data = data
+        self._offset = offset
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        data = self._data
+        for bit in range(self._offset, self._offset + self._length):
+            yield (data[bit >> 3] >> (bit & 7)) & 1
+
+    def _bit(self, j):
+        if j < 0:
+            j += self._length
+        if not 0 <= j < self._length:
+            raise IndexError("row index out of range")
+        return self._offset + j
+
+    def __getitem__(self, j):
+        if isinstance(j, slice):
+            return [self[k] for k in range(*j.indices(self._length))]
+        bit = self._bit(j)
+        return (self._data[bit >> 3] >> (bit & 7)) & 1
+
+    def __setitem__(self, j, cell):
+        if isinstance(j, slice):
+            if isinstance(cell, BitRow) and j == slice(None) and \
+               cell._length == self._length:
+                start = self._offset >> 3
+                other = cell._offset >> 3
+                size = (self._length + 7) >> 3
+                self._data[start:start+size] = cell._data[other:other+size]
+                return
+            for k, c in zip(range(*j.indices(self._length)), cell):
+                self[k] = c
+            return
+        bit = self._bit(j)
+        if cell == 1:
+            self._data[bit >> 3] |= 1 << (bit & 7)
+        elif cell == 0:
+            self._data[bit >> 3] &= ~(1 << (bit & 7))
+        else:
+            raise ValueError("a bit cell can only be 0 or 1")
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return 'BitRow({})'.format(list(self))
+
+
+class CompactCA(CA):
+    """
+    An automaton for small integer states which keeps its buffer in a
+    single flat bytearray instead of lists of Python objects. Every row
+    is a view of its part of the bytearray, so indexing, iteration,
+    the proxy and the double buffered step work as they do for CA.
+
+    With bits=8 every cell takes a byte and can be from 0 to 255.
+    With bits=1 the cells are packed as bits and can only be 0 or 1,
+    so a 10000x10000 board takes about 12.5 MB per buffer.
+    The empty cell must be 0.
+    """
+    def __init__(self, buff, rules, empty_cell, bounded=True, bits=8,
+                 directional=False, toroidal=False):
+        if bits not in (1, 8):
+            raise ValueError("cells can be stored in 1 or 8 bits")
+        if empty_cell() != 0:
+            raise ValueError("the empty cell must be 0")
+        self._bits = bits
+        super().__init__(buff, rules, empty_cell, bounded, directional,
+                         toroidal=toroidal)
+
+    @classmethod
+    def from_bytes(cls, data, width, height, rules, empty_cell, bounded=True,
+                   directional=False, edges=None, toroidal=False):
+        """
+        :param data: the rows of a buffer of bits=8, including the ring
+            of empty cells, one byte per cell. It is used as the buffer
+            without copying it, so it can be e.g. a memory mapped file.
+        :param edges: the counts of non empty cells in the top and
+            bottom rows and the left and right columns, if known,
+            to avoid reading the whole data
+        :returns: an automaton of width x height cells using `data`
+        """
+        ca = cls([[0] * width], rules, empty_cell, bounded, 8, directional,
+                 toroidal)
+        data = memoryview(data)
+        stride = width + 2
+        if len(data) < stride * (height + 2):
+            raise ValueError("the data is too short for {}x{} cells".format(
+                width, height))
+        ca._height = height + 2
+        ca._buffer = [data[i*stride:(i+1)*stride] for i in range(height + 2)]
+        ca._edges = list(edges) if edges is not None else ca._count_edges()
+        return ca
+
+    def _load(self, buff):
+        """
+        :returns: the buffer with the content of `buff` surrounded by
+            a ring of empty cells
+        """
+        rows = self._new_buffer(self._width, self._height)
+        for i, row in enumerate(buff):
+            if self._bits == 8:
+                rows[i+1][1:-1] = bytes(row)
+            else:
+                rows[i+1][1:-1] = row
+        return rows
+
+    def _new_buffer(self, width, height):
+        """
+        :returns: a buffer of empty cells with the given dimensions
+        """
+        if self._bits == 8:
+            data = memoryview(bytearray(width * height))
+            return [data[i*width:(i+1)*width] for i in range(height)]
+        stride = (width + 7) >> 3
+        data = bytearray(stride * height)
+        return [BitRow(data, i * stride * 8, width) for i in range(height)]
+
+    @property
+    def nbytes(self):
+        """
+        :returns: the size in bytes of the storage of the current buffer
+        """
+        row = self._buffer[0]
+        if self._bits == 8:
+            return len(row.obj)
+        return len(row._data)
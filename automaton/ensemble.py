@@ -0,0 +1,128 @@
+import numpy
+
+from pycella.automaton.vectorized import _compile, _wrap
+
+
+class Ensemble:
+    """
+    Many independent bounded automata of the same size and rules,
+    stepped together with array operations on a stack of buffers.
+    There is no CA object per member, the per member statistics are
+    kept in arrays indexed like the initial buffers.
+
+    A member is settled once it repeats one of its last `max_period`
+    generations, i.e. it became a still life (period 1) or an
+    oscillator of period up to `max_period`.
+
+    Works with the same rules as VectorizedCA.
+    """
+    def __init__(self, buffers, rules, max_period=2, toroidal=False):
+        """
+        :param toroidal: join the opposite edges of every member, like
+            for CA
+        """
+        self._table = _compile(rules)
+        buffers = numpy.asarray(buffers)
+        if buffers.ndim != 3:
+            raise ValueError("the buffers must all have the same size")
+        if not numpy.isin(buffers, range(len(self._table))).all():
+            raise ValueError("the buffers can only contain the states "
+                             "0 to {}".format(len(self._table) - 1))
+        count, height, width = buffers.shape
+        self._buffer = numpy.zeros((count, height + 2, width + 2),
+                                   dtype=numpy.uint8)
+        self._buffer[:, 1:-1, 1:-1] = buffers
+        self._history = []
+        self.max_period = max_period
+        self.toroidal = toroidal
+        self.generation = 0
+        self.periods = numpy.zeros(count, dtype=numpy.int64)
+        self.settled_at = numpy.full(count, -1, dtype=numpy.int64)
+
+    @classmethod
+    def random(cls, count, width, height, rules, density=0.5, seed=None,
+               max_period=2, toroidal=False):
+        """
+        :returns: an ensemble of `count` random two state soups with
+            the given density of living cells
+        """
+        rng = numpy.random.default_rng(seed)
+        buffers = rng.random((count, height, width)) < density
+        return cls(buffers.astype(numpy.uint8), rules, max_period, toroidal)
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def width(self):
+        return self._buffer.shape[2] - 2
+
+    @property
+    def height(self):
+        return self._buffer.shape[1] - 2
+
+    @property
+    def cells(self):
+        """
+        :returns: a (members, height, width) view of the cells
+        """
+        return self._buffer[:, 1:-1, 1:-1]
+
+    @property
+    def populations(self):
+        """
+        :returns: the number of non empty cells of every member
+        """
+        return numpy.count_nonzero(self.cells, axis=(1, 2))
+
+    @property
+    def settled(self):
+        """
+        :returns: a boolean array, True for the settled members
+        """
+        return self.periods > 0
+
+    def member(self, index):
+        """
+        :returns: the cells of a member as a list of rows, suitable as
+            the initial buffer of a CA
+        """
+        return self.cells[index].tolist()
+
+    def step(self):
+        """
+        Compute the next generation of every member at once
+        """
+        self.generation += 1
+        buff = self._buffer
+        if self.toroidal:
+            _wrap(buff)
+        previous = buff[:, 1:-1, 1:-1].copy()
+        counts = (buff[:, :-2, :-2] + buff[:, :-2, 1:-1] + buff[:, :-2, 2:] +
+                  buff[:, 1:-1, :-2] + buff[:, 1:-1, 2:] +
+                  buff[:, 2:, :-2] + buff[:, 2:, 1:-1] + buff[:, 2:, 2:])
+        buff[:, 1:-1, 1:-1] = self._table[previous, counts]
+
+        if self.max_period:
+            self._history.insert(0, previous)
+            del self._history[self.max_period:]
+            current = buff[:, 1:-1, 1:-1]
+            unsettled = self.periods == 0
+            for period, past in enumerate(self._history, 1):
+                repeated = unsettled & (current == past).all(axis=(1, 2))
+                self.periods[repeated] = period
+                self.settled_at[repeated] = self.generation - period
+                unsettled &= ~repeated
+
+    def run(self, n, until_settled=True):
+        """
+        Advance up to n generations.
+
+        :param until_settled: stop once every member is settled
+        :returns: the number of generations advanced
+        """
+        for i in range(n):
+            if until_settled and self.max_period and self.settled.all():
+                return i
+            self.step()
+        return n
@@ -0,0 +1,293 @@
+from pycella.automaton.sparse import SparseCA
+
+
+class Node:
+    """
+    A canonical quadtree node representing a square of 2**level by
+    2**level cells. Equal squares are represented by the same node,
+    so nodes are compared and hashed by identity.
+    """
+    __slots__ = ('level', 'population', 'nw', 'ne', 'sw', 'se')
+
+    def __init__(self, level, population, nw=None, ne=None, sw=None, se=None):
+        self.level = level
+        self.population = population
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+
+
+class OverBudget(Exception):
+    """
+    Raised by HashLife.advance when the nodes and cached futures grow
+    over the budget
+    """
+
+
+class HashLife:
+    """
+    Memoized quadtree evaluation of a two state outer totalistic rule.
+    Nodes are kept canonical in a table and the future of every node is
+    cached, so repeating patterns in space and time are computed once.
+
+    The nodes and the cached futures together are kept to about
+    `max_nodes`: advance raises OverBudget when they grow over it, and
+    the caller collects the table - only the nodes reachable from the
+    current pattern are kept and the cached futures are dropped - and
+    retries with smaller jumps. A pattern which alone needs more nodes
+    raises the budget to twice its size.
+    """
+    def __init__(self, table, max_nodes=500000):
+        if len(table) != 2:
+            raise ValueError("hashlife supports only two state rules")
+        if table[0][0]:
+            raise ValueError("the rules create cells out of empty space")
+        self._table = table
+        self.max_nodes = max_nodes
+        # None while advancing without a budget
+        self.budget = max_nodes
+        self._nodes = {}
+        self._results = {}
+        self._leaves = (Node(0, 0), Node(0, 1))
+        self._empty = [self._leaves[0]]
+
+    def __len__(self):
+        """
+        :returns: the number of nodes and cached futures
+        """
+        return len(self._nodes) + len(self._results)
+
+    def join(self, nw, ne, sw, se):
+        """
+        :returns: the canonical node with the given quadrants
+        """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = (nw.population + ne.population +
+                          sw.population + se.population)
+            node = Node(nw.level + 1, population, nw, ne, sw, se)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        """
+        :returns: the node of an empty square of the given level
+        """
+        while len(self._empty) <= level:
+            smaller = self._empty[-1]
+            self._empty.append(self.join(smaller, smaller, smaller, smaller))
+        return self._empty[level]
+
+    def center(self, node):
+        """
+        :returns: the node of one level lower in the center of `node`
+        """
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def expand(self, node):
+        """
+        :returns: the node of one level higher with `node` in its center
+        """
+        empty = self.empty(node.level - 1)
+        return self.join(self.join(empty, empty, empty, node.nw),
+                         self.join(empty, empty, node.ne, empty),
+                         self.join(empty, node.sw, empty, empty),
+                         self.join(node.se, empty, empty, empty))
+
+    def advance(self, node, j):
+        """
+        :returns: the node of one level lower in the center of `node`
+            after 2**j generations, for j up to node.level - 2
+        """
+        if node.population == 0:
+            return self.empty(node.level - 1)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+        if self.budget is not None and len(self) > self.budget:
+            raise OverBudget
+
+        if node.level == 2:
+            result = self._step_leaves(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            join = self.join
+            squares = [nw,
+                       join(nw.ne, ne.nw, nw.se, ne.sw),
+                       ne,
+                       join(nw.sw, nw.se, sw.nw, sw.ne),
+                       join(nw.se, ne.sw, sw.ne, se.nw),
+                       join(ne.sw, ne.se, se.nw, se.ne),
+                       sw,
+                       join(sw.ne, se.nw, sw.se, se.sw),
+                       se]
+            if j == node.level - 2:
+                # full speed: two half steps of 2**(j-1) generations
+                squares = [self.advance(square, j - 1) for square in squares]
+                inner = j - 1
+            else:
+                squares = [self.center(square) for square in squares]
+                inner = j
+            s = squares
+            result = join(
+                self.advance(join(s[0], s[1], s[3], s[4]), inner),
+                self.advance(join(s[1], s[2], s[4], s[5]), inner),
+                self.advance(join(s[3], s[4], s[6], s[7]), inner),
+                self.advance(join(s[4], s[5], s[7], s[8]), inner))
+        self._results[key] = result
+        return result
+
+    def _step_leaves(self, node):
+        """
+        :returns: the 2x2 center of a 4x4 node after one generation
+        """
+        a, b, c, d = node.nw, node.ne, node.sw, node.se
+        grid = [[a.nw, a.ne, b.nw, b.ne],
+                [a.sw, a.se, b.sw, b.se],
+                [c.nw, c.ne, d.nw, d.ne],
+                [c.sw, c.se, d.sw, d.se]]
+        grid = [[cell.population for cell in row] for row in grid]
+        table = self._table
+        leaves = self._leaves
+        new = []
+        for i in (1, 2):
+            for j in (1, 2):
+                s = (sum(grid[i-1][j-1:j+2]) + grid[i][j-1] + grid[i][j+1] +
+                     sum(grid[i+1][j-1:j+2]))
+                new.append(leaves[table[grid[i][j]][s]])
+        return self.join(*new)
+
+    def build(self, cells, top, left, level):
+        """
+        :param cells: coordinates of living cells, all inside the square
+        :returns: the node of the 2**level square with top left corner
+            at (top, left) containing the living `cells`
+        """
+        if not cells:
+            return self.empty(level)
+        if level == 0:
+            return self._leaves[1]
+        half = 1 << (level - 1)
+        quadrants = ([], [], [], [])
+        for i, j in cells:
+            quadrants[2 * (i >= top + half) + (j >= left + half)].append((i, j))
+        return self.join(self.build(quadrants[0], top, left, level - 1),
+                         self.build(quadrants[1], top, left + half, level - 1),
+                         self.build(quadrants[2], top + half, left, level - 1),
+                         self.build(quadrants[3], top + half, left + half,
+                                    level - 1))
+
+    def cells(self, node, top, left):
+        """
+        :returns: a generator of the coordinates of the living cells of
+            `node`, whose top left corner is at (top, left)
+        """
+        if node.population == 0:
+            return
+        if node.level == 0:
+            yield top, left
+            return
+        half = 1 << (node.level - 1)
+        yield from self.cells(node.nw, top, left)
+        yield from self.cells(node.ne, top, left + half)
+        yield from self.cells(node.sw, top + half, left)
+        yield from self.cells(node.se, top + half, left + half)
+
+    def collect(self, root):
+        """
+        Drop every cached future and every node not reachable from `root`
+        """
+        self._results = {}
+        self._nodes = {}
+        self._empty = [self._leaves[0]]
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key not in self._nodes:
+                self._nodes[key] = node
+                stack.extend(key)
+        self.budget = max(self.max_nodes, 2 * len(self._nodes))
+
+
+class HashLifeCA(SparseCA):
+    """
+    An unbounded two state automaton which, besides stepping like
+    SparseCA, can jump many generations at once with advance(),
+    using HashLife on a canonical quadtree. The cells are converted
+    from and back to the sparse representation on every advance, so
+    indexing, iteration and printing work as usual in between.
+
+    The rules must expose a two state lookup table, like Rule objects
+    and functions declared with pycella.automaton.rules.totalistic.
+    """
+    def __init__(self, buff, rules, empty_cell, max_nodes=500000):
+        if empty_cell() != 0:
+            raise ValueError("the empty cell must be 0")
+        try:
+            table = rules.table
+        except AttributeError:
+            raise ValueError("{!r} is not a totalistic rule".format(rules))
+        super().__init__(buff, rules, empty_cell)
+        if any(cell != 1 for cell in self._cells.values()):
+            raise ValueError("only buffers of 0 and 1 are supported")
+        self._hashlife = HashLife(table, max_nodes)
+
+    def advance(self, n):
+        """
+        Advance n generations, jumping 2**j generations at a time for
+        every bit j set in n. The window is then the smallest one
+        containing the cells, wherever the pattern went.
+        """
+        if n < 0:
+            raise ValueError("cannot advance a negative number of generations")
+        hashlife = self._hashlife
+        cells = list(self._cells)
+        if cells and n:
+            top = min(i for i, j in cells)
+            left = min(j for i, j in cells)
+            size = max(max(i for i, j in cells) - top,
+                       max(j for i, j in cells) - left) + 1
+            level = max(size - 1, 1).bit_length()
+            root = hashlife.build(cells, top, left, level)
+
+            # the exponents of the jumps, the smallest last
+            jumps = [j for j in range(n.bit_length() - 1, -1, -1)
+                     if n >> j & 1]
+            while jumps:
+                j = jumps.pop()
+                while (root.level < j + 3 or
+                       hashlife.center(hashlife.center(root)).population
+                       != root.population):
+                    half = 1 << (root.level - 1)
+                    root = hashlife.expand(root)
+                    top -= half
+                    left -= half
+                try:
+                    new_root = hashlife.advance(root, j)
+                except OverBudget:
+                    hashlife.collect(root)
+                    if j:
+                        # two half jumps need less of the table
+                        jumps += [j - 1, j - 1]
+                        continue
+                    budget = hashlife.budget
+                    hashlife.budget = None
+                    try:
+                        new_root = hashlife.advance(root, 0)
+                    finally:
+                        hashlife.budget = budget
+                quarter = 1 << (root.level - 2)
+                root = new_root
+                top += quarter
+                left += quarter
+                if len(hashlife) > hashlife.budget:
+                    hashlife.collect(root)
+            self._cells = dict.fromkeys(hashlife.cells(root, top, left), 1)
+        self.generation += n
+        self._shrink()
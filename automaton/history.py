@@ -0,0 +1,191 @@
+from collections import deque
+
+
+class History:
+    """
+    A bounded record of the generations of an automaton that allows
+    stepping back.
+
+    Every recorded generation keeps only the cells that changed since
+    the previous one, so going back costs memory proportional to the
+    activity of the automaton rather than to its area. A full snapshot
+    is kept every `snapshot_every` generations, to jump back far
+    without undoing every change in between, and whenever the buffer
+    was expanded, since the changes can't be undone across it.
+    At most `size` generations are kept, the oldest are dropped.
+
+    The generations are recorded by calling record after every step,
+    or by iterating over CA.generations with the history. The changes
+    of a step are taken from the automaton when it knows them, like
+    ActiveCA does, and found by comparing the generations otherwise.
+    """
+    def __init__(self, size=1000, snapshot_every=100):
+        if size < 1:
+            raise ValueError("the history must keep at least one generation")
+        self.size = size
+        self.snapshot_every = snapshot_every
+        # [generation, snapshot or None, changes from the previous record]
+        self._records = deque()
+        self._last = None
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def generations(self):
+        """
+        :returns: the recorded generations, oldest first
+        """
+        return [record[0] for record in self._records]
+
+    @property
+    def changes(self):
+        """
+        :returns: the (row, column, old, new) cells that changed in the
+            last recorded generation, or None if they aren't known, like
+            for the first generation or after an expansion
+        """
+        if not self._records:
+            return None
+        return self._records[-1][2]
+
+    def clear(self):
+        self._records.clear()
+        self._last = None
+
+    def record(self, ca):
+        """
+        Record the current generation of the automaton. Recording the
+        same generation again, e.g. after editing cells, replaces it.
+        """
+        generation = ca.generation
+        records = self._records
+        if records and generation < records[-1][0]:
+            self.clear()
+        last = self._last
+        changes = None
+        if records and generation == records[-1][0] + 1:
+            changes = ca._step_changes()
+        if changes is None:
+            current = ca._snapshot()
+        else:
+            # the last generation is kept as it is only by the last record
+            current = _apply(last, changes, records[-1][1] is last)
+        self._last = current
+        if not records:
+            records.append([generation, current, None])
+            return
+
+        same = generation == records[-1][0]
+        if current[:2] + current[3:] != last[:2] + last[3:]:
+            if same:
+                record = records[-1]
+                if record[2] is not None:
+                    records[-2][1] = _undo(last, record[2])
+                record[1:] = [current, None]
+                return
+            records[-1][1] = last
+            changes = None
+        else:
+            if changes is None:
+                changes = _changes(last, current)
+            if same:
+                record = records[-1]
+                if record[2] is None:
+                    record[1] = current
+                else:
+                    record[2] = _merge(record[2], changes)
+                    if record[1] is not None:
+                        record[1] = current
+                return
+
+        snapshot = None
+        if self.snapshot_every and generation % self.snapshot_every == 0:
+            snapshot = current
+        records.append([generation, snapshot, changes])
+        while len(records) > self.size:
+            records.popleft()
+            records[0][2] = None
+
+    def rewind(self, ca, steps=1):
+        """
+        Bring the automaton back `steps` recorded generations.
+        The generations after it are forgotten.
+
+        :returns: the generation the automaton is at
+        """
+        records = self._records
+        if not records or records[-1][0] != ca.generation:
+            raise ValueError("the current generation isn't recorded")
+        if not 0 <= steps < len(records):
+            raise ValueError("only {} generations can be rewound".format(
+                len(records) - 1))
+        target = len(records) - 1 - steps
+        # start from the nearest snapshot after the target, if any
+        start = len(records) - 1
+        for index in range(target, start):
+            if records[index][1] is not None:
+                start = index
+                break
+        if start < len(records) - 1:
+            ca._restore(records[start][1])
+        for index in range(start, target, -1):
+            changes = records[index][2]
+            if changes is None:
+                ca._restore(records[index - 1][1])
+            else:
+                for i, j, old, new in changes:
+                    ca[i, j] = old
+
+        ca.generation = records[target][0]
+        for _ in range(steps):
+            records.pop()
+        self._last = ca._snapshot()
+        return ca.generation
+
+
+def _changes(last, current):
+    """
+    :returns: the (row, column, old, new) cells that differ between two
+        snapshots of the same size, in the coordinates of the automaton
+    """
+    width = current[0]
+    return [(k // width + 1, k % width + 1, old, new)
+            for k, (old, new) in enumerate(zip(last[2], current[2]))
+            if old != new]
+
+
+def _undo(snapshot, changes):
+    """
+    :returns: a copy of the snapshot with the changes undone
+    """
+    width = snapshot[0]
+    cells = list(snapshot[2])
+    for i, j, old, new in changes:
+        cells[(i - 1) * width + j - 1] = old
+    return snapshot[:2] + (cells,) + snapshot[3:]
+
+
+def _apply(snapshot, changes, copy):
+    """
+    :param copy: apply the changes to a copy of the snapshot rather
+        than to it
+    :returns: the snapshot with the changes applied
+    """
+    width = snapshot[0]
+    cells = list(snapshot[2]) if copy else snapshot[2]
+    for i, j, old, new in changes:
+        cells[(i - 1) * width + j - 1] = new
+    return snapshot[:2] + (cells,) + snapshot[3:]
+
+
+def _merge(first, second):
+    """
+    :returns: the changes of `first` followed by `second` as one change
+        per cell
+    """
+    merged = {(i, j): [old, new] for i, j, old, new in first}
+    for i, j, old, new in second:
+        merged.setdefault((i, j), [old, new])[1] = new
+    return [(i, j, old, new) for (i, j), (old, new) in merged.items()
+            if old != new]
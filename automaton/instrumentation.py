@@ -0,0 +1,63 @@
+from collections import deque
+
+
+class StepStats:
+    """
+    Measurements of a single step of an automaton. Times are in seconds.
+
+    rules_time is the time spent inside calls of the rules function
+    and is 0 for engines that don't call it per cell. changed and live
+    are the counts of cells that changed in the step and of non empty
+    cells after it.
+    """
+    __slots__ = ('generation', 'step_time', 'rules_time', 'boundary_time',
+                 'expand_time', 'expanded', 'evaluated', 'changed', 'live')
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.step_time = 0.0
+        self.rules_time = 0.0
+        self.boundary_time = 0.0
+        self.expand_time = 0.0
+        self.expanded = False
+        self.evaluated = 0
+        self.changed = 0
+        self.live = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return 'StepStats({})'.format(', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+class StepLog:
+    """
+    A collector for CA.instrument keeping the stats of the most recent
+    steps in a ring buffer
+    """
+    def __init__(self, size=100):
+        self._stats = deque(maxlen=size)
+
+    def __call__(self, stats):
+        self._stats.append(stats)
+
+    def __iter__(self):
+        return iter(self._stats)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __getitem__(self, index):
+        return self._stats[index]
+
+    def clear(self):
+        self._stats.clear()
+
+    def total(self, name):
+        """
+        :returns: the sum of a measurement over the recorded steps
+        """
+        return sum(getattr(stats, name) for stats in self._stats)
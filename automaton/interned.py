@@ -0,0 +1,304 @@
+from array import array
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import MOORE
+
+# the typecodes of the rows, widened when the ids don't fit anymore
+TYPECODES = ('B', 'H', 'I', 'Q')
+
+
+class StateTable:
+    """
+    Interns cell objects: every distinct cell is given a small integer
+    id, the first one 0, and can be looked up by it. Equal cells get
+    the same id, so the cells must be hashable and compare equal only
+    when they are interchangeable for the rules.
+    """
+    def __init__(self):
+        self._ids = {}
+        # the cells by id
+        self.states = []
+
+    def __len__(self):
+        return len(self.states)
+
+    def intern(self, cell):
+        """
+        :returns: the id of a cell, a new one for a cell not seen before
+        """
+        try:
+            return self._ids[cell]
+        except KeyError:
+            id = self._ids[cell] = len(self.states)
+            self.states.append(cell)
+            return id
+
+    def state(self, id):
+        """
+        :returns: the cell of an id
+        """
+        return self.states[id]
+
+
+class InternedCA(CA):
+    """
+    An automaton for cells of any hashable type, which keeps the ids of
+    its cells interned in a StateTable instead of the cells themselves,
+    in rows of unsigned integers as narrow as the number of states
+    allows. The empty cell has the id 0.
+
+    The rules are assumed to be pure: the new cell depends only on the
+    current one and its neighborhood. So the step looks up the id of
+    the new cell by the ids of the neighborhood in a table of the
+    transitions seen so far and calls the rules only for new ones,
+    through a proxy giving them the cells. When the table reaches
+    `max_transitions` entries it starts over.
+
+    Indexing, iteration and snapshots give the cells, like for CA.
+    """
+    def __init__(self, buff, rules, empty_cell, bounded=True,
+                 directional=False, neighborhood=None, toroidal=False,
+                 max_transitions=1 << 20):
+        self._states = StateTable()
+        self._states.intern(empty_cell())
+        self._typecode = TYPECODES[0]
+        self._transitions = {}
+        self.max_transitions = max_transitions
+        super().__init__(buff, rules, _empty_id, bounded, directional,
+                         neighborhood, toroidal)
+        self._proxy = InternedCA.Proxy(self)
+
+    @property
+    def states(self):
+        """
+        :returns: the number of distinct cells seen so far
+        """
+        return len(self._states)
+
+    @property
+    def transitions(self):
+        """
+        :returns: the number of transitions in the table
+        """
+        return len(self._transitions)
+
+    def _load(self, buff):
+        """
+        :returns: the buffer with the ids of the content of `buff`
+            surrounded by a ring of empty cells
+        """
+        intern = self._states.intern
+        rows = [[intern(cell) for cell in row] for row in buff]
+        self._typecode = _typecode(len(self._states))
+        return [array(self._typecode, row)
+                for row in super()._load(rows)]
+
+    def _new_buffer(self, width, height):
+        """
+        :returns: a buffer of empty cells with the given dimensions
+        """
+        empty = array(self._typecode, [0]) * width
+        return [array(self._typecode, empty) for i in range(height)]
+
+    def _widen(self):
+        """
+        Store the ids in wider rows, after a new one didn't fit
+        """
+        self._typecode = _typecode(len(self._states))
+        self._buffer = [array(self._typecode, row) for row in self._buffer]
+        self._next_buffer = None
+
+    def __getitem__(self, coords):
+        return self._states.states[super().__getitem__(coords)]
+
+    def __setitem__(self, coords, cell):
+        id = self._states.intern(cell)
+        try:
+            super().__setitem__(coords, id)
+        except OverflowError:
+            self._widen()
+            super().__setitem__(coords, id)
+
+    def __iter__(self):
+        states = self._states.states
+        pad = self._pad
+        for i in range(pad, self._height-pad):
+            for id in self._buffer[i][pad:self._width-pad]:
+                yield states[id]
+
+    def _state_key(self):
+        # the ids in the widest rows, so widening the rows in the middle
+        # of a run doesn't change the keys
+        pad = self._pad
+        widest = TYPECODES[-1]
+        return self._width, self._height, b''.join(
+            array(widest, row[pad:self._width-pad]).tobytes()
+            for row in self._buffer[pad:self._height-pad])
+
+    def _census_start(self):
+        return [array(row.typecode, row) for row in self._buffer]
+
+    def _census_end(self, previous):
+        pad = self._pad
+        width = self._width
+        changed = live = 0
+        for old, new in zip(previous[pad:-pad], self._buffer[pad:-pad]):
+            old = old[pad:width-pad]
+            new = new[pad:width-pad]
+            changed += sum(1 for a, b in zip(old, new) if a != b)
+            live += len(new) - new.count(0)
+        return changed, live
+
+    def step(self):
+        """
+        Compute the next generation from the table of transitions,
+        calling the rules only for neighborhoods not seen before
+        """
+        if not self._bounded and self._boundary_check():
+            self._expand()
+        self.generation += 1
+        if self._toroidal:
+            self._wrap()
+        if len(self._transitions) >= self.max_transitions:
+            self._transitions.clear()
+
+        while True:
+            buff = self._buffer
+            width = self._width
+            height = self._height
+            next_buffer = self._next_buffer
+            if next_buffer is None or len(next_buffer) != height or \
+               len(next_buffer[0]) != width or \
+               next_buffer[0].typecode != self._typecode:
+                next_buffer = self._new_buffer(width, height)
+            try:
+                if self.neighborhood == MOORE:
+                    self._step_moore(buff, next_buffer)
+                else:
+                    self._step_offsets(buff, next_buffer)
+            except OverflowError:
+                # a new id didn't fit, the current buffer is untouched
+                self._widen()
+                continue
+            break
+
+        pad = self._pad
+        for i in range(pad):
+            next_buffer[i][:] = buff[i]
+            next_buffer[height-1-i][:] = buff[height-1-i]
+        for i in range(pad, height-pad):
+            for j in range(pad):
+                next_buffer[i][j] = buff[i][j]
+                next_buffer[i][width-1-j] = buff[i][width-1-j]
+        self._next_buffer = buff
+        self._buffer = next_buffer
+        self._edges = self._count_edges()
+        self._proxy._reset()
+
+    def _evaluate(self, i, j):
+        """
+        :returns: the id of the new cell at (i, j) by the rules
+        """
+        proxy = self._proxy
+        proxy._i = i
+        proxy._j = j
+        return self._states.intern(self._rules(proxy))
+
+    def _step_moore(self, buff, next_buffer):
+        """
+        Write the next generation of a Moore neighborhood in
+        next_buffer. The key of a cell is made of the three columns of
+        ids of its neighborhood, zipped once per row.
+        """
+        transitions = self._transitions
+        get = transitions.get
+        for i in range(1, self._height-1):
+            columns = list(zip(buff[i-1], buff[i], buff[i+1]))
+            new_row = next_buffer[i]
+            for j, key in enumerate(zip(columns, columns[1:], columns[2:]),
+                                    1):
+                id = get(key)
+                if id is None:
+                    id = transitions[key] = self._evaluate(i, j)
+                new_row[j] = id
+
+    def _step_offsets(self, buff, next_buffer):
+        """
+        Write the next generation of any other neighborhood in
+        next_buffer, keyed by the ids of the cell and its neighbors
+        """
+        transitions = self._transitions
+        get = transitions.get
+        offsets = ((0, 0),) + self.neighborhood.offsets
+        pad = self._pad
+        width = self._width
+        for i in range(pad, self._height-pad):
+            rows = [(buff[i + di], dj) for di, dj in offsets]
+            new_row = next_buffer[i]
+            for j in range(pad, width-pad):
+                key = tuple([row[j + dj] for row, dj in rows])
+                id = get(key)
+                if id is None:
+                    id = transitions[key] = self._evaluate(i, j)
+                new_row[j] = id
+
+    class Proxy(CA.NeighborhoodProxy):
+        """
+        A proxy giving the rules the cells of the ids in the buffer
+        """
+        def __init__(self, CA):
+            super().__init__(CA)
+            self._states = CA._states.states
+            self._empty = 0
+
+        def __getitem__(self, deltas):
+            return self._states[super().__getitem__(deltas)]
+
+        @property
+        def center(self):
+            return self._states[self._ca._buffer[self._i][self._j]]
+
+        @property
+        def neighbors(self):
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            states = self._states
+            return [states[buff[i + di][j + dj]] for di, dj in self._offsets]
+
+        @property
+        def neighbor_sum(self):
+            return sum(self.neighbors)
+
+        @property
+        def key(self):
+            # the cells, the ids are only meaningful to this automaton
+            states = self._states
+            return tuple([states[id] for id in super().key])
+
+        @property
+        def live_count(self):
+            # compares the ids to the one of the empty cell
+            i = self._i
+            j = self._j
+            buff = self._ca._buffer
+            return sum(1 for di, dj in self._offsets if buff[i + di][j + dj])
+
+        def _neighbors(self):
+            states = self._states
+            for id in super()._neighbors():
+                yield states[id]
+
+
+def _empty_id():
+    return 0
+
+
+def _typecode(states):
+    """
+    :returns: the narrowest typecode of rows holding ids of `states`
+    """
+    for typecode in TYPECODES:
+        if states <= 1 << 8 * array(typecode).itemsize:
+            return typecode
+    raise OverflowError("too many states")
@@ -0,0 +1,161 @@
+"""
+The neighborhoods an automaton can give its rules: the cells at fixed
+(row, column) offsets from the current cell. The sums of the cells of a
+neighborhood larger than a few cells are computed from tables of
+running sums, built once per generation, so they take a constant or a
+per row amount of work regardless of how many cells are summed.
+"""
+from itertools import accumulate, chain
+from operator import add
+
+
+class Neighborhood:
+    """
+    A set of (row, column) offsets around a cell, the cell itself
+    excluded. The offsets are kept sorted by row and column, which is
+    the order of Proxy.neighbors.
+    """
+    def __init__(self, offsets, name=None):
+        """
+        :param offsets: (row, column) offsets of the neighbors
+        :param name: used in the representation
+        """
+        offsets = tuple(sorted({(int(di), int(dj)) for di, dj in offsets}))
+        if not offsets:
+            raise ValueError("a neighborhood needs at least one cell")
+        if (0, 0) in offsets:
+            raise ValueError("the cell isn't part of its own neighborhood")
+        self.offsets = offsets
+        self.radius = max(max(abs(di), abs(dj)) for di, dj in offsets)
+        self.runs = _runs(offsets)
+        self._name = name
+
+    @classmethod
+    def moore(cls, radius=1):
+        """
+        :returns: the (2 * radius + 1) squared box around a cell
+        """
+        _check_radius(radius)
+        return cls(((di, dj) for di in range(-radius, radius + 1)
+                    for dj in range(-radius, radius + 1) if di or dj),
+                   'moore({})'.format(radius))
+
+    @classmethod
+    def von_neumann(cls, radius=1):
+        """
+        :returns: the cells at most `radius` steps away horizontally
+            and vertically combined, a diamond
+        """
+        _check_radius(radius)
+        return cls(((di, dj) for di in range(-radius, radius + 1)
+                    for dj in range(-radius, radius + 1)
+                    if 0 < abs(di) + abs(dj) <= radius),
+                   'von_neumann({})'.format(radius))
+
+    @classmethod
+    def hexagonal(cls, radius=1):
+        """
+        :returns: the cells at most `radius` steps away on a hexagonal
+            grid drawn on the square one like Golly does, every row
+            shifted half a cell right of the one above it. The
+            neighbors of radius 1 are the Moore ones but the top right
+            and bottom left.
+        """
+        _check_radius(radius)
+        return cls(((di, dj) for di in range(-radius, radius + 1)
+                    for dj in range(-radius, radius + 1)
+                    if (di or dj) and abs(di - dj) <= radius),
+                   'hexagonal({})'.format(radius))
+
+    @classmethod
+    def from_mask(cls, mask):
+        """
+        :param mask: rows of truthy cells for the neighbors, with an
+            odd number of rows and columns and the current cell in the
+            middle, where it is ignored
+        :returns: the neighborhood of the mask
+        """
+        height = len(mask)
+        width = len(mask[0]) if height else 0
+        if not height % 2 or not width % 2 or \
+           any(len(row) != width for row in mask):
+            raise ValueError("the mask must have an odd number of rows "
+                             "and columns of the same length")
+        return cls((i - height // 2, j - width // 2)
+                   for i, row in enumerate(mask) for j, cell in enumerate(row)
+                   if cell and (i, j) != (height // 2, width // 2))
+
+    @property
+    def is_box(self):
+        """
+        :returns: True for a Moore neighborhood, whose sums are looked
+            up in a summed area table
+        """
+        return len(self.offsets) == (2 * self.radius + 1) ** 2 - 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __eq__(self, other):
+        return isinstance(other, Neighborhood) and \
+            self.offsets == other.offsets
+
+    def __hash__(self):
+        return hash(self.offsets)
+
+    def __repr__(self):
+        if self._name:
+            return 'Neighborhood.{}'.format(self._name)
+        return 'Neighborhood({!r})'.format(self.offsets)
+
+
+def _check_radius(radius):
+    if radius < 1:
+        raise ValueError("the radius must be at least 1")
+
+
+def _runs(offsets):
+    """
+    :returns: the (row, first column, last column) runs of consecutive
+        offsets in the same row
+    """
+    runs = []
+    for di, dj in offsets:
+        if runs and runs[-1][0] == di and runs[-1][2] == dj - 1:
+            runs[-1][2] = dj
+        else:
+            runs.append([di, dj, dj])
+    return tuple(tuple(run) for run in runs)
+
+
+def row_sums(buff, value=None):
+    """
+    :param value: a function of a cell giving the number summed for
+        it, by default the cell itself
+    :returns: the running sums of the rows of a buffer, where
+        sums[i][j] is the sum of the first j cells of row i
+    """
+    if value is not None:
+        buff = [map(value, row) for row in buff]
+    return [list(accumulate(chain((0,), row))) for row in buff]
+
+
+def summed_area(buff, value=None):
+    """
+    :param value: like for row_sums
+    :returns: the summed area table of a buffer, one row longer and
+        one column wider than it, where table[i][j] is the sum of the
+        cells of the first i rows and j columns
+    """
+    previous = [0] * (len(buff[0]) + 1)
+    table = [previous]
+    for row in row_sums(buff, value):
+        previous = list(map(add, previous, row))
+        table.append(previous)
+    return table
+
+
+MOORE = Neighborhood.moore()
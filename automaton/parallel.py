@@ -0,0 +1,202 @@
+from multiprocessing import Pool, cpu_count, shared_memory
+
+from pycella.automaton.automaton import CA
+
+
+class ParallelCA(CA):
+    """
+    An automaton which splits every step into horizontal strips of
+    rows evaluated in parallel by a pool of worker processes.
+
+    The buffer lives in shared memory, so the workers read the current
+    generation (including the one row halo around their strip) and
+    write the next one into a second shared buffer without pickling
+    the grid. The buffers swap roles after every step. Because every
+    cell is computed from the previous generation only, the result is
+    identical to the one of CA.
+
+    The cells must be integers from 0 to 255 and the rules function
+    must be picklable (e.g. defined at module level). Call close(), or
+    use the automaton as a context manager, to stop the workers and
+    free the shared memory.
+    """
+    def __init__(self, buff, rules, empty_cell, bounded=True, workers=None,
+                 directional=False, toroidal=False):
+        super().__init__(buff, rules, empty_cell, bounded, directional,
+                         toroidal=toroidal)
+        self._front = None
+        self._back = None
+        # sharing first starts the resource tracker, which the workers
+        # inherit, so they don't unlink the buffers when they exit
+        self._share()
+        self._workers = workers or cpu_count()
+        self._pool = Pool(self._workers, _init_worker,
+                          (rules, empty_cell()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared buffers
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._front is not None:
+            self._buffer = [list(row) for row in self._buffer]
+            self._release()
+
+    def _share(self):
+        """
+        Move the content of the buffer in a pair of shared buffers
+        """
+        rows = self._buffer
+        width = self._width
+        front = shared_memory.SharedMemory(create=True,
+                                           size=width * self._height)
+        back = shared_memory.SharedMemory(create=True,
+                                          size=width * self._height)
+        for i, row in enumerate(rows):
+            front.buf[i*width:(i+1)*width] = bytes(row)
+        back.buf[:] = front.buf
+        self._release()
+        self._front = front
+        self._back = back
+        self._buffer = _rows(front, width, self._height)
+
+    def _release(self):
+        for shm in (self._front, self._back):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._front = None
+        self._back = None
+
+    def _expand(self, factor=2):
+        """
+        Create a roughly two times larger buffer and
+        copy the current buffer in the center of the new one
+        """
+        self._buffer = [list(row) for row in self._buffer]
+        super()._expand(factor)
+        self._share()
+
+    def _restore(self, snapshot):
+        super()._restore(snapshot)
+        self._share()
+
+    def _census_start(self):
+        return self._interior()
+
+    def _census_end(self, previous):
+        current = self._interior()
+        changed = sum(1 for old, new in zip(previous, current) if old != new)
+        return changed, len(current) - current.count(self._empty_cell())
+
+    def _interior(self):
+        """
+        :returns: a copy of the cells of the front buffer without the
+            padding, which holds copies of the edges when toroidal
+        """
+        data = bytes(self._front.buf)
+        width = self._width
+        return b''.join(data[i*width + 1:(i+1)*width - 1]
+                        for i in range(1, self._height - 1))
+
+    def step(self):
+        """
+        Apply the rules to every cell in the buffer, one strip of rows
+        per worker
+        """
+        if not self._bounded and self._boundary_check():
+            self._expand()
+        self.generation += 1
+        if self._toroidal:
+            self._wrap()
+
+        rows = self._height - 2
+        strips = min(self._workers, rows)
+        bounds = [1 + rows * k // strips for k in range(strips + 1)]
+        tasks = [(self._front.name, self._back.name, self._width,
+                  self._height, bounds[k], bounds[k+1])
+                 for k in range(strips)]
+        self._pool.map(_step_strip, tasks)
+
+        self._front, self._back = self._back, self._front
+        self._buffer = _rows(self._front, self._width, self._height)
+        self._edges = self._count_edges()
+
+
+def _rows(shm, width, height):
+    """
+    :returns: a list of row views over a shared buffer
+    """
+    return [shm.buf[i*width:(i+1)*width] for i in range(height)]
+
+
+class _SharedView:
+    """
+    Read access to a shared buffer for a proxy in a worker process
+    """
+    _pad = 1
+
+    def __init__(self, rows, width, height, empty):
+        self._buffer = rows
+        self._width = width
+        self._height = height
+        self._empty = empty
+
+    def _empty_cell(self):
+        return self._empty
+
+    __getitem__ = CA.__getitem__
+
+
+# state of a worker process
+_worker = {'rules': None, 'empty': None, 'names': None, 'shared': ()}
+
+
+def _init_worker(rules, empty):
+    _worker['rules'] = rules
+    _worker['empty'] = empty
+
+
+def _attach(front_name, back_name, width, height):
+    """
+    :returns: the rows of the shared front and back buffers, attaching
+        to them once per worker
+    """
+    if _worker['names'] != (front_name, back_name):
+        for shm in _worker['shared']:
+            shm.close()
+        shared = []
+        for name in (front_name, back_name):
+            shared.append(shared_memory.SharedMemory(name=name))
+        _worker['shared'] = shared
+        _worker['names'] = (front_name, back_name)
+    front, back = _worker['shared']
+    return _rows(front, width, height), _rows(back, width, height)
+
+
+def _step_strip(task):
+    """
+    Write the next generation of the rows from start to stop in the
+    back buffer, reading the current one from the front buffer
+    """
+    front_name, back_name, width, height, start, stop = task
+    front, back = _attach(front_name, back_name, width, height)
+    proxy = CA.Proxy(_SharedView(front, width, height, _worker['empty']))
+    rules = _worker['rules']
+    for i in range(start, stop):
+        row = back[i]
+        proxy._i = i
+        for j in range(1, width - 1):
+            proxy._j = j
+            row[j] = rules(proxy)
+    for row in front + back:
+        row.release()
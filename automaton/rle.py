@@ -0,0 +1,276 @@
+"""
+The run length encoded pattern format of Golly and most Life software.
+
+A pattern is a header line `x = <width>, y = <height>, rule = <rule>`
+followed by runs of cells: `<count><tag>`, where the tag is `b` for an
+empty and `o` for a living cell of a two state pattern, `.` for an
+empty cell and `A` to `X`, `pA` to `pX` and so on for the states from 1
+up of a multi state pattern. `$` ends a row and `!` the pattern. A
+missing count means 1, cells missing at the end of a row are empty.
+Lines starting with `#` are comments.
+"""
+import io
+import re
+from itertools import groupby, islice
+
+from pycella.automaton.automaton import CA
+
+MAX_LINE = 70
+# characters read from a file at a time
+CHUNK = 1 << 16
+TOKEN = re.compile(r'\s*(\d*)\s*([bo.$!]|[p-y]?[A-X])')
+HEADER = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)'
+                    r'(?:\s*,\s*rule\s*=\s*(\S+))?')
+
+
+def read(file, rules, empty_cell, engine=CA, chunk_size=CHUNK, **kwargs):
+    """
+    Read an RLE pattern from a text file straight into an automaton.
+    The file is parsed chunk by chunk and the rows are decoded one at
+    a time while the engine copies them into its storage, so besides
+    the automaton itself memory stays bounded by the chunk size and
+    the width of the pattern.
+
+    :param engine: the class of the automaton, CA or one of its
+        subclasses, which gets the rest of the keyword arguments
+    :returns: (ca, rule) - the automaton and the rule of the header,
+        or None if it has none
+    """
+    width, height, rule = _header(iter(file.readline, ''))
+    runs = _runs(iter(lambda: file.read(chunk_size), ''))
+    rows = _Rows(_decode(runs, width, height, empty_cell()), width, height)
+    return engine(rows, rules, empty_cell, **kwargs), rule
+
+
+class _Rows:
+    """
+    The rows of a pattern as the initial buffer of an automaton.
+    They are decoded while iterating, which can be done only once.
+    """
+    def __init__(self, rows, width, height):
+        self._rows = rows
+        self._width = width
+        self._height = height
+
+    def __len__(self):
+        return self._height
+
+    def __getitem__(self, index):
+        # the automata look at the first row only for the width
+        if index != 0:
+            raise IndexError("the rows can only be iterated")
+        return [0] * self._width
+
+    def __iter__(self):
+        return self._rows
+
+
+def write(ca, file, rule=None, multistate=None):
+    """
+    Write the current generation of an automaton with integer cells to
+    a text file as an RLE pattern, one row of the automaton at a time.
+
+    :param rule: the rule written in the header - a rulestring or
+        anything with a rulestring or birth and survive sets, like
+        Rule and functions declared with totalistic
+    :param multistate: write the cells with the multi state tags, by
+        default only if some cell is larger than 1, which takes an
+        extra pass over the cells
+    """
+    width = ca.width
+    if multistate is None:
+        multistate = any(cell > 1 for cell in ca)
+    cells = iter(ca)
+    rows = (islice(cells, width) for i in range(ca.height))
+    for line in _lines(rows, width, ca.height, _rulestring(rule),
+                       multistate):
+        file.write(line + '\n')
+
+
+def dumps(ca, rule=None):
+    """
+    :returns: the current generation of an automaton with integer cells
+        as an RLE pattern, see write
+    """
+    text = io.StringIO()
+    write(ca, text, rule)
+    return text.getvalue()
+
+
+def loads(text):
+    """
+    :returns: (buff, rule) - the cells of an RLE pattern as a list of
+        rows suitable as the initial buffer of a CA and the rule of its
+        header, or None if it has none
+    """
+    lines = iter(text.splitlines())
+    width, height, rule = _header(lines)
+    return list(_decode(_runs(lines), width, height)), rule
+
+
+def _rulestring(rule):
+    """
+    :returns: the rulestring of a rule, or None
+    """
+    if rule is None or isinstance(rule, str):
+        return rule
+    try:
+        return rule.rulestring
+    except AttributeError:
+        pass
+    try:
+        return 'B{}/S{}'.format(''.join(str(i) for i in sorted(rule.birth)),
+                                ''.join(str(i) for i in sorted(rule.survive)))
+    except AttributeError:
+        return None
+
+
+def _header(lines):
+    """
+    Skip the comments and parse the header line
+
+    :returns: (width, height, rule)
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = HEADER.match(line)
+        if not match:
+            raise ValueError("invalid RLE header {!r}".format(line))
+        width, height, rule = match.groups()
+        return int(width), int(height), rule
+    raise ValueError("the pattern has no header")
+
+
+def _runs(chunks):
+    """
+    :param chunks: an iterable of consecutive pieces of the body of a
+        pattern, split anywhere
+    :returns: an iterator over the (count, state) runs of the body,
+        with None as the state of the row ends
+    """
+    rest = ''
+    for chunk in chunks:
+        data = rest + chunk
+        position = 0
+        while True:
+            match = TOKEN.match(data, position)
+            if not match:
+                break
+            count, tag = match.groups()
+            if tag == '!':
+                return
+            position = match.end()
+            yield int(count) if count else 1, _state(tag)
+        # an unfinished run at the end goes on in the next chunk
+        rest = data[position:]
+        if len(rest.strip()) > 32:
+            break
+    if rest.strip():
+        raise ValueError("invalid RLE data at {!r}".format(rest.strip()[:10]))
+
+
+def _decode(runs, width, height, empty=0):
+    """
+    :returns: an iterator over the rows of cells of the runs of a
+        pattern, new lists of `width` cells
+    """
+    row = [empty] * width
+    i = j = 0
+    for count, state in runs:
+        if state is None:
+            for k in range(count):
+                if i < height:
+                    yield row
+                    row = [empty] * width
+                i += 1
+            j = 0
+            continue
+        if i >= height or j + count > width:
+            raise ValueError("the pattern is larger than its header says")
+        if state:
+            row[j:j+count] = [state] * count
+        j += count
+    while i < height:
+        yield row
+        row = [empty] * width
+        i += 1
+
+
+def _state(tag):
+    """
+    :returns: the state of a cell tag, None for the end of a row
+    """
+    if tag == '$':
+        return None
+    if tag in 'b.':
+        return 0
+    if tag == 'o':
+        return 1
+    if len(tag) == 1:
+        return ord(tag) - ord('A') + 1
+    return (ord(tag[0]) - ord('p') + 1) * 24 + ord(tag[1]) - ord('A') + 1
+
+
+def _tag(state, multistate):
+    """
+    :returns: the tag of a cell state
+    """
+    if not multistate:
+        if state not in (0, 1):
+            raise ValueError("a two state pattern can't contain {!r}".format(
+                state))
+        return 'o' if state else 'b'
+    if state == 0:
+        return '.'
+    if not 0 < state < 256:
+        raise ValueError("RLE supports the states 0 to 255")
+    prefix, letter = divmod(state - 1, 24)
+    return ('' if not prefix else chr(ord('p') + prefix - 1)) + \
+        chr(ord('A') + letter)
+
+
+def _row_runs(row, multistate):
+    """
+    :returns: the (count, tag) runs of a row, without the empty cells
+        at its end
+    """
+    runs = [(sum(1 for _ in group), cell) for cell, group in groupby(row)]
+    if runs and runs[-1][1] == 0:
+        runs.pop()
+    return [(count, _tag(cell, multistate)) for count, cell in runs]
+
+
+def _lines(rows, width, height, rule, multistate):
+    """
+    :returns: an iterator over the lines of the pattern of the rows,
+        at most MAX_LINE characters long
+    """
+    header = 'x = {}, y = {}'.format(width, height)
+    if rule:
+        header += ', rule = {}'.format(rule)
+    yield header
+
+    line = ''
+    ends = 0
+    for row in rows:
+        runs = _row_runs(row, multistate)
+        if runs:
+            if ends:
+                tokens = ['{}$'.format(ends) if ends > 1 else '$']
+            else:
+                tokens = []
+            tokens += ['{}{}'.format(count, tag) if count > 1 else tag
+                       for count, tag in runs]
+            ends = 0
+            for token in tokens:
+                if len(line) + len(token) > MAX_LINE:
+                    yield line
+                    line = ''
+                line += token
+        ends += 1
+    if len(line) + 1 > MAX_LINE:
+        yield line
+        line = ''
+    yield line + '!'
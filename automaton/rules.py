@@ -1,16 +1,224 @@
+import re
+from collections import OrderedDict
+
+
+class Rule:
+    """
+    A declarative outer totalistic rule. The new state of a cell is
+    looked up in a table by the current state of the cell and the sum
+    of its neighbors, so engines can use the table directly instead of
+    calling the rule for every cell. The rule is still callable with a
+    proxy, like any rules function.
+    """
+    def __init__(self, table):
+        """
+        :param table: a sequence of rows, one per state, where
+            table[state][count] is the new state of a cell in `state`
+            whose neighbors sum up to `count`. Every row must cover all
+            possible sums (0 to 8 * (number of states - 1)).
+        """
+        table = tuple(tuple(row) for row in table)
+        states = len(table)
+        if states < 2:
+            raise ValueError("a rule needs at least two states")
+        for row in table:
+            if len(row) != 8 * (states - 1) + 1:
+                raise ValueError("every row of the table must have {} "
+                                 "entries".format(8 * (states - 1) + 1))
+            if any(cell not in range(states) for cell in row):
+                raise ValueError("the table can only contain the states "
+                                 "0 to {}".format(states - 1))
+        self.table = table
+
+    @classmethod
+    def from_sets(cls, birth, survive):
+        """
+        :returns: a two state rule where an empty cell becomes 1 if the
+            count of its living neighbors is in `birth` and a living cell
+            stays 1 if the count is in `survive`
+        """
+        return cls([[int(count in birth) for count in range(9)],
+                    [int(count in survive) for count in range(9)]])
+
+    @classmethod
+    def from_rulestring(cls, rulestring):
+        """
+        :param rulestring: a Golly style rule like "B3/S23", "S23/B3",
+            "B2/S" or the S/B form "23/3"
+        :returns: the corresponding two state rule
+        """
+        rulestring = rulestring.strip().upper()
+        for pattern, birth_first in RULESTRING_PATTERNS:
+            match = re.match(pattern, rulestring)
+            if match:
+                break
+        else:
+            raise ValueError("invalid rulestring {!r}".format(rulestring))
+        birth, survive = match.groups() if birth_first else \
+            reversed(match.groups())
+        return cls.from_sets({int(c) for c in birth},
+                             {int(c) for c in survive})
+
+    @property
+    def states(self):
+        return len(self.table)
+
+    @property
+    def birth(self):
+        """
+        :returns: the counts for which an empty cell becomes 1
+            (only for two state rules)
+        """
+        self._check_binary()
+        return frozenset(i for i, cell in enumerate(self.table[0]) if cell)
+
+    @property
+    def survive(self):
+        """
+        :returns: the counts for which a living cell stays 1
+            (only for two state rules)
+        """
+        self._check_binary()
+        return frozenset(i for i, cell in enumerate(self.table[1]) if cell)
+
+    @property
+    def rulestring(self):
+        return 'B{}/S{}'.format(''.join(str(i) for i in sorted(self.birth)),
+                                ''.join(str(i) for i in sorted(self.survive)))
+
+    def _check_binary(self):
+        if self.states != 2:
+            raise AttributeError("only two state rules have birth and "
+                                 "survive sets")
+
+    def __call__(self, proxy):
+        return self.table[proxy.center][proxy.neighbor_sum]
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and self.table == other.table
+
+    def __hash__(self):
+        return hash(self.table)
+
+    def __repr__(self):
+        if self.states == 2:
+            return 'Rule.from_rulestring({!r})'.format(self.rulestring)
+        return 'Rule({!r})'.format(self.table)
+
+
+class Memoized:
+    """
+    A rules function with a bounded cache of its results, keyed by the
+    contents of the neighborhood (proxy.key). The rules must be pure -
+    the new cell depends only on the current one and its neighbors -
+    and the cells hashable. The least recently used results are dropped
+    when the cache is full. Expensive rules, called for the few distinct
+    neighborhoods of a typical board, become dictionary lookups. Rules
+    cheaper than hashing the neighborhood, like life_rules, or cells
+    with slow __hash__ and __eq__ methods are better off without it -
+    see InternedCA for the latter.
+
+        ca = CA(buff, Memoized(rules), empty_cell)
+
+    A cache is meant for automata with the same neighborhood. The hit
+    and miss counters of rules sent to worker processes, like by
+    ParallelCA, stay in the workers.
+    """
+    def __init__(self, rules, size=4096):
+        """
+        :param rules: the rules function
+        :param size: the number of results kept
+        """
+        if size < 1:
+            raise ValueError("the cache must keep at least one result")
+        self.rules = rules
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        # engines evaluating totalistic rules directly still can
+        for name in ('birth', 'survive', 'table'):
+            if hasattr(rules, name):
+                setattr(self, name, getattr(rules, name))
+
+    def __call__(self, proxy):
+        key = proxy.key
+        cache = self._cache
+        try:
+            cell = cache[key]
+        except KeyError:
+            self.misses += 1
+            cell = cache[key] = self.rules(proxy)
+            if len(cache) > self.size:
+                cache.popitem(last=False)
+            return cell
+        self.hits += 1
+        cache.move_to_end(key)
+        return cell
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self):
+        """
+        :returns: the fraction of the calls answered from the cache
+        """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def clear(self):
+        """
+        Drop the cached results and reset the counters
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return 'Memoized({!r}, size={})'.format(self.rules, self.size)
+
+
+RULESTRING_PATTERNS = [(r'^B([0-8]*)/?S([0-8]*)$', True),
+                       (r'^S([0-8]*)/?B([0-8]*)$', False),
+                       (r'^([0-8]*)/([0-8]*)$', False)]
+
+
+def totalistic(birth, survive):
+    """
+    Declare a rules function as binary outer totalistic. The function is
+    left untouched and still works through the proxy, but it gets the
+    `birth`, `survive` and `table` attributes of the equivalent Rule,
+    so engines that know how to evaluate the table directly (like
+    pycella.automaton.vectorized.VectorizedCA) can skip calling it.
+
+    :param birth: neighbor counts for which an empty (0) cell becomes 1
+    :param survive: neighbor counts for which a living (1) cell stays 1
+    """
+    rule = Rule.from_sets(birth, survive)
+
+    def declare(rules):
+        rules.birth = rule.birth
+        rules.survive = rule.survive
+        rules.table = rule.table
+        return rules
+    return declare
+
+
+@totalistic(birth={3}, survive={2, 3})
 def life_rules(proxy):
-    s = sum(proxy.neighbors)
+    s = proxy.neighbor_sum
     if s < 2 or s > 3:
         return 0
-    elif s == 3 and proxy[0, 0] == 0:
+    elif s == 3 and proxy.center == 0:
         return 1
     else:
-        return proxy[0, 0]
+        return proxy.center
 
+@totalistic(birth={2}, survive=())
 def seeds_rules(proxy):
-    s = sum(proxy.neighbors)
-    if s == 2 and proxy[0, 0] == 0:
+    s = proxy.neighbor_sum
+    if s == 2 and proxy.center == 0:
         return 1
     else:
         return 0
-
@@ -0,0 +1,232 @@
+from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import MOORE
+
+
+class SparseCA(CA):
+    """
+    An unbounded automaton which keeps only its non empty cells in a
+    dictionary keyed by their coordinates and on every step evaluates
+    only them and their neighbors, so memory and step time are
+    proportional to the population instead of the area the pattern
+    has covered.
+
+    The automaton is seen through a window, which starts as the
+    initial buffer and grows to contain every non empty cell.
+    Indexing, width, height and iteration work on the window just like
+    they work on the buffer of CA, reading outside of it gives empty
+    cells. The empty cell is created once and shared.
+
+    The rules have to keep an empty cell surrounded by empty cells
+    empty, otherwise the plane would fill up.
+    """
+    def __init__(self, buff, rules, empty_cell, neighborhood=None):
+        """
+        :param neighborhood: the Neighborhood of the rules, by default
+            the 3x3 Moore one
+        """
+        self.neighborhood = neighborhood or MOORE
+        # the window keeps a ring of one cell, reads around it are empty
+        self._pad = 1
+        self._width = len(buff[0]) + 2
+        self._height = len(buff) + 2
+        # absolute coordinates of the (0, 0) position of the window
+        self._top = -1
+        self._left = -1
+        self._cells = {}
+        self._expand_callback = None
+
+        self._rules = rules
+        self._empty_cell = empty_cell
+        self._empty = empty_cell()
+        self._bounded = False
+        self.generation = 0
+        self._proxy = SparseCA.Proxy(self)
+
+        if rules(self._proxy) != self._empty:
+            raise ValueError("the rules create cells out of empty space")
+        for i, row in enumerate(buff):
+            for j, cell in enumerate(row):
+                if cell != self._empty:
+                    self._cells[i, j] = cell
+
+    def __getitem__(self, coords):
+        return self._cells.get((coords[0] + self._top, coords[1] + self._left),
+                               self._empty)
+
+    def __setitem__(self, coords, cell):
+        i = coords[0] + self._top
+        j = coords[1] + self._left
+        if cell != self._empty:
+            self._cells[i, j] = cell
+            self._fit(i, i, j, j)
+        else:
+            self._cells.pop((i, j), None)
+
+    def __iter__(self):
+        get = self._cells.get
+        empty = self._empty
+        for i in range(self._top + 1, self._top + self._height - 1):
+            for j in range(self._left + 1, self._left + self._width - 1):
+                yield get((i, j), empty)
+
+    @property
+    def population(self):
+        """
+        :returns: the number of non empty cells
+        """
+        return len(self._cells)
+
+    def _state_key(self):
+        return frozenset(self._cells.items())
+
+    def _snapshot(self):
+        """
+        :returns: (width, height, cells, top, left) - the window, its
+            content and its position
+        """
+        return self.width, self.height, list(self), self._top, self._left
+
+    def _restore(self, snapshot):
+        """
+        Replace the cells and the window with the ones saved by _snapshot
+        """
+        width, height, cells, top, left = snapshot
+        self._width = width + 2
+        self._height = height + 2
+        self._top = top
+        self._left = left
+        empty = self._empty
+        self._cells = {(top + 1 + k // width, left + 1 + k % width): cell
+                       for k, cell in enumerate(cells) if cell != empty}
+
+    def _fit(self, top, bottom, left, right):
+        """
+        Grow the window so that the absolute rows top to bottom and
+        columns left to right are inside it
+        """
+        if top <= self._top:
+            self._height += self._top + 1 - top
+            self._top = top - 1
+        if bottom >= self._top + self._height - 1:
+            self._height = bottom - self._top + 2
+        if left <= self._left:
+            self._width += self._left + 1 - left
+            self._left = left - 1
+        if right >= self._left + self._width - 1:
+            self._width = right - self._left + 2
+
+    def _shrink(self):
+        """
+        Make the window the smallest one containing every non empty
+        cell, if there are any
+        """
+        if not self._cells:
+            return
+        rows = [i for i, j in self._cells]
+        columns = [j for i, j in self._cells]
+        self._top = min(rows) - 1
+        self._left = min(columns) - 1
+        self._height = max(rows) - self._top + 2
+        self._width = max(columns) - self._left + 2
+
+    def _boundary_check(self):
+        """
+        :returns: always False, the plane never needs to be expanded
+        """
+        return False
+
+    def _expand(self, factor=2):
+        """
+        Make the window roughly two times larger, keeping its content
+        in the center
+        """
+        new_width, new_height, h_margin, w_margin = self._expanded_size(factor)
+        self._top -= h_margin - 1
+        self._left -= w_margin - 1
+        self._width = new_width
+        self._height = new_height
+
+    def step(self):
+        """
+        Apply the rules to every non empty cell and its neighbors.
+        Every other cell stays empty.
+        """
+        self.generation += 1
+        candidates = set()
+        if self.neighborhood == MOORE:
+            for i, j in self._cells:
+                candidates.update(((i-1, j-1), (i-1, j), (i-1, j+1),
+                                   (i,   j-1), (i,   j), (i,   j+1),
+                                   (i+1, j-1), (i+1, j), (i+1, j+1)))
+        else:
+            # the cells which have a non empty cell in their neighborhood
+            offsets = self.neighborhood.offsets
+            for i, j in self._cells:
+                candidates.add((i, j))
+                candidates.update((i - di, j - dj) for di, dj in offsets)
+
+        proxy = self._proxy
+        rules = self._rules
+        empty = self._empty
+        top = self._top
+        left = self._left
+        new_cells = {}
+        for i, j in candidates:
+            proxy._i = i - top
+            proxy._j = j - left
+            cell = rules(proxy)
+            if cell != empty:
+                new_cells[i, j] = cell
+        proxy._reset()
+        self._cells = new_cells
+
+        if new_cells:
+            rows = [i for i, j in new_cells]
+            columns = [j for i, j in new_cells]
+            self._fit(min(rows), max(rows), min(columns), max(columns))
+
+    class Proxy(CA.Proxy):
+        """
+        A proxy which reads the cells through the automaton, which has
+        no buffer. The sums aren't cached, the step visits the cells in
+        no particular order.
+        """
+        def __init__(self, CA):
+            super().__init__(CA)
+            self._offsets = CA.neighborhood.offsets
+            self._radius = CA.neighborhood.radius
+
+        def __getitem__(self, deltas):
+            di, dj = deltas
+            radius = self._radius
+            if not -radius <= di <= radius or not -radius <= dj <= radius:
+                raise IndexError
+            return self._ca[self._i + di, self._j + dj]
+
+        @property
+        def center(self):
+            return self._ca[self._i, self._j]
+
+        @property
+        def neighbors(self):
+            return list(self._neighbors())
+
+        @property
+        def neighbor_sum(self):
+            return sum(self._neighbors())
+
+        @property
+        def live_count(self):
+            empty = self._empty
+            return sum(1 for cell in self._neighbors() if cell != empty)
+
+        @property
+        def key(self):
+            return (self.center,) + tuple(self._neighbors())
+
+        def _neighbors(self):
+            ca = self._ca
+            i = self._i
+            j = self._j
+            for di, dj in self._offsets:
+                yield ca[i + di, j + dj]
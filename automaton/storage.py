@@ -0,0 +1,184 @@
+"""
+A binary file format for the generations of automata with integer
+cells.
+
+The file starts with a fixed size header - the magic bytes, the format
+version, the array typecode of the cells, the width, the height and
+the generation of the automaton and the counts of non empty cells on
+its four edges - followed by the rows of the buffer, including the
+ring of empty cells around it, packed with the typecode in little
+endian byte order. A file with one byte per cell is laid out like the
+buffer of CompactCA, so open_mapped can use it in place.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import CompactCA
+from pycella.automaton.interned import InternedCA
+
+MAGIC = b'PYCA'
+VERSION = 1
+# magic, version, typecode, width, height, generation, 4 edge counts
+HEADER = struct.Struct('<4sHcx3Q4Q')
+# the typecodes tried in turn until the cells fit
+TYPECODES = ('B', 'H', 'I', 'Q')
+
+
+def save(ca, path, typecode=None):
+    """
+    Write the current generation of an automaton with non negative
+    integer cells to a file, row by row.
+
+    :param typecode: the array typecode of the cells, by default the
+        smallest one that fits all of them
+    :returns: the typecode used
+    """
+    with open(path, 'wb') as file:
+        for code in (typecode,) if typecode else TYPECODES:
+            file.seek(0)
+            file.truncate()
+            try:
+                edges = _write_rows(ca, file, code)
+            except OverflowError:
+                if typecode or code == TYPECODES[-1]:
+                    raise ValueError("the cells don't fit in typecode "
+                                     "{!r}".format(code))
+                continue
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, code.encode(), ca.width,
+                                   ca.height, ca.generation, *edges))
+            return code
+
+
+def _write_rows(ca, file, typecode):
+    """
+    Write the padded rows of the automaton after the header
+
+    :returns: the edge counts of the automaton
+    """
+    file.seek(HEADER.size)
+    width = ca.width
+    height = ca.height
+    edges = [0, 0, 0, 0]
+    for i, row in enumerate(_padded_rows(ca)):
+        if typecode == 'B':
+            # copies byte buffers at once instead of cell by cell
+            try:
+                cells = array(typecode, bytes(row))
+            except ValueError:
+                raise OverflowError("the cells don't fit in a byte")
+        else:
+            cells = array(typecode, row)
+        if sys.byteorder != 'little':
+            cells.byteswap()
+        file.write(cells)
+        if 0 < i <= height:
+            edges[2] += cells[1] != 0
+            edges[3] += cells[width] != 0
+            if i == 1:
+                edges[0] = width - cells[1:-1].count(0)
+            if i == height:
+                edges[1] = width - cells[1:-1].count(0)
+    return edges
+
+
+def _padded_rows(ca):
+    """
+    :returns: an iterator over the rows of the automaton surrounded by
+        a ring of empty cells
+    """
+    buff = getattr(ca, '_buffer', None)
+    # an InternedCA keeps the ids of its cells, not the cells
+    if buff is not None and not isinstance(ca, InternedCA):
+        # the ring of a larger neighborhood is wider
+        cut = ca._pad - 1
+        rows = buff if not cut else \
+            (row[cut:len(row)-cut] for row in buff[cut:len(buff)-cut])
+        if not getattr(ca, '_toroidal', False):
+            yield from rows
+            return
+        # the padding of a toroidal automaton holds copies of the
+        # opposite edges, the file gets empty cells instead
+        last = ca.height + 1
+        for i, row in enumerate(rows):
+            row = list(row)
+            if i == 0 or i == last:
+                row = [0] * len(row)
+            row[0] = row[-1] = 0
+            yield row
+        return
+    width = ca.width
+    cells = iter(ca)
+    yield [0] * (width + 2)
+    for i in range(ca.height):
+        yield [0] + [next(cells) for j in range(width)] + [0]
+    yield [0] * (width + 2)
+
+
+def read_header(file):
+    """
+    :returns: (width, height, generation, typecode, edges) read from
+        the header at the current position of an open binary file
+    """
+    data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("the file is too short for a header")
+    magic, version, typecode, width, height, generation, *edges = \
+        HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("not an automaton file")
+    if version != VERSION:
+        raise ValueError("unsupported version {}".format(version))
+    return width, height, generation, typecode.decode(), edges
+
+
+def load(path, rules, empty_cell, engine=CA, **kwargs):
+    """
+    Read a file written by save into lists of rows.
+
+    :param engine: the class of the automaton, CA or one of its
+        subclasses, which gets the rest of the keyword arguments
+    :returns: the automaton, at the saved generation
+    """
+    with open(path, 'rb') as file:
+        width, height, generation, typecode, edges = read_header(file)
+        cells = array(typecode)
+        stride = (width + 2) * cells.itemsize
+        file.seek(stride, 1)
+        buff = []
+        for i in range(height):
+            row = array(typecode, file.read(stride))
+            if len(row) != width + 2:
+                raise ValueError("the file is truncated")
+            if sys.byteorder != 'little':
+                row.byteswap()
+            buff.append(row[1:-1].tolist())
+    ca = engine(buff, rules, empty_cell, **kwargs)
+    ca.generation = generation
+    return ca
+
+
+def open_mapped(path, rules, empty_cell, bounded=True, directional=False):
+    """
+    Map a file written by save with one byte per cell in memory and
+    use it as the buffer of a CompactCA. Nothing is read until the
+    cells are accessed, so even huge boards open immediately. The
+    mapping is copy on write - changing the automaton doesn't change
+    the file.
+
+    :returns: the automaton, at the saved generation
+    """
+    with open(path, 'rb') as file:
+        width, height, generation, typecode, edges = read_header(file)
+        if typecode != 'B':
+            raise ValueError("only files with one byte per cell can be "
+                             "mapped, this one has typecode "
+                             "{!r}".format(typecode))
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    ca = CompactCA.from_bytes(memoryview(data)[HEADER.size:], width, height,
+                              rules, empty_cell, bounded, directional, edges)
+    ca.generation = generation
+    return ca
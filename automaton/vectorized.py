@@ -0,0 +1,128 @@
+import numpy
+
+from pycella.automaton.automaton import CA
+
+# keeps the neighbor sums in the range of the uint8 buffer
+MAX_STATES = 32
+
+
+class VectorizedCA(CA):
+    """
+    An automaton with the same interface as CA which keeps its buffer
+    in a numpy array and computes a whole generation with array
+    operations instead of calling the rules function for every cell.
+
+    Works only with outer totalistic rules that expose their lookup
+    table - Rule objects and rules functions declared with
+    pycella.automaton.rules.totalistic - and with buffers containing
+    only the states of the rule.
+    """
+    def __init__(self, buff, rules, empty_cell, bounded=True,
+                 directional=False, toroidal=False):
+        if empty_cell() != 0:
+            raise ValueError("the empty cell must be 0")
+        self._table = _compile(rules)
+        super().__init__(buff, rules, empty_cell, bounded, directional,
+                         toroidal=toroidal)
+
+    def _load(self, buff):
+        """
+        :returns: the buffer with the content of `buff` surrounded by
+            a ring of empty cells
+        """
+        buffer = numpy.array(super()._load(buff))
+        if not numpy.isin(buffer, range(len(self._table))).all():
+            raise ValueError("the buffer can only contain the states "
+                             "0 to {}".format(len(self._table) - 1))
+        return buffer.astype(numpy.uint8)
+
+    def __iter__(self):
+        for row in self._buffer[1:-1, 1:-1].tolist():
+            yield from row
+
+    def _boundary_check(self):
+        """
+        :returns: True iff there is a a non empty cell at any of the boundaries
+        """
+        check = self._expand_callback
+        if check is not None and not check():
+            return
+
+        inner = self._buffer[1:-1, 1:-1]
+        self._edges = [int(numpy.count_nonzero(edge)) for edge in
+                       (inner[0], inner[-1], inner[:, 0], inner[:, -1])]
+        return any(self._edges)
+
+    def _expand(self, factor=2):
+        """
+        Create a roughly two times larger buffer and
+        copy the current buffer in the center of the new one
+        (or towards the sides that aren't touched, when directional)
+        """
+        width = self._width - 2
+        height = self._height - 2
+        new_width, new_height, h_margin, w_margin = self._growth(factor)
+        new_buffer = numpy.zeros((new_height, new_width), dtype=numpy.uint8)
+        new_buffer[h_margin:h_margin+height, w_margin:w_margin+width] = \
+            self._buffer[1:-1, 1:-1]
+        self._buffer = new_buffer
+        self._width = new_width
+        self._height = new_height
+
+    def _wrap(self):
+        _wrap(self._buffer)
+
+    def _state_key(self):
+        # the padding of a toroidal automaton isn't part of the state
+        return self._buffer.shape, self._buffer[1:-1, 1:-1].tobytes()
+
+    def _census_start(self):
+        return self._buffer[1:-1, 1:-1].copy()
+
+    def _census_end(self, previous):
+        current = self._buffer[1:-1, 1:-1]
+        return (int(numpy.count_nonzero(current != previous)),
+                int(numpy.count_nonzero(current)))
+
+    def step(self):
+        """
+        Compute the next generation of the whole buffer at once.
+        The neighbor counts are sums of the eight shifted views of
+        the buffer, the new cells are looked up in the rules table.
+        """
+        if not self._bounded and self._boundary_check():
+            self._expand()
+        self.generation += 1
+        if self._toroidal:
+            self._wrap()
+
+        buff = self._buffer
+        counts = (buff[:-2, :-2] + buff[:-2, 1:-1] + buff[:-2, 2:] +
+                  buff[1:-1, :-2] + buff[1:-1, 2:] +
+                  buff[2:, :-2] + buff[2:, 1:-1] + buff[2:, 2:])
+        buff[1:-1, 1:-1] = self._table[buff[1:-1, 1:-1], counts]
+
+
+def _wrap(buff):
+    """
+    Copy the cells along every edge of the last two dimensions of an
+    array into the padding beyond the opposite one
+    """
+    buff[..., 0, :] = buff[..., -2, :]
+    buff[..., -1, :] = buff[..., 1, :]
+    buff[..., :, 0] = buff[..., :, -2]
+    buff[..., :, -1] = buff[..., :, 1]
+
+
+def _compile(rules):
+    """
+    :returns: the lookup table of the rules as a numpy array indexed
+        by the state of a cell and the sum of its neighbors
+    """
+    try:
+        table = numpy.array(rules.table, dtype=numpy.uint8)
+    except AttributeError:
+        raise ValueError("{!r} is not a totalistic rule".format(rules))
+    if len(table) > MAX_STATES:
+        raise ValueError("at most {} states are supported".format(MAX_STATES))
+    return table
@@ -0,0 +1,49 @@
+"""
+Time ParallelCA.step across worker counts against the serial CA.step.
+
+    python -m pycella.benchmarks.parallel_scaling --size 400 --workers 1 2 4 8
+"""
+import argparse
+from random import random, seed
+from time import perf_counter
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.parallel import ParallelCA
+from pycella.automaton.rules import life_rules
+
+
+def empty_cell():
+    return 0
+
+
+def time_steps(ca, generations):
+    start = perf_counter()
+    for i in range(generations):
+        ca.step()
+    return (perf_counter() - start) / generations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, default=400)
+    parser.add_argument('--generations', type=int, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    seed(0)
+    buff = [[int(random() < 0.3) for i in range(args.size)]
+            for j in range(args.size)]
+    serial = time_steps(CA(buff, life_rules, empty_cell), args.generations)
+    print("{:>8} {:>12} {:>8}".format('workers', 's/step', 'speedup'))
+    print("{:>8} {:>12.4f} {:>8.2f}".format('serial', serial, 1))
+    for workers in args.workers:
+        with ParallelCA(buff, life_rules, empty_cell,
+                        workers=workers) as ca:
+            ca.step()  # warm up the workers
+            elapsed = time_steps(ca, args.generations)
+        print("{:>8} {:>12.4f} {:>8.2f}".format(workers, elapsed,
+                                                serial / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare the streaming RLE reader and writer with reading the whole
+file, decoding it into lists and converting those into an automaton
+(and the other way around), by time and peak traced memory.
+
+    python -m pycella.benchmarks.rle_io --size 2000 --density 0.05
+"""
+import argparse
+import io
+import tracemalloc
+from random import random, seed
+from time import perf_counter
+
+from pycella.automaton import rle
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import CompactCA
+from pycella.automaton.rules import life_rules
+
+
+def empty_cell():
+    return 0
+
+
+def naive_read(text, engine, **kwargs):
+    buff, rule = rle.loads(io.StringIO(text).read())
+    return engine(buff, life_rules, empty_cell, **kwargs)
+
+
+def streaming_read(text, engine, **kwargs):
+    return rle.read(io.StringIO(text), life_rules, empty_cell, engine,
+                    **kwargs)[0]
+
+
+def naive_write(ca):
+    file = io.StringIO()
+    file.write(_dumps_naive(ca))
+    return file
+
+
+def _dumps_naive(ca):
+    """
+    Encode the automaton from a list of all its cells, like the
+    codec did before it wrote row by row
+    """
+    width = ca.width
+    cells = list(ca)
+    rows = [cells[i*width:(i+1)*width] for i in range(ca.height)]
+    return ''.join(line + '\n' for line in
+                   rle._lines(rows, width, ca.height, None, False))
+
+
+def streaming_write(ca):
+    file = io.StringIO()
+    rle.write(ca, file, multistate=False)
+    return file
+
+
+def measure(function, *args, **kwargs):
+    """
+    :returns: (seconds, peak traced bytes) of a call of the function
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    function(*args, **kwargs)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def compare(size, density):
+    """
+    :returns: a list of (name, seconds, peak bytes) for reading into a
+        CA and a bit packed CompactCA and writing a CompactCA
+    """
+    seed(0)
+    buff = [[int(random() < density) for i in range(size)]
+            for j in range(size)]
+    ca = CompactCA(buff, life_rules, empty_cell, bits=1)
+    del buff
+    text = rle.dumps(ca)
+    results = []
+    for name, engine, kwargs in (('CA', CA, {}),
+                                 ('CompactCA', CompactCA, {'bits': 1})):
+        results.append(('read naive ' + name,) +
+                       measure(naive_read, text, engine, **kwargs))
+        results.append(('read streaming ' + name,) +
+                       measure(streaming_read, text, engine, **kwargs))
+    results.append(('write naive',) + measure(naive_write, ca))
+    results.append(('write streaming',) + measure(streaming_write, ca))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print("{:<26} {:>10} {:>12}".format('', 's', 'peak MB'))
+    for name, elapsed, peak in compare(args.size, args.density):
+        print("{:<26} {:>10.3f} {:>12.1f}".format(name, elapsed, peak / 2**20))
+
+
+if __name__ == '__main__':
+    main()
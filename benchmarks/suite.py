@@ -0,0 +1,231 @@
+"""
+Benchmarks for stepping, expansion, iteration, printing and comparison
+of automata.
+
+    python -m pycella.benchmarks.suite run -o before.json
+    python -m pycella.benchmarks.suite run -o after.json --sizes 64 256
+    python -m pycella.benchmarks.suite compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from random import Random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.interned import InternedCA
+from pycella.automaton.rules import life_rules, seeds_rules
+from pycella.automaton.sparse import SparseCA
+
+try:
+    from pycella.automaton.ensemble import Ensemble
+    from pycella.automaton.vectorized import VectorizedCA
+except ImportError:
+    Ensemble = VectorizedCA = None
+
+SIZES = (64, 256, 1024, 4096)
+# ensembles get as many members as fit in this many cells
+ENSEMBLE_CELLS = 1 << 24
+
+
+class Cell:
+    """
+    A cell object standing for the arbitrary cell types users may have
+    """
+    __slots__ = ('alive',)
+
+    def __init__(self, alive):
+        self.alive = alive
+
+    def __bool__(self):
+        return self.alive
+
+    def __eq__(self, other):
+        return isinstance(other, Cell) and self.alive == other.alive
+
+    def __hash__(self):
+        return hash(self.alive)
+
+
+def object_rules(proxy):
+    s = sum(1 for cell in proxy.neighbors if cell.alive)
+    alive = proxy[0, 0].alive
+    return Cell(s == 3 or (alive and s == 2))
+
+
+def empty_cell():
+    return 0
+
+
+def empty_object():
+    return Cell(False)
+
+
+RULES = {'life_rules': (life_rules, empty_cell, int),
+         'seeds_rules': (seeds_rules, empty_cell, int),
+         'object_rules': (object_rules, empty_object, Cell)}
+
+ENGINES = {'python': CA}
+if VectorizedCA is not None:
+    ENGINES['numpy'] = VectorizedCA
+ENGINES['sparse'] = SparseCA
+ENGINES['interned'] = InternedCA
+
+
+def random_buffer(size, cell_type, density=0.3, seed=0):
+    random = Random(seed)
+    return [[cell_type(random.random() < density) for j in range(size)]
+            for i in range(size)]
+
+
+def step_setup(engine, buff, rules, empty, bounded):
+    def setup():
+        if engine is SparseCA:
+            return engine(buff, rules, empty).step
+        return engine(buff, rules, empty, bounded).step
+    return setup
+
+
+def python_setup(buff, operation):
+    def setup():
+        ca = CA(buff, life_rules, empty_cell, bounded=False)
+        other = CA(buff, life_rules, empty_cell, bounded=False)
+        return lambda: operation(ca, other)
+    return setup
+
+
+def ensemble_setup(size, members):
+    def setup():
+        return Ensemble.random(members, size, size, life_rules,
+                               density=0.3, seed=0).step
+    return setup
+
+
+OPERATIONS = {'expand': lambda ca, other: ca._expand(),
+              'iter': lambda ca, other: sum(1 for cell in ca),
+              'str': lambda ca, other: str(ca),
+              'eq': lambda ca, other: ca == other}
+
+
+def cases(sizes):
+    """
+    :returns: a generator of (name, setup) pairs, where setup() prepares
+        a fresh automaton and returns the function to be timed
+    """
+    for size in sizes:
+        for rules_name, (rules, empty, cell_type) in RULES.items():
+            buff = random_buffer(size, cell_type)
+            for engine_name, engine in ENGINES.items():
+                if engine is VectorizedCA and cell_type is not int:
+                    continue
+                for bounded in (True, False):
+                    if engine is SparseCA and bounded:
+                        continue
+                    name = 'step/{}/{}/{}/{}'.format(
+                        engine_name, rules_name,
+                        'bounded' if bounded else 'unbounded', size)
+                    yield name, step_setup(engine, buff, rules, empty,
+                                           bounded)
+
+        if Ensemble is not None:
+            members = max(1, ENSEMBLE_CELLS // size**2)
+            yield ('ensemble/numpy/life_rules/{}x{}'.format(size, members),
+                   ensemble_setup(size, members))
+
+        buff = random_buffer(size, int)
+        for operation_name, operation in OPERATIONS.items():
+            yield ('{}/python/{}'.format(operation_name, size),
+                   python_setup(buff, operation))
+
+
+def measure(setup, repeat):
+    """
+    :returns: the timings in seconds of `repeat` calls of the function
+        returned by setup(), each on a fresh setup
+    """
+    timings = []
+    for i in range(repeat):
+        function = setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(sizes=SIZES, repeat=5, pattern='', log=None):
+    """
+    :returns: the results of every benchmark whose name contains
+        `pattern` as a dictionary, ready to be dumped as JSON
+    """
+    results = {}
+    for name, setup in cases(sizes):
+        if pattern not in name:
+            continue
+        timings = measure(setup, repeat)
+        results[name] = {'best': min(timings),
+                         'mean': sum(timings) / len(timings),
+                         'repeat': repeat}
+        if log is not None:
+            print('{:<50} {:>12.6f}'.format(name, min(timings)), file=log)
+    return {'meta': {'python': platform.python_version(),
+                     'implementation': platform.python_implementation(),
+                     'machine': platform.machine(),
+                     'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def compare(before, after, threshold=0.1):
+    """
+    :returns: a list of (name, before, after, ratio, regressed) tuples
+        for the benchmarks present in both runs, where a benchmark has
+        regressed if its best time grew by more than `threshold`
+    """
+    comparison = []
+    for name in sorted(set(before['results']) & set(after['results'])):
+        old = before['results'][name]['best']
+        new = after['results'][name]['best']
+        ratio = new / old if old else float('inf')
+        comparison.append((name, old, new, ratio, ratio > 1 + threshold))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output',
+                            help='JSON file for the results')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--filter', default='',
+                            help='run only benchmarks containing this')
+    compare_parser = commands.add_parser('compare',
+                                         help='compare two result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative slowdown to flag')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.sizes, args.repeat, args.filter, log=sys.stdout)
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(results, output, indent=2)
+        return 0
+
+    with open(args.before) as before, open(args.after) as after:
+        comparison = compare(json.load(before), json.load(after),
+                             args.threshold)
+    for name, old, new, ratio, regressed in comparison:
+        print('{:<50} {:>12.6f} {:>12.6f} {:>7.2f}x {}'.format(
+            name, old, new, ratio, 'REGRESSION' if regressed else ''))
+    return 1 if any(regressed for *_, regressed in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
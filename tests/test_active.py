@@ -0,0 +1,125 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.active import ActiveCA
+from pycella.automaton.automaton import CA
+from pycella.automaton.instrumentation import StepLog
+from pycella.automaton.neighborhood import Neighborhood
+from pycella.automaton.rules import life_rules, seeds_rules
+
+
+class TestActiveCA(unittest.TestCase):
+    def setUp(self):
+        self.MAX = 30
+        self.empty_cell = lambda: 0
+
+    def assert_same_evolution(self, rules, bounded):
+        width = randint(2, self.MAX)
+        height = randint(2, self.MAX)
+        buff = [[int(random() < 0.3) for i in range(width)]
+                for j in range(height)]
+        expected = CA(buff, rules, self.empty_cell, bounded)
+        calculated = ActiveCA(buff, rules, self.empty_cell, bounded)
+        for i in range(15):
+            expected.step()
+            calculated.step()
+            self.assertEqual(expected.width, calculated.width)
+            self.assertEqual(list(expected), list(calculated))
+            self.assertEqual(sum(expected), calculated.population)
+
+    def test_same_evolution(self):
+        for i in range(5):
+            self.assert_same_evolution(life_rules, True)
+            self.assert_same_evolution(life_rules, False)
+            self.assert_same_evolution(seeds_rules, True)
+            self.assert_same_evolution(seeds_rules, False)
+
+    def test_births_after_expansion(self):
+        # cells are born beside unchanged edge cells, once the edge is
+        # inside the expanded buffer
+        buff = [[1, 1, 1, 0, 0, 1], [0, 0, 0, 1, 1, 1]]
+        expected = CA([row[:] for row in buff], life_rules, self.empty_cell,
+                      bounded=False)
+        calculated = ActiveCA(buff, life_rules, self.empty_cell,
+                              bounded=False)
+        for i in range(10):
+            expected.step()
+            calculated.step()
+            self.assertEqual(list(expected), list(calculated))
+            self.assertEqual(sum(expected), calculated.population)
+
+    def test_settled_board(self):
+        # a block and a blinker on an otherwise empty board
+        buff = [[0] * 20 for i in range(20)]
+        buff[2][2] = buff[2][3] = buff[3][2] = buff[3][3] = 1
+        buff[10][9] = buff[10][10] = buff[10][11] = 1
+        ca = ActiveCA(buff, life_rules, self.empty_cell)
+        ca.step()
+        self.assertEqual(400, ca.active)
+        ca.step()
+        # only the cells around the blinker are evaluated
+        self.assertEqual(21, ca.active)
+        ca.step()
+        self.assertEqual(21, ca.active)
+        self.assertEqual(7, ca.population)
+
+    def test_setitem_activates(self):
+        buff = [[0] * 10 for i in range(10)]
+        ca = ActiveCA(buff, life_rules, self.empty_cell)
+        ca.step()
+        ca.step()
+        self.assertEqual(0, ca.active)
+        for j in range(4, 7):
+            ca[5, j] = 1
+        ca.step()
+        self.assertEqual(3, ca.population)
+        self.assertEqual(1, ca[4, 5])
+        self.assertEqual(1, ca[6, 5])
+        self.assertEqual(0, ca[5, 4])
+
+    def test_instrumentation(self):
+        buff = [[0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0],
+                [0, 1, 1, 1, 0],
+                [0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0]]
+        ca = ActiveCA(buff, life_rules, self.empty_cell)
+        log = StepLog()
+        ca.instrument(log)
+        ca.step()
+        ca.step()
+        self.assertEqual([25, 21], [stats.evaluated for stats in log])
+        self.assertEqual([4, 4], [stats.changed for stats in log])
+        self.assertEqual([3, 3], [stats.live for stats in log])
+
+    def test_directional(self):
+        for i in range(5):
+            buff = [[int(random() < 0.3) for i in range(12)]
+                    for j in range(9)]
+            expected = CA(buff, life_rules, self.empty_cell, False, True)
+            calculated = ActiveCA(buff, life_rules, self.empty_cell,
+                                  False, True)
+            for j in range(15):
+                expected.step()
+                calculated.step()
+                self.assertEqual(expected.width, calculated.width)
+                self.assertEqual(list(expected), list(calculated))
+                self.assertEqual(expected._edges, calculated._edges)
+
+    def test_toroidal(self):
+        for neighborhood in (None, Neighborhood.von_neumann(2)):
+            for i in range(3):
+                width = randint(3, 20)
+                buff = [[int(random() < 0.3) for i in range(width)]
+                        for j in range(randint(3, 20))]
+                rules = life_rules if neighborhood is None else \
+                    lambda proxy: int(proxy.neighbor_sum in (2, 3))
+                expected = CA(buff, rules, self.empty_cell,
+                              neighborhood=neighborhood, toroidal=True)
+                calculated = ActiveCA(buff, rules, self.empty_cell,
+                                      neighborhood=neighborhood,
+                                      toroidal=True)
+                for n in range(15):
+                    expected.step()
+                    calculated.step()
+                    self.assertEqual(list(expected), list(calculated))
@@ -4,6 +4,7 @@ from operator import getitem
 from random import randint
 
 from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import Neighborhood
 from pycella.automaton.rules import life_rules, seeds_rules
 
 
@@ -228,5 +229,269 @@ class TestAutomaton(unittest.TestCase):
         expected_ca = CA(expected_state, seeds_rules, self.empty_cell)
         self.assertEqual(calculated_ca, expected_ca)
 
+    def test_step_reuses_buffers(self):
+        initial_state = [[0, 0, 0],
+                         [1, 1, 1],
+                         [0, 0, 0]]
+        ca = CA(initial_state, life_rules, self.empty_cell)
+        first = ca._buffer
+        ca.step()
+        second = ca._buffer
+        self.assertIsNot(first, second)
+        ca.step()
+        self.assertIs(first, ca._buffer)
+        ca.step()
+        self.assertIs(second, ca._buffer)
+        self.assertEqual(3, ca.generation)
 
+    def test_step_after_expand(self):
+        initial_state = [[0, 0, 0],
+                         [1, 1, 1],
+                         [0, 0, 0]]
+        ca = CA(initial_state, life_rules, self.empty_cell, bounded=False)
+        ca.step()
+        ca.step()
+        self.assertGreater(ca.width, 3)
+        self.assertEqual(3, sum(ca))
+        self.assertEqual(len(ca._buffer), len(ca._next_buffer))
 
+    def test_edges_tracking(self):
+        for i in range(5):
+            width = randint(3, 30)
+            height = randint(3, 30)
+            buff = [[randint(0, 1) for i in range(width)]
+                    for j in range(height)]
+            ca = CA(buff, life_rules, self.empty_cell, bounded=False)
+            self.assertEqual(ca._count_edges(), ca._edges)
+            for j in range(5):
+                ca.step()
+                self.assertEqual(ca._count_edges(), ca._edges)
+                ca[randint(1, ca.height), 1] = randint(0, 1)
+                ca[ca.height, randint(1, ca.width)] = randint(0, 1)
+                self.assertEqual(ca._count_edges(), ca._edges)
+                self.assertEqual(any(ca._count_edges()),
+                                 ca._boundary_check())
+
+    def test_directional_expand(self):
+        buff = [[0] * 10 for i in range(10)]
+        buff[4][9] = 1
+        ca = CA(buff, life_rules, self.empty_cell, bounded=False,
+                directional=True)
+        ca._expand()
+        self.assertEqual(10, ca.height)
+        self.assertEqual(15, ca.width)
+        self.assertEqual(1, ca[5, 10])
+        self.assertEqual([0, 0, 0, 0], ca._edges)
+        # nothing touches the edges, so it grows evenly
+        ca._expand()
+        self.assertGreater(ca.height, 10)
+
+    def test_directional_step(self):
+        glider = [[0, 1, 0, 0, 0, 0],
+                  [0, 0, 1, 0, 0, 0],
+                  [1, 1, 1, 0, 0, 0],
+                  [0, 0, 0, 0, 0, 0],
+                  [0, 0, 0, 0, 0, 0],
+                  [0, 0, 0, 0, 0, 0]]
+        even = CA(glider, life_rules, self.empty_cell, bounded=False)
+        directional = CA(glider, life_rules, self.empty_cell, bounded=False,
+                         directional=True)
+        for i in range(40):
+            even.step()
+            directional.step()
+            self.assertEqual(5, sum(directional))
+        self.assertLess(directional.width * directional.height,
+                        even.width * even.height)
+        cells = [(i // directional.width, i % directional.width)
+                 for i, cell in enumerate(directional) if cell]
+        expected = [(i // even.width, i % even.width)
+                    for i, cell in enumerate(even) if cell]
+        shift = (cells[0][0] - expected[0][0], cells[0][1] - expected[0][1])
+        self.assertEqual(cells, [(i + shift[0], j + shift[1])
+                                 for i, j in expected])
+
+    def test_run(self):
+        initial_state = [[0, 0, 0, 0, 0],
+                         [0, 0, 0, 0, 0],
+                         [0, 1, 1, 1, 0],
+                         [0, 0, 0, 0, 0],
+                         [0, 0, 0, 0, 0]]
+        ca = CA(initial_state, life_rules, self.empty_cell)
+        self.assertIsNone(ca.run(7))
+        self.assertEqual(7, ca.generation)
+        expected = CA(initial_state, life_rules, self.empty_cell)
+        for i in range(7):
+            expected.step()
+        self.assertEqual(expected, ca)
+
+    def test_run_detects_oscillator(self):
+        initial_state = [[0, 0, 0, 0, 0],
+                         [0, 0, 0, 0, 0],
+                         [0, 1, 1, 1, 0],
+                         [0, 0, 0, 0, 0],
+                         [0, 0, 0, 0, 0]]
+        ca = CA(initial_state, life_rules, self.empty_cell)
+        self.assertEqual(2, ca.run(1000, detect_cycles=True))
+        # generation 1 is kept and repeats in generation 3
+        self.assertEqual(3, ca.generation)
+
+    def test_run_detects_still_life(self):
+        initial_state = [[0, 0, 0, 0],
+                         [0, 1, 1, 0],
+                         [0, 1, 0, 0],
+                         [0, 0, 0, 0]]
+        ca = CA(initial_state, life_rules, self.empty_cell, bounded=False)
+        self.assertEqual(1, ca.run(1000, detect_cycles=True))
+        self.assertLess(ca.generation, 5)
+        self.assertEqual(4, sum(ca))
+
+    def test_run_without_cycle(self):
+        initial_state = [[0, 1, 0],
+                         [0, 0, 1],
+                         [1, 1, 1]]
+        ca = CA(initial_state, life_rules, self.empty_cell, bounded=False)
+        self.assertIsNone(ca.run(20, detect_cycles=True))
+        self.assertEqual(20, ca.generation)
+
+    def test_run_with_colliding_hashes(self):
+        class Cell(int):
+            def __hash__(self):
+                return 0
+
+        def rules(proxy):
+            return Cell(life_rules(proxy))
+
+        # every generation of the same size hashes the same
+        glider = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        buff = [[Cell(cell) for cell in row + [0] * 5]
+                for row in glider + [[0] * 3] * 5]
+        ca = CA(buff, rules, lambda: Cell(0), toroidal=True)
+        self.assertEqual(32, ca.run(100, detect_cycles=True))
+
+    def test_run_keeps_bounded_state(self):
+        class Key(tuple):
+            alive = most = 0
+
+            def __init__(self, cells):
+                Key.alive += 1
+                Key.most = max(Key.most, Key.alive)
+
+            def __del__(self):
+                Key.alive -= 1
+
+        glider = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        ca = CA(glider, life_rules, self.empty_cell, bounded=False)
+        ca._state_key = lambda: Key(ca)
+        self.assertIsNone(ca.run(150, detect_cycles=True))
+        # the saved generation and the last two ones at most
+        self.assertLessEqual(Key.most, 3)
+        self.assertEqual(0, Key.alive)
+        buff = [row + [0] * 5 for row in glider] + [[0] * 8] * 5
+        ca = CA(buff, life_rules, self.empty_cell, toroidal=True)
+        ca._state_key = lambda: Key(ca)
+        self.assertEqual(32, ca.run(300, detect_cycles=True))
+        self.assertLess(ca.generation, 3 * 32)
+        self.assertLessEqual(Key.most, 3)
+
+    def test_track_changes(self):
+        for kwargs in ({}, {'toroidal': True},
+                       {'neighborhood': Neighborhood.moore(2)}):
+            buff = [[randint(0, 1) for j in range(9)] for i in range(7)]
+            ca = CA(buff, life_rules, self.empty_cell, **kwargs)
+            ca.track_changes = True
+            ca.step()
+            # the cells set before the first step aren't listed
+            self.assertIsNone(ca._step_changes())
+            for n in range(4):
+                width, previous = ca.width, list(ca)
+                ca.step()
+                self.assertEqual(
+                    [(k // width + 1, k % width + 1, old, new)
+                     for k, (old, new) in enumerate(zip(previous, ca))
+                     if old != new], ca._step_changes())
+            ca[1, 1] = 1 - ca[1, 1]
+            self.assertIsNone(ca._step_changes())
+            ca.step()
+            self.assertIsNone(ca._step_changes())
+            ca.step()
+            self.assertIsNotNone(ca._step_changes())
+
+    def test_track_changes_expansion(self):
+        glider = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        ca = CA(glider, life_rules, self.empty_cell, bounded=False)
+        ca.track_changes = True
+        ca.step()
+        ca.step()
+        self.assertIsNone(ca._step_changes())
+        # without tracking the changes are never known
+        ca = CA(glider, life_rules, self.empty_cell)
+        ca.step()
+        ca.step()
+        self.assertIsNone(ca._step_changes())
+
+    def test_run_matches_step(self):
+        for kwargs in ({}, {'bounded': False}, {'toroidal': True},
+                       {'neighborhood': Neighborhood.moore(2)}):
+            buff = [[randint(0, 1) for j in range(9)] for i in range(7)]
+            expected = CA(buff, life_rules, self.empty_cell, **kwargs)
+            ca = CA(buff, life_rules, self.empty_cell, **kwargs)
+            for i in range(3):
+                expected.step()
+                ca.step()
+            for i in range(12):
+                expected.step()
+            ca.run(12)
+            self.assertEqual(list(expected), list(ca))
+            ca.step()
+            expected.step()
+            self.assertEqual(list(expected), list(ca))
+
+    def test_toroidal_glider(self):
+        glider = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+        buff = [row + [0] * 5 for row in glider] + [[0] * 8] * 5
+        ca = CA(buff, life_rules, self.empty_cell, toroidal=True)
+        initial = list(ca)
+        # a glider moves a cell diagonally every 4 generations
+        for i in range(31):
+            ca.step()
+            self.assertEqual(5, sum(ca))
+            self.assertNotEqual(initial, list(ca))
+        ca.step()
+        self.assertEqual(initial, list(ca))
+        self.assertEqual(8, ca.width)
+        self.assertEqual(32, ca.run(100, detect_cycles=True))
+
+    def test_toroidal_edges(self):
+        # a blinker across the left and right edges
+        buff = [[0] * 5 for i in range(5)]
+        buff[2][0] = buff[2][1] = buff[2][4] = 1
+        ca = CA(buff, life_rules, self.empty_cell, toroidal=True)
+        ca.step()
+        self.assertEqual([1, 1, 1], [ca[i, 1] for i in range(2, 5)])
+        self.assertEqual(3, sum(ca))
+        ca.step()
+        self.assertEqual([1, 1, 0, 0, 1], [ca[3, j] for j in range(1, 6)])
+
+    def test_toroidal_neighborhood(self):
+        neighborhood = Neighborhood.von_neumann(2)
+
+        def rules(proxy):
+            return proxy.neighbor_sum % 3
+
+        buff = [[randint(0, 2) for j in range(7)] for i in range(5)]
+        ca = CA(buff, rules, self.empty_cell, neighborhood=neighborhood,
+                toroidal=True)
+        for n in range(3):
+            expected = [sum(buff[(i + di) % 5][(j + dj) % 7]
+                            for di, dj in neighborhood.offsets) % 3
+                        for i in range(5) for j in range(7)]
+            ca.step()
+            self.assertEqual(expected, list(ca))
+            buff = [expected[i*7:(i+1)*7] for i in range(5)]
+
+    def test_toroidal_invalid(self):
+        buff = [[0, 1], [1, 0]]
+        self.assertRaises(ValueError, CA, buff, life_rules, self.empty_cell,
+                          False, toroidal=True)
+        self.assertRaises(ValueError, CA, buff, life_rules, self.empty_cell,
+                          neighborhood=Neighborhood.moore(3), toroidal=True)
@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from pycella.automaton import rle, storage
+from pycella.automaton.automaton import CA
+from pycella.automaton.batch import jobs, load_rules, main, run
+from pycella.automaton.rules import life_rules
+
+RULES = os.path.join(os.path.dirname(__file__), '..', 'GUI', 'rules.py')
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.glider = os.path.join(self.directory, 'glider.rle')
+        with open(self.glider, 'w') as file:
+            file.write('x = 8, y = 8, rule = B3/S23\nbo$2bo$3o!\n')
+        self.blinker = os.path.join(self.directory, 'blinker.pyca')
+        buff = [[0] * 5 for i in range(5)]
+        buff[2][1:4] = [1, 1, 1]
+        storage.save(CA(buff, life_rules, lambda: 0), self.blinker)
+        self.output = os.path.join(self.directory, 'output')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *args):
+        with redirect_stdout(io.StringIO()) as out:
+            code = main([RULES, self.glider, self.blinker,
+                         '-o', self.output] + list(args))
+        with open(os.path.join(self.output, 'stats.json')) as file:
+            return code, json.load(file), out.getvalue()
+
+    def test_load_rules(self):
+        module = load_rules(RULES)
+        self.assertEqual(0, module.empty_cell())
+        self.assertEqual(1, module.default_cell())
+        self.assertRaises(ValueError, load_rules, self.glider)
+
+    def test_main(self):
+        code, stats, out = self.run_main('-g', '4', '-w', '2')
+        self.assertEqual(0, code)
+        self.assertEqual([self.glider, self.blinker],
+                         [run['state'] for run in stats['runs']])
+        glider, blinker = stats['runs']
+        self.assertEqual(4, glider['generations'])
+        self.assertEqual(5, glider['population'])
+        self.assertEqual(3, blinker['population'])
+        self.assertIn('glider.rle', out)
+        with open(os.path.join(self.output, 'glider.rle')) as file:
+            buff, rule = rle.loads(file.read())
+        # moved one cell down and right
+        self.assertEqual([0, 0, 1, 0], buff[1][:4])
+        self.assertEqual([0, 0, 0, 1], buff[2][:4])
+        ca = storage.load(os.path.join(self.output, 'blinker.pyca'),
+                          life_rules, lambda: 0)
+        self.assertEqual(4, ca.generation)
+        self.assertEqual([0, 1, 1, 1, 0], [ca[3, j] for j in range(1, 6)])
+
+    def test_options(self):
+        code, stats, out = self.run_main('-g', '20', '--engine', 'sparse',
+                                         '--detect-cycles', '--format', '.rle',
+                                         '-w', '1')
+        glider, blinker = stats['runs']
+        self.assertIsNone(glider['period'])
+        self.assertEqual('sparse', glider['engine'])
+        self.assertEqual(2, blinker['period'])
+        self.assertEqual(3, blinker['generations'])
+        self.assertTrue(os.path.exists(os.path.join(self.output,
+                                                    'blinker.rle')))
+
+    def test_errors(self):
+        missing = os.path.join(self.directory, 'missing.rle')
+        results = list(run(jobs(RULES, [missing, self.glider],
+                                self.directory, 2, output_format='.pyca'),
+                           workers=1))
+        self.assertIn('error', results[0])
+        self.assertNotIn('error', results[1])
+
+    def test_output_next_to_states(self):
+        with redirect_stdout(io.StringIO()):
+            code = main([RULES, self.glider, '-g', '4', '-o',
+                         self.directory])
+        self.assertEqual(0, code)
+        with open(self.glider) as file:
+            self.assertEqual('x = 8, y = 8, rule = B3/S23\nbo$2bo$3o!\n',
+                             file.read())
+        with open(os.path.join(self.directory, 'stats.json')) as file:
+            stats = json.load(file)
+        output = os.path.join(self.directory, 'glider.final.rle')
+        self.assertEqual(output, stats['runs'][0]['output'])
+        with open(output) as file:
+            buff, rule = rle.loads(file.read())
+        self.assertEqual([0, 0, 1, 0], buff[1][:4])
+
+    def test_same_names(self):
+        states = []
+        for folder in ('a', 'b', 'c'):
+            os.mkdir(os.path.join(self.directory, folder))
+            states.append(os.path.join(self.directory, folder, 'glider.rle'))
+            shutil.copy(self.glider, states[-1])
+        paths = [job[2] for job in jobs(RULES, states, self.output, 4)]
+        self.assertEqual([os.path.join(self.output, name) for name in
+                          ('glider.rle', 'glider.final.rle',
+                           'glider.final-2.rle')], paths)
+        # an output directory holding the states
+        paths = [job[2] for job in jobs(RULES, states + [self.glider],
+                                        self.directory, 4)]
+        self.assertEqual(4, len(set(paths)))
+        self.assertFalse(set(paths) & set(states + [self.glider]))
+        with redirect_stdout(io.StringIO()):
+            main([RULES] + states + ['-g', '4', '-o', self.output])
+        with open(os.path.join(self.output, 'stats.json')) as file:
+            outputs = [run['output'] for run in json.load(file)['runs']]
+        self.assertEqual(3, len(set(outputs)))
+        for path in outputs:
+            self.assertTrue(os.path.exists(path))
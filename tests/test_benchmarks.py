@@ -0,0 +1,44 @@
+import unittest
+
+from pycella.benchmarks import rle_io
+from pycella.benchmarks.suite import compare, run
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_run(self):
+        results = run(sizes=[8], repeat=1)['results']
+        self.assertIn('step/python/life_rules/bounded/8', results)
+        self.assertIn('step/sparse/object_rules/unbounded/8', results)
+        self.assertIn('expand/python/8', results)
+        self.assertIn('eq/python/8', results)
+        for result in results.values():
+            self.assertGreaterEqual(result['best'], 0)
+            self.assertEqual(1, result['repeat'])
+
+    def test_filter(self):
+        results = run(sizes=[8], repeat=1, pattern='iter/')['results']
+        self.assertEqual(['iter/python/8'], list(results))
+
+    def test_compare(self):
+        before = {'results': {'a': {'best': 1.0}, 'b': {'best': 1.0},
+                              'c': {'best': 1.0}}}
+        after = {'results': {'a': {'best': 1.05}, 'b': {'best': 2.0}}}
+        comparison = compare(before, after, threshold=0.1)
+        self.assertEqual(['a', 'b'], [name for name, *_ in comparison])
+        self.assertEqual([False, True],
+                         [regressed for *_, regressed in comparison])
+
+
+class TestRLEBenchmark(unittest.TestCase):
+    def test_compare(self):
+        results = rle_io.compare(20, 0.3)
+        self.assertEqual(['read naive CA', 'read streaming CA',
+                          'read naive CompactCA', 'read streaming CompactCA',
+                          'write naive', 'write streaming'],
+                         [name for name, elapsed, peak in results])
+
+    def test_same_output(self):
+        ca = rle_io.CA([[0, 1, 1], [1, 0, 0]], rle_io.life_rules,
+                       rle_io.empty_cell)
+        self.assertEqual(rle_io.naive_write(ca).getvalue(),
+                         rle_io.streaming_write(ca).getvalue())
@@ -0,0 +1,97 @@
+import unittest
+from operator import getitem
+from random import randint, random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import BitRow, CompactCA
+from pycella.automaton.rules import life_rules, seeds_rules
+
+
+class TestBitRow(unittest.TestCase):
+    def test_indexing(self):
+        data = bytearray(4)
+        row = BitRow(data, 8, 12)
+        row[0] = 1
+        row[11] = 1
+        row[-2] = 1
+        self.assertEqual(12, len(row))
+        self.assertEqual([1] + [0] * 9 + [1, 1], list(row))
+        self.assertEqual(bytearray([0, 1, 0b1100, 0]), data)
+        row[0] = 0
+        self.assertEqual(0, row[0])
+        self.assertRaises(IndexError, getitem, row, 12)
+        self.assertRaises(ValueError, row.__setitem__, 1, 2)
+
+    def test_slices(self):
+        data = bytearray(4)
+        first = BitRow(data, 0, 10)
+        second = BitRow(data, 16, 10)
+        first[2:5] = [1, 1, 1]
+        self.assertEqual([0, 1, 1, 1], first[1:5])
+        second[:] = first
+        self.assertEqual(list(first), list(second))
+
+
+class TestCompactCA(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+
+    def assert_same_evolution(self, rules, bounded, bits):
+        width = randint(2, 30)
+        height = randint(2, 30)
+        buff = [[int(random() < 0.3) for i in range(width)]
+                for j in range(height)]
+        expected = CA(buff, rules, self.empty_cell, bounded)
+        calculated = CompactCA(buff, rules, self.empty_cell, bounded, bits)
+        for i in range(8):
+            expected.step()
+            calculated.step()
+            self.assertEqual(expected.width, calculated.width)
+            self.assertEqual(list(expected), list(calculated))
+
+    def test_same_evolution(self):
+        for bits in (1, 8):
+            for i in range(3):
+                self.assert_same_evolution(life_rules, True, bits)
+                self.assert_same_evolution(life_rules, False, bits)
+                self.assert_same_evolution(seeds_rules, False, bits)
+
+    def test_indexing(self):
+        buff = [[0, 0, 0],
+                [0, 0, 1],
+                [0, 0, 19]]
+        ca = CompactCA(buff, seeds_rules, self.empty_cell)
+        self.assertEqual(1, ca[2, 3])
+        self.assertEqual(19, ca[3, 3])
+        self.assertRaises(IndexError, lambda i: getitem(ca, i), (19, 0))
+        ca[1, 1] = 7
+        self.assertEqual([7, 0, 0, 0, 0, 1, 0, 0, 19], list(ca))
+
+    def test_bit_cells(self):
+        self.assertRaises(ValueError, CompactCA, [[0, 2]], life_rules,
+                          self.empty_cell, True, 1)
+        self.assertRaises(ValueError, CompactCA, [[0, 1]], life_rules,
+                          self.empty_cell, True, 4)
+        self.assertRaises(ValueError, CompactCA, [[0, 1]], life_rules,
+                          lambda: 1)
+
+    def test_size(self):
+        buff = [[0] * 998 for i in range(998)]
+        self.assertEqual(1000 * 1000, CompactCA(buff, life_rules,
+                                                self.empty_cell).nbytes)
+        self.assertEqual(1000 * 125, CompactCA(buff, life_rules,
+                                               self.empty_cell,
+                                               bits=1).nbytes)
+
+    def test_toroidal(self):
+        for bits in (1, 8):
+            width = randint(2, 30)
+            buff = [[int(random() < 0.3) for i in range(width)]
+                    for j in range(randint(2, 30))]
+            expected = CA(buff, life_rules, self.empty_cell, toroidal=True)
+            calculated = CompactCA(buff, life_rules, self.empty_cell,
+                                   bits=bits, toroidal=True)
+            for i in range(8):
+                expected.step()
+                calculated.step()
+                self.assertEqual(list(expected), list(calculated))
@@ -0,0 +1,89 @@
+import unittest
+from random import random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.rules import life_rules, seeds_rules
+
+try:
+    import numpy
+    from pycella.automaton.ensemble import Ensemble
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        self.blinker = [[0, 0, 0, 0, 0],
+                        [0, 0, 0, 0, 0],
+                        [0, 1, 1, 1, 0],
+                        [0, 0, 0, 0, 0],
+                        [0, 0, 0, 0, 0]]
+        self.block = [[0, 0, 0, 0, 0],
+                      [0, 1, 1, 0, 0],
+                      [0, 1, 1, 0, 0],
+                      [0, 0, 0, 0, 0],
+                      [0, 0, 0, 0, 0]]
+        self.glider = [[0, 1, 0, 0, 0],
+                       [0, 0, 1, 0, 0],
+                       [1, 1, 1, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0]]
+
+    def test_same_as_ca(self):
+        for rules in (life_rules, seeds_rules):
+            buffers = [[[int(random() < 0.3) for i in range(13)]
+                        for j in range(11)] for k in range(6)]
+            ensemble = Ensemble(buffers, rules)
+            automata = [CA(buff, rules, self.empty_cell) for buff in buffers]
+            for i in range(10):
+                ensemble.step()
+                for ca in automata:
+                    ca.step()
+            for k, ca in enumerate(automata):
+                self.assertEqual(list(ca), sum(ensemble.member(k), []))
+                self.assertEqual(sum(ca), ensemble.populations[k])
+
+    def test_settling(self):
+        ensemble = Ensemble([self.blinker, self.block, self.glider],
+                            life_rules)
+        self.assertEqual(3, len(ensemble))
+        ensemble.step()
+        self.assertEqual([False, True, False], list(ensemble.settled))
+        ensemble.step()
+        self.assertEqual([2, 1, 0], list(ensemble.periods))
+        self.assertEqual([0, 0, -1], list(ensemble.settled_at))
+        # the glider turns into a block in the corner
+        generations = ensemble.run(100)
+        self.assertLess(generations, 100)
+        self.assertTrue(ensemble.settled.all())
+        self.assertEqual([3, 4, 4], list(ensemble.populations))
+
+    def test_random(self):
+        ensemble = Ensemble.random(50, 16, 12, life_rules, density=0.4,
+                                   seed=1)
+        self.assertEqual(16, ensemble.width)
+        self.assertEqual(12, ensemble.height)
+        ensemble.run(500)
+        self.assertTrue(ensemble.settled.any())
+
+    def test_invalid_buffers(self):
+        self.assertRaises(ValueError, Ensemble, [self.block, [[0, 1]]],
+                          life_rules)
+        self.assertRaises(ValueError, Ensemble, [[[0, 2]]], life_rules)
+
+    def test_toroidal(self):
+        buffers = [[[int(random() < 0.3) for i in range(5)]
+                    for j in range(5)] for k in range(4)] + [self.glider]
+        ensemble = Ensemble(buffers, life_rules, toroidal=True)
+        automata = [CA(buff, life_rules, self.empty_cell, toroidal=True)
+                    for buff in buffers]
+        for i in range(12):
+            ensemble.step()
+            for ca in automata:
+                ca.step()
+        for k, ca in enumerate(automata):
+            self.assertEqual(list(ca), sum(ensemble.member(k), []))
+        # the glider keeps flying around
+        self.assertEqual(5, ensemble.populations[-1])
@@ -0,0 +1,95 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.hashlife import HashLifeCA
+from pycella.automaton.sparse import SparseCA
+from pycella.automaton.rules import Rule, life_rules, seeds_rules
+
+
+class TestHashLifeCA(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        self.glider = [[0, 1, 0],
+                       [0, 0, 1],
+                       [1, 1, 1]]
+
+    def random_buffer(self):
+        width = randint(1, 20)
+        height = randint(1, 20)
+        return [[int(random() < 0.4) for i in range(width)]
+                for j in range(height)]
+
+    def assert_same_as_sparse(self, rules, generations, max_nodes=500000):
+        buff = self.random_buffer()
+        expected = SparseCA(buff, rules, self.empty_cell)
+        calculated = HashLifeCA(buff, rules, self.empty_cell, max_nodes)
+        for i in range(generations):
+            expected.step()
+        calculated.advance(generations)
+        self.assertEqual(expected._cells, calculated._cells)
+        self.assertEqual(expected.generation, calculated.generation)
+
+    def test_same_as_sparse(self):
+        for generations in [0, 1, 2, 3, 7, 8, 21, 64]:
+            self.assert_same_as_sparse(life_rules, generations)
+            self.assert_same_as_sparse(seeds_rules, generations)
+
+    def test_rulestring(self):
+        self.assert_same_as_sparse(Rule.from_rulestring("B36/S23"), 50)
+
+    def test_collection(self):
+        for i in range(5):
+            self.assert_same_as_sparse(life_rules, 37, max_nodes=50)
+
+    def test_node_budget(self):
+        buff = [[int(random() < 0.4) for j in range(32)] for i in range(32)]
+        expected = HashLifeCA(buff, life_rules, self.empty_cell)
+        ca = HashLifeCA(buff, life_rules, self.empty_cell, max_nodes=5000)
+        hashlife = ca._hashlife
+        join = hashlife.join
+        peak = [0]
+
+        def counted_join(*quadrants):
+            node = join(*quadrants)
+            peak[0] = max(peak[0], len(hashlife))
+            return node
+        hashlife.join = counted_join
+        expected.advance(512)
+        ca.advance(512)
+        self.assertEqual(expected._cells, ca._cells)
+        # a few joins past the budget before advance notices
+        self.assertLess(peak[0], hashlife.budget + 100)
+        self.assertLessEqual(len(hashlife), hashlife.budget)
+
+    def test_glider_far_future(self):
+        ca = HashLifeCA(self.glider, life_rules, self.empty_cell)
+        ca.advance(10**6)
+        expected = {(i + 250000, j + 250000)
+                    for i, row in enumerate(self.glider)
+                    for j, cell in enumerate(row) if cell}
+        self.assertEqual(expected, set(ca._cells))
+        self.assertEqual(10**6, ca.generation)
+        self.assertEqual(1, ca[ca.height, ca.width])
+        # the window follows the glider instead of covering its path
+        self.assertEqual((3, 3), (ca.width, ca.height))
+        self.assertEqual(self.glider, [[ca[i, j] for j in range(1, 4)]
+                                       for i in range(1, 4)])
+
+    def test_view_after_advance(self):
+        ca = HashLifeCA(self.glider, life_rules, self.empty_cell)
+        ca.advance(4)
+        self.assertEqual(3, ca.width)
+        self.assertEqual(3, ca.height)
+        self.assertEqual(5, sum(ca))
+        self.assertEqual(3, str(ca).count('\n'))
+        ca.step()
+        self.assertEqual(5, ca.generation)
+
+    def test_rejects_unsupported_rules(self):
+        self.assertRaises(ValueError, HashLifeCA, self.glider,
+                          lambda proxy: 0, self.empty_cell)
+        three_states = Rule([[0] * 17, [1] * 17, [2] * 17])
+        self.assertRaises(ValueError, HashLifeCA, self.glider,
+                          three_states, self.empty_cell)
+        self.assertRaises(ValueError, HashLifeCA, [[0, 2]],
+                          life_rules, self.empty_cell)
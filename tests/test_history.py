@@ -0,0 +1,193 @@
+import unittest
+from random import random
+
+from pycella.automaton.active import ActiveCA
+from pycella.automaton.automaton import CA
+from pycella.automaton.history import History
+from pycella.automaton.rules import life_rules
+from pycella.automaton.sparse import SparseCA
+
+try:
+    import numpy
+    from pycella.automaton.vectorized import VectorizedCA
+except ImportError:
+    numpy = None
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+
+    def soup(self, width=12, height=9):
+        return [[int(random() < 0.3) for i in range(width)]
+                for j in range(height)]
+
+    def assert_rewinds(self, ca, history, steps=30):
+        states = [(ca.width, ca.height, list(ca))]
+        for _ in ca.generations(steps, history):
+            states.append((ca.width, ca.height, list(ca)))
+        self.assertEqual(steps + 1, len(history))
+        for back in (1, 4, 10):
+            generation = history.rewind(ca, back)
+            del states[len(states) - back:]
+            self.assertEqual(len(states) - 1, generation)
+            self.assertEqual(generation, ca.generation)
+            self.assertEqual(states[-1], (ca.width, ca.height, list(ca)))
+        # recording goes on from the rewound generation
+        for _ in ca.generations(2, history):
+            pass
+        self.assertEqual(len(states) + 2, len(history))
+        self.assertEqual(ca.generation, history.generations[-1])
+
+    def test_generations(self):
+        buff = self.soup()
+        expected = CA(buff, life_rules, self.empty_cell)
+        ca = CA(buff, life_rules, self.empty_cell)
+        count = 0
+        for generation in ca.generations(5):
+            expected.step()
+            count += 1
+            self.assertIs(ca, generation)
+            self.assertEqual(list(expected), list(ca))
+        self.assertEqual(5, count)
+        self.assertEqual(5, ca.generation)
+
+    def test_generations_without_limit(self):
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        for generation in ca.generations():
+            if generation.generation == 7:
+                break
+        self.assertEqual(7, ca.generation)
+
+    def test_rewind(self):
+        for i in range(5):
+            ca = CA(self.soup(), life_rules, self.empty_cell)
+            self.assert_rewinds(ca, History(snapshot_every=0))
+
+    def test_rewind_with_snapshots(self):
+        for i in range(5):
+            ca = CA(self.soup(), life_rules, self.empty_cell)
+            self.assert_rewinds(ca, History(snapshot_every=7))
+
+    def test_rewind_across_expansions(self):
+        for i in range(5):
+            ca = CA(self.soup(), life_rules, self.empty_cell, bounded=False)
+            self.assert_rewinds(ca, History(snapshot_every=0))
+
+    def test_rewind_active(self):
+        ca = ActiveCA(self.soup(), life_rules, self.empty_cell)
+        self.assert_rewinds(ca, History())
+        self.assertEqual(sum(ca), ca.population)
+
+    def test_rewind_sparse(self):
+        glider = [[0, 1, 0],
+                  [0, 0, 1],
+                  [1, 1, 1]]
+        ca = SparseCA(glider, life_rules, self.empty_cell)
+        self.assert_rewinds(ca, History(snapshot_every=5))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_rewind_vectorized(self):
+        ca = VectorizedCA(self.soup(), life_rules, self.empty_cell,
+                          bounded=False)
+        self.assert_rewinds(ca, History(snapshot_every=5))
+
+    def test_size(self):
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        history = History(size=10)
+        states = {}
+        for generation in ca.generations(25, history):
+            states[ca.generation] = list(ca)
+        self.assertEqual(list(range(16, 26)), history.generations)
+        self.assertRaises(ValueError, history.rewind, ca, 10)
+        history.rewind(ca, 9)
+        self.assertEqual(16, ca.generation)
+        self.assertEqual(states[16], list(ca))
+
+    def test_changes_only(self):
+        buff = [[0] * 20 for i in range(20)]
+        buff[10][9] = buff[10][10] = buff[10][11] = 1
+        ca = CA(buff, life_rules, self.empty_cell)
+        history = History(snapshot_every=0)
+        for generation in ca.generations(10, history):
+            pass
+        # only the first generation is kept whole
+        self.assertEqual(400, len(history._records[0][1][2]))
+        for generation, snapshot, changes in list(history._records)[1:]:
+            self.assertIsNone(snapshot)
+            self.assertEqual(4, len(changes))
+
+    def test_changes(self):
+        buff = [[0] * 5 for i in range(5)]
+        buff[2][1] = buff[2][2] = buff[2][3] = 1
+        ca = CA(buff, life_rules, self.empty_cell, bounded=False)
+        history = History()
+        self.assertIsNone(history.changes)
+        history.record(ca)
+        self.assertIsNone(history.changes)
+        ca.step()
+        history.record(ca)
+        self.assertEqual({(2, 3, 0, 1), (3, 2, 1, 0), (3, 4, 1, 0),
+                          (4, 3, 0, 1)}, set(history.changes))
+        ca[1, 1] = 1
+        ca.step()
+        history.record(ca)
+        # expanded
+        self.assertIsNone(history.changes)
+
+    def test_changes_from_engine(self):
+        buff = self.soup()
+        expected = CA([row[:] for row in buff], life_rules, self.empty_cell,
+                      bounded=False)
+        ca = ActiveCA(buff, life_rules, self.empty_cell, bounded=False)
+        snapshots = []
+        snapshot = ca._snapshot
+        ca._snapshot = lambda: snapshots.append(ca.generation) or snapshot()
+        expected_history = History(snapshot_every=3)
+        history = History(snapshot_every=3)
+        for n in range(12):
+            if n == 6:
+                # set between two steps, without recording it
+                expected[2, 2] = ca[2, 2] = 1
+            expected.step()
+            ca.step()
+            expected_history.record(expected)
+            history.record(ca)
+            self.assertEqual(expected_history.changes is None,
+                             history.changes is None)
+            if history.changes is not None:
+                self.assertEqual(set(expected_history.changes),
+                                 set(history.changes))
+        # only the first generation, the expansions and the one after
+        # the edit are taken whole
+        unknown = {generation for generation, snapshot, changes
+                   in history._records if changes is None}
+        self.assertEqual(unknown | {7}, set(snapshots))
+        self.assertEqual(len(snapshots), len(set(snapshots)))
+        for back in (1, 5, 3):
+            expected_history.rewind(expected, back)
+            history.rewind(ca, back)
+            self.assertEqual(list(expected), list(ca))
+
+    def test_edits_replace_generation(self):
+        ca = CA([[0] * 5 for i in range(5)], life_rules, self.empty_cell)
+        history = History()
+        history.record(ca)
+        ca.step()
+        history.record(ca)
+        ca[2, 2] = 1
+        history.record(ca)
+        self.assertEqual([0, 1], history.generations)
+        ca.step()
+        history.record(ca)
+        history.rewind(ca)
+        self.assertEqual(1, ca[2, 2])
+        history.rewind(ca)
+        self.assertEqual(0, ca[2, 2])
+
+    def test_not_recorded(self):
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        history = History()
+        history.record(ca)
+        ca.step()
+        self.assertRaises(ValueError, history.rewind, ca)
@@ -0,0 +1,95 @@
+import unittest
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.instrumentation import StepLog, StepStats
+from pycella.automaton.rules import life_rules
+from pycella.automaton.sparse import SparseCA
+
+try:
+    import numpy
+    from pycella.automaton.vectorized import VectorizedCA
+except ImportError:
+    numpy = None
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        # a blinker, three cells change in every step
+        self.buff = [[0, 0, 0, 0, 0],
+                     [0, 0, 0, 0, 0],
+                     [0, 1, 1, 1, 0],
+                     [0, 0, 0, 0, 0],
+                     [0, 0, 0, 0, 0]]
+
+    def assert_blinker_stats(self, stats, generation):
+        self.assertIsInstance(stats, StepStats)
+        self.assertEqual(generation, stats.generation)
+        self.assertEqual(4, stats.changed)
+        self.assertEqual(3, stats.live)
+        self.assertGreaterEqual(stats.step_time, stats.rules_time)
+
+    def test_disabled_by_default(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        self.assertNotIn('step', ca.__dict__)
+        ca.step()
+        self.assertEqual(1, ca.generation)
+
+    def test_step_log(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        log = StepLog(size=3)
+        ca.instrument(log)
+        for i in range(5):
+            ca.step()
+        self.assertEqual(3, len(log))
+        self.assertEqual([3, 4, 5], [stats.generation for stats in log])
+        for stats in log:
+            self.assert_blinker_stats(stats, stats.generation)
+            self.assertEqual(25, stats.evaluated)
+            self.assertGreater(stats.rules_time, 0)
+        self.assertEqual(12, log.total('changed'))
+
+    def test_callback_and_disable(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        reports = []
+        ca.instrument(reports.append)
+        ca.step()
+        ca.instrument(None)
+        ca.step()
+        self.assertEqual(1, len(reports))
+        self.assertNotIn('step', ca.__dict__)
+        self.assertIs(life_rules, ca._rules)
+        self.assertEqual(2, ca.generation)
+
+    def test_expansion(self):
+        buff = [[0, 1, 0],
+                [0, 1, 0],
+                [0, 1, 0]]
+        ca = CA(buff, life_rules, self.empty_cell, bounded=False)
+        log = StepLog()
+        ca.instrument(log)
+        ca.step()
+        self.assertTrue(log[-1].expanded)
+        self.assertGreater(log[-1].expand_time, 0)
+        self.assertGreater(log[-1].boundary_time, 0)
+        self.assertEqual(4, log[-1].changed)
+        self.assertEqual(3, log[-1].live)
+        self.assertNotIn('_expand', ca.__dict__)
+
+    def test_sparse(self):
+        ca = SparseCA(self.buff, life_rules, self.empty_cell)
+        log = StepLog()
+        ca.instrument(log)
+        ca.step()
+        self.assert_blinker_stats(log[-1], 1)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_vectorized(self):
+        ca = VectorizedCA(self.buff, life_rules, self.empty_cell, False)
+        log = StepLog()
+        ca.instrument(log)
+        ca.step()
+        ca.step()
+        self.assert_blinker_stats(log[0], 1)
+        self.assert_blinker_stats(log[1], 2)
+        self.assertEqual(0, log[0].evaluated)
@@ -0,0 +1,207 @@
+import os
+import tempfile
+import unittest
+from random import randint, random, seed
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.history import History
+from pycella.automaton.instrumentation import StepLog
+from pycella.automaton.interned import InternedCA, StateTable
+from pycella.automaton.neighborhood import Neighborhood
+from pycella.automaton.rules import life_rules
+from pycella.automaton.storage import load, save
+
+
+class Cell:
+    __slots__ = ('alive',)
+
+    def __init__(self, alive):
+        self.alive = alive
+
+    def __bool__(self):
+        return self.alive
+
+    def __eq__(self, other):
+        return isinstance(other, Cell) and self.alive == other.alive
+
+    def __hash__(self):
+        return hash(self.alive)
+
+
+def object_rules(proxy):
+    s = sum(1 for cell in proxy.neighbors if cell.alive)
+    return Cell(s == 3 or (proxy.center.alive and s == 2))
+
+
+def empty_object():
+    return Cell(False)
+
+
+def age_rules(proxy):
+    """
+    Life with cells counting the generations they have been alive
+    """
+    s = proxy.live_count
+    if proxy.center:
+        return proxy.center + 1 if s in (2, 3) else 0
+    return int(s == 3)
+
+
+def soup(width, height, cell=int):
+    return [[cell(random() < 0.4) for j in range(width)]
+            for i in range(height)]
+
+
+def copy(buff):
+    return [row[:] for row in buff]
+
+
+class TestStateTable(unittest.TestCase):
+    def test_intern(self):
+        table = StateTable()
+        self.assertEqual(0, table.intern('empty'))
+        self.assertEqual(1, table.intern((1, 2)))
+        self.assertEqual(0, table.intern('empty'))
+        self.assertEqual(1, table.intern((1, 2)))
+        self.assertEqual(2, len(table))
+        self.assertEqual((1, 2), table.state(1))
+
+
+class TestInternedCA(unittest.TestCase):
+    def setUp(self):
+        seed(5)
+
+    def assert_same_evolution(self, buff, rules, empty_cell, steps=6,
+                              **kwargs):
+        expected = CA(copy(buff), rules, empty_cell, **kwargs)
+        interned = InternedCA(copy(buff), rules, empty_cell, **kwargs)
+        for n in range(steps):
+            expected.step()
+            interned.step()
+            self.assertEqual(list(expected), list(interned))
+            self.assertEqual((expected.width, expected.height),
+                             (interned.width, interned.height))
+        return interned
+
+    def test_life(self):
+        for bounded in (True, False):
+            ca = self.assert_same_evolution(
+                soup(randint(3, 20), randint(3, 20)), life_rules,
+                lambda: 0, bounded=bounded)
+            self.assertEqual(2, ca.states)
+            self.assertLessEqual(ca.transitions, 512)
+
+    def test_objects(self):
+        ca = self.assert_same_evolution(soup(25, 20, Cell), object_rules,
+                                        empty_object)
+        self.assertIsInstance(ca[3, 4], Cell)
+        self.assertLess(ca.transitions, ca.width * ca.height)
+
+    def test_neighborhoods(self):
+        for neighborhood in (Neighborhood.von_neumann(2),
+                             Neighborhood.hexagonal(),
+                             Neighborhood.moore(2)):
+            self.assert_same_evolution(soup(15, 12), age_rules, lambda: 0,
+                                       neighborhood=neighborhood)
+            self.assert_same_evolution(soup(15, 12, Cell), object_rules,
+                                       empty_object,
+                                       neighborhood=neighborhood)
+
+    def test_toroidal(self):
+        glider = [[0] * 8 for i in range(8)]
+        for i, j in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+            glider[i][j] = 1
+        ca = self.assert_same_evolution(glider, life_rules, lambda: 0,
+                                        steps=32, toroidal=True)
+        self.assertEqual([cell for row in glider for cell in row], list(ca))
+        self.assert_same_evolution(soup(9, 7), age_rules, lambda: 0,
+                                   toroidal=True,
+                                   neighborhood=Neighborhood.moore(2))
+
+    def test_widening(self):
+        # a blinker whose cells count their age: a new state every step
+        buff = [[0] * 5 for i in range(5)]
+        buff[2][1:4] = [1, 1, 1]
+        ca = self.assert_same_evolution(buff, age_rules, lambda: 0,
+                                        steps=300)
+        self.assertEqual(301, ca[3, 3])
+        self.assertGreater(ca.states, 256)
+        self.assertEqual('H', ca._buffer[0].typecode)
+
+    def test_indexing(self):
+        ca = InternedCA(soup(6, 5, Cell), object_rules, empty_object)
+        ca[2, 3] = Cell(True)
+        ca[2, 4] = 'other'
+        self.assertEqual(Cell(True), ca[2, 3])
+        self.assertEqual('other', ca[2, 4])
+        self.assertEqual('other', list(ca)[9])
+        self.assertEqual(3, ca.states)
+        for n in range(300):
+            ca[1, 1] = n
+        self.assertEqual(299, ca[1, 1])
+        self.assertEqual(Cell(True), ca[2, 3])
+
+    def test_max_transitions(self):
+        buff = soup(20, 20)
+        expected = CA(copy(buff), life_rules, lambda: 0)
+        ca = InternedCA(copy(buff), life_rules, lambda: 0,
+                        max_transitions=10)
+        for n in range(4):
+            expected.step()
+            ca.step()
+            self.assertEqual(list(expected), list(ca))
+        # cleared before every step, and filled by it again
+        self.assertLess(10, ca.transitions)
+        self.assertEqual(2, ca.states)
+
+    def test_cycles(self):
+        buff = [[0] * 5 for i in range(5)]
+        buff[2][1:4] = [Cell(True)] * 3
+        buff = [[cell or Cell(False) for cell in row] for row in buff]
+        ca = InternedCA(buff, object_rules, empty_object)
+        self.assertEqual(2, ca.run(10, detect_cycles=True))
+
+    def test_cycles_across_widening(self):
+        ca = InternedCA(soup(6, 5), life_rules, lambda: 0)
+        key = ca._state_key()
+        for n in range(300):
+            ca._states.intern(('unused', n))
+        ca._widen()
+        self.assertEqual('H', ca._buffer[0].typecode)
+        self.assertEqual(key, ca._state_key())
+
+    def test_history(self):
+        ca = InternedCA(soup(10, 10, Cell), object_rules, empty_object)
+        history = History(snapshot_every=3)
+        generations = [list(ca) for ca in ca.generations(7, history)]
+        self.assertEqual(4, history.rewind(ca, 3))
+        self.assertEqual(generations[3], list(ca))
+        history.rewind(ca, 4)
+        ca.step()
+        self.assertEqual(generations[0], list(ca))
+
+    def test_instrumentation(self):
+        buff = soup(12, 9, Cell)
+        ca = InternedCA(copy(buff), object_rules, empty_object)
+        expected = CA(copy(buff), object_rules, empty_object)
+        log = StepLog()
+        ca.instrument(log)
+        previous = list(ca)
+        ca.step()
+        expected.step()
+        stats = log[-1]
+        self.assertEqual(sum(1 for a, b in zip(previous, ca) if a != b),
+                         stats.changed)
+        self.assertEqual(sum(1 for cell in expected if cell), stats.live)
+        self.assertLessEqual(stats.evaluated, ca.transitions)
+
+    def test_storage(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            ca = InternedCA([[0, 5, 0], [300, 0, 7]], age_rules, lambda: 0)
+            save(ca, path)
+            loaded = load(path, age_rules, lambda: 0, InternedCA)
+            self.assertEqual([0, 5, 0, 300, 0, 7], list(loaded))
+        finally:
+            os.remove(path)
@@ -0,0 +1,219 @@
+import os
+import tempfile
+import unittest
+from operator import getitem
+from random import random, seed
+
+from pycella.automaton.active import ActiveCA
+from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import MOORE, Neighborhood, row_sums, \
+    summed_area
+from pycella.automaton.sparse import SparseCA
+from pycella.automaton.storage import load, save
+
+
+def bosco(proxy):
+    """
+    Bosco's rule, a Larger than Life rule of radius 5
+    """
+    s = proxy.neighbor_sum
+    if proxy.center:
+        return int(33 <= s <= 57)
+    return int(34 <= s <= 45)
+
+
+def spread(proxy):
+    return int(proxy.center or proxy.live_count > 0)
+
+
+def soup(width, height, density=0.5):
+    return [[int(random() < density) for j in range(width)]
+            for i in range(height)]
+
+
+NEIGHBORHOODS = [Neighborhood.moore(2), Neighborhood.moore(5),
+                 Neighborhood.von_neumann(1), Neighborhood.von_neumann(4),
+                 Neighborhood.hexagonal(), Neighborhood.hexagonal(3),
+                 Neighborhood([(-2, 0), (0, 3), (1, 1)])]
+
+
+class TestNeighborhood(unittest.TestCase):
+    def test_shapes(self):
+        self.assertEqual(MOORE, Neighborhood.moore(1))
+        self.assertEqual(8, len(MOORE))
+        self.assertEqual(24, len(Neighborhood.moore(2)))
+        self.assertEqual(4, len(Neighborhood.von_neumann()))
+        self.assertEqual(12, len(Neighborhood.von_neumann(2)))
+        hexagonal = Neighborhood.hexagonal()
+        self.assertEqual(6, len(hexagonal))
+        self.assertNotIn((-1, 1), hexagonal.offsets)
+        self.assertNotIn((1, -1), hexagonal.offsets)
+        self.assertEqual(18, len(Neighborhood.hexagonal(2)))
+        self.assertEqual(3, Neighborhood.moore(3).radius)
+        self.assertTrue(Neighborhood.moore(3).is_box)
+        self.assertFalse(Neighborhood.von_neumann(3).is_box)
+
+    def test_from_mask(self):
+        neighborhood = Neighborhood.from_mask([[0, 1, 0],
+                                               [1, 1, 1],
+                                               [0, 1, 0]])
+        self.assertEqual(Neighborhood.von_neumann(), neighborhood)
+        self.assertRaises(ValueError, Neighborhood.from_mask, [[1, 1]])
+        self.assertRaises(ValueError, Neighborhood.from_mask,
+                          [[0, 0, 0], [0, 1, 0], [0, 0, 0]])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Neighborhood, [])
+        self.assertRaises(ValueError, Neighborhood, [(0, 0), (0, 1)])
+        self.assertRaises(ValueError, Neighborhood.moore, 0)
+
+    def test_runs(self):
+        self.assertEqual(((-1, -1, 1), (0, -1, -1), (0, 1, 1), (1, -1, 1)),
+                         MOORE.runs)
+        self.assertEqual(((-2, 0, 0), (0, 3, 3), (1, 1, 1)),
+                         Neighborhood([(1, 1), (0, 3), (-2, 0)]).runs)
+
+    def test_tables(self):
+        buff = [[3, 1, 4], [1, 5, 9]]
+        self.assertEqual([[0, 3, 4, 8], [0, 1, 6, 15]], row_sums(buff))
+        self.assertEqual([[0, 0, 0, 0], [0, 3, 4, 8], [0, 4, 10, 23]],
+                         summed_area(buff))
+        self.assertEqual([[0, 0, 0, 0], [0, 1, 1, 2], [0, 1, 2, 4]],
+                         summed_area(buff, lambda cell: cell > 2))
+
+
+class TestNeighborhoodProxy(unittest.TestCase):
+    def setUp(self):
+        seed(3)
+
+    def test_primitives(self):
+        for neighborhood in NEIGHBORHOODS:
+            buff = [[int(random() * 3) for j in range(9)] for i in range(7)]
+            ca = CA(buff, bosco, lambda: 1, neighborhood=neighborhood)
+            proxy = ca._proxy
+            pad = neighborhood.radius
+            while True:
+                i, j = proxy._i, proxy._j
+                expected = [ca._buffer[i + di][j + dj]
+                            for di, dj in neighborhood.offsets]
+                self.assertEqual(expected, proxy.neighbors)
+                self.assertEqual(expected, list(proxy.neighbor_view))
+                self.assertEqual(expected[1:4], proxy.neighbor_view[1:4])
+                self.assertEqual(sum(expected), proxy.neighbor_sum)
+                self.assertEqual(sum(cell != 1 for cell in expected),
+                                 proxy.live_count)
+                self.assertEqual(ca._buffer[i][j], proxy.center)
+                self.assertEqual(tuple([proxy.center] + expected), proxy.key)
+                self.assertEqual(ca._buffer[i - pad][j + pad],
+                                 proxy[-pad, pad])
+                try:
+                    proxy.move()
+                except IndexError:
+                    break
+            self.assertRaises(IndexError, getitem, proxy, (pad + 1, 0))
+
+    def test_coordinates(self):
+        buff = soup(6, 4)
+        ca = CA(buff, bosco, lambda: 0, neighborhood=Neighborhood.moore(3))
+        self.assertEqual(6, ca.width)
+        self.assertEqual(4, ca.height)
+        self.assertEqual([cell for row in buff for cell in row], list(ca))
+        self.assertEqual(buff[0][0], ca[1, 1])
+        self.assertEqual(buff[3][5], ca[4, 6])
+        ca[2, 3] = 7
+        self.assertEqual(7, list(ca)[8])
+
+
+class TestNeighborhoodEngines(unittest.TestCase):
+    def setUp(self):
+        seed(4)
+
+    def test_engines_agree(self):
+        for neighborhood in NEIGHBORHOODS:
+            buff = soup(30, 25)
+            expected = CA([row[:] for row in buff], bosco, lambda: 0,
+                          neighborhood=neighborhood)
+            active = ActiveCA([row[:] for row in buff], bosco, lambda: 0,
+                              neighborhood=neighborhood)
+            for n in range(4):
+                # cells only ever see their neighborhood
+                direct = [[bosco_direct(expected, neighborhood, i, j)
+                           for j in range(1, expected.width + 1)]
+                          for i in range(1, expected.height + 1)]
+                expected.step()
+                active.step()
+                self.assertEqual([cell for row in direct for cell in row],
+                                 list(expected))
+                self.assertEqual(list(expected), list(active))
+
+    def test_unbounded_growth(self):
+        # the cells 6 or 9 steps away
+        for neighborhood, population in ((Neighborhood.moore(3), 19 * 19),
+                                         (Neighborhood.von_neumann(2), 85),
+                                         (Neighborhood.hexagonal(2), 127)):
+            buff = [[0, 0, 0], [0, 1, 0], [0, 0, 0]]
+            ca = CA(buff, spread, lambda: 0, bounded=False,
+                    neighborhood=neighborhood)
+            sparse = SparseCA(buff, spread, lambda: 0,
+                              neighborhood=neighborhood)
+            for n in range(3):
+                ca.step()
+                sparse.step()
+            self.assertEqual(population, sum(ca))
+            self.assertEqual(population, sparse.population)
+            self.assertEqual(live_cells(sparse), live_cells(ca))
+
+    def test_directional_growth(self):
+        neighborhood = Neighborhood.moore(2)
+        buff = [[0] * 5 for i in range(5)]
+        buff[4][4] = 1
+        ca = CA(buff, spread, lambda: 0, bounded=False, directional=True,
+                neighborhood=neighborhood)
+        ca.step()
+        self.assertEqual(25, sum(ca))
+        # grown on the bottom and right
+        self.assertEqual([0, 0, 1, 1, 1, 1, 1],
+                         [ca[3, j] for j in range(1, 8)])
+        self.assertEqual(1, ca[7, 7])
+
+    def test_storage(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            buff = soup(11, 6)
+            ca = CA(buff, bosco, lambda: 0,
+                    neighborhood=Neighborhood.moore(5))
+            save(ca, path)
+            loaded = load(path, bosco, lambda: 0,
+                          neighborhood=Neighborhood.moore(5))
+            self.assertEqual(list(ca), list(loaded))
+            ca.step()
+            loaded.step()
+            self.assertEqual(list(ca), list(loaded))
+        finally:
+            os.remove(path)
+
+
+def live_cells(ca):
+    """
+    :returns: the coordinates of the living cells, relative to the
+        first one
+    """
+    cells = [(i // ca.width, i % ca.width)
+             for i, cell in enumerate(ca) if cell]
+    top, left = cells[0]
+    return {(i - top, j - left) for i, j in cells}
+
+
+def bosco_direct(ca, neighborhood, i, j):
+    """
+    :returns: the next state of a cell by Bosco's rule, summing its
+        neighborhood cell by cell
+    """
+    height = ca.height
+    width = ca.width
+    s = sum(ca[i + di, j + dj] for di, dj in neighborhood.offsets
+            if 1 <= i + di <= height and 1 <= j + dj <= width)
+    if ca[i, j]:
+        return int(33 <= s <= 57)
+    return int(34 <= s <= 45)
@@ -0,0 +1,95 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.parallel import ParallelCA
+from pycella.automaton.rules import life_rules, seeds_rules
+
+
+def empty_cell():
+    return 0
+
+
+class TestParallelCA(unittest.TestCase):
+    def random_buffer(self):
+        width = randint(2, 30)
+        height = randint(2, 30)
+        return [[int(random() < 0.3) for i in range(width)]
+                for j in range(height)]
+
+    def assert_same_evolution(self, rules, bounded, workers):
+        buff = self.random_buffer()
+        expected = CA(buff, rules, empty_cell, bounded)
+        with ParallelCA(buff, rules, empty_cell, bounded,
+                        workers=workers) as calculated:
+            for i in range(6):
+                expected.step()
+                calculated.step()
+                self.assertEqual(expected.width, calculated.width)
+                self.assertEqual(expected.height, calculated.height)
+                self.assertEqual(list(expected), list(calculated))
+
+    def test_bounded(self):
+        for workers in (1, 3):
+            self.assert_same_evolution(life_rules, True, workers)
+            self.assert_same_evolution(seeds_rules, True, workers)
+
+    def test_unbounded(self):
+        for workers in (2, 4):
+            self.assert_same_evolution(life_rules, False, workers)
+            self.assert_same_evolution(seeds_rules, False, workers)
+
+    def test_more_workers_than_rows(self):
+        buff = [[0, 0, 0],
+                [1, 1, 1],
+                [0, 0, 0]]
+        with ParallelCA(buff, life_rules, empty_cell, workers=8) as ca:
+            ca.step()
+            self.assertEqual([0, 1, 0, 0, 1, 0, 0, 1, 0], list(ca))
+
+    def test_indexing_and_close(self):
+        buff = [[0, 0, 1],
+                [1, 1, 0]]
+        ca = ParallelCA(buff, life_rules, empty_cell, workers=2)
+        ca[1, 1] = 1
+        self.assertEqual(1, ca[1, 1])
+        self.assertEqual(1, ca[1, 3])
+        ca.close()
+        self.assertEqual([1, 0, 1, 1, 1, 0], list(ca))
+
+    def test_instrumentation(self):
+        buff = [[0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0],
+                [0, 1, 1, 1, 0],
+                [0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0]]
+        reports = []
+        with ParallelCA(buff, life_rules, empty_cell, workers=2) as ca:
+            ca.instrument(reports.append)
+            ca.step()
+        self.assertEqual(4, reports[0].changed)
+        self.assertEqual(3, reports[0].live)
+
+    def test_toroidal_instrumentation(self):
+        # a blinker across the top edge, copied into the padding
+        buff = [[0] * 5 for i in range(5)]
+        buff[0][1:4] = [1, 1, 1]
+        reports = []
+        with ParallelCA(buff, life_rules, empty_cell, workers=2,
+                        toroidal=True) as ca:
+            ca.instrument(reports.append)
+            ca.step()
+            ca.step()
+        for report in reports:
+            self.assertEqual(4, report.changed)
+            self.assertEqual(3, report.live)
+
+    def test_toroidal(self):
+        buff = self.random_buffer()
+        expected = CA(buff, life_rules, empty_cell, toroidal=True)
+        with ParallelCA(buff, life_rules, empty_cell, workers=3,
+                        toroidal=True) as calculated:
+            for i in range(6):
+                expected.step()
+                calculated.step()
+                self.assertEqual(list(expected), list(calculated))
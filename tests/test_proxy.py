@@ -4,6 +4,7 @@ from random import randint
 
 from pycella.automaton.automaton import CA
 from pycella.automaton.rules import life_rules, seeds_rules
+from pycella.automaton.sparse import SparseCA
 
 
 class TestProxy(unittest.TestCase):
@@ -64,3 +65,105 @@ class TestProxy(unittest.TestCase):
             self.proxy._i, self.proxy._j = 1+offset, self.size
             right_neighbors = [self.proxy.neighbors[j] for j in [2, 4, 7]]
             self.assertEqual([0, 0, 0], left_neighbors)
+
+    def test_center(self):
+        for i in range(10):
+            self.proxy._i = randint(1, self.size)
+            self.proxy._j = randint(1, self.size)
+            self.assertEqual(self.proxy[0, 0], self.proxy.center)
+
+    def test_neighbor_sum_along_rows(self):
+        # the sums of the columns are reused while moving
+        self.proxy._reset()
+        for step in range(self.size**2 - 1):
+            self.assertEqual(sum(self.proxy.neighbors),
+                             self.proxy.neighbor_sum)
+            self.proxy.move()
+
+    def test_neighbor_sum_in_any_order(self):
+        for i in range(50):
+            self.proxy._i = randint(1, self.size)
+            self.proxy._j = randint(1, self.size)
+            self.assertEqual(sum(self.proxy.neighbors),
+                             self.proxy.neighbor_sum)
+
+    def test_neighbor_sum_after_change(self):
+        self.proxy._i, self.proxy._j = 2, 2
+        self.proxy.neighbor_sum
+        self.ca[1, 4] = 100
+        self.proxy._j = 3
+        self.assertEqual(sum(self.proxy.neighbors), self.proxy.neighbor_sum)
+
+    def test_live_count(self):
+        buff = [[randint(0, 2) for j in range(8)] for i in range(8)]
+        ca = CA(buff, life_rules, lambda: 1)
+        proxy = ca._proxy
+        for step in range(63):
+            expected = sum(1 for cell in proxy.neighbors if cell != 1)
+            self.assertEqual(expected, proxy.live_count)
+            proxy.move()
+
+    def test_neighbor_view(self):
+        view = self.proxy.neighbor_view
+        for i in range(10):
+            self.proxy._i = randint(1, self.size)
+            self.proxy._j = randint(1, self.size)
+            neighbors = self.proxy.neighbors
+            self.assertIs(view, self.proxy.neighbor_view)
+            self.assertEqual(8, len(view))
+            self.assertEqual(neighbors, list(view))
+            self.assertEqual(neighbors, [view[k] for k in range(8)])
+            self.assertEqual(neighbors[-1], view[-1])
+            self.assertEqual(neighbors[1:3], view[1:3])
+            self.assertEqual(neighbors[::-2], view[::-2])
+
+    def test_key(self):
+        for i in range(10):
+            self.proxy._i = randint(1, self.size)
+            self.proxy._j = randint(1, self.size)
+            key = self.proxy.key
+            self.assertEqual(tuple([self.proxy.center] + self.proxy.neighbors),
+                             key)
+            self.assertEqual(hash(key), hash(self.proxy.key))
+
+    def test_rewritten_rules(self):
+        def old_life(proxy):
+            s = sum(proxy.neighbors)
+            if s < 2 or s > 3:
+                return 0
+            elif s == 3 and proxy[0, 0] == 0:
+                return 1
+            else:
+                return proxy[0, 0]
+
+        def old_seeds(proxy):
+            if sum(proxy.neighbors) == 2 and proxy[0, 0] == 0:
+                return 1
+            return 0
+
+        for old, new in ((old_life, life_rules), (old_seeds, seeds_rules)):
+            buff = [[randint(0, 1) for j in range(12)] for i in range(12)]
+            expected = CA([row[:] for row in buff], old, lambda: 0)
+            actual = CA(buff, new, lambda: 0)
+            for i in range(5):
+                expected.step()
+                actual.step()
+                self.assertEqual(list(expected), list(actual))
+
+
+class TestSparseProxy(unittest.TestCase):
+    def test_primitives(self):
+        buff = [[randint(0, 1) for j in range(6)] for i in range(6)]
+        ca = SparseCA(buff, life_rules, lambda: 0)
+        proxy = ca._proxy
+        for i in range(8):
+            for j in range(8):
+                proxy._i = i
+                proxy._j = j
+                neighbors = proxy.neighbors
+                self.assertEqual(ca[i, j], proxy.center)
+                self.assertEqual(sum(neighbors), proxy.neighbor_sum)
+                self.assertEqual(sum(neighbors), proxy.live_count)
+                self.assertEqual(neighbors, list(proxy.neighbor_view))
+                self.assertEqual(neighbors[2:], proxy.neighbor_view[2:])
+                self.assertEqual(tuple([proxy.center] + neighbors), proxy.key)
@@ -0,0 +1,107 @@
+import io
+import unittest
+from random import random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import CompactCA
+from pycella.automaton.rle import dumps, loads, read, write
+from pycella.automaton.rules import Rule, life_rules
+from pycella.automaton.sparse import SparseCA
+
+
+class TestRLE(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+
+    def test_glider(self):
+        glider = [[0, 1, 0],
+                  [0, 0, 1],
+                  [1, 1, 1]]
+        ca = CA(glider, life_rules, self.empty_cell)
+        text = dumps(ca, life_rules)
+        self.assertEqual('x = 3, y = 3, rule = B3/S23\nbo$2bo$3o!\n', text)
+        self.assertEqual((glider, 'B3/S23'), loads(text))
+
+    def test_loads(self):
+        text = ('#N Gosper glider gun\n'
+                '#C a comment\n'
+                'x = 36, y = 9, rule = B3/S23\n'
+                '24bo$22bobo$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o$2o8b'
+                'o3bob2o4b\nobo$10bo5bo7bo$11bo3bo$12b2o!\n')
+        buff, rule = loads(text)
+        self.assertEqual('B3/S23', rule)
+        self.assertEqual(9, len(buff))
+        self.assertEqual(36, len(buff[0]))
+        self.assertEqual(36, sum(map(sum, buff)))
+        self.assertEqual([1, 1] + [0] * 8 + [1], buff[4][:11])
+
+    def test_empty_rows(self):
+        buff = [[0, 0], [1, 0], [0, 0], [0, 0], [0, 1], [0, 0]]
+        ca = CA(buff, life_rules, self.empty_cell)
+        text = dumps(ca)
+        self.assertEqual('x = 2, y = 6\n$o3$bo!\n', text)
+        self.assertEqual((buff, None), loads(text))
+
+    def test_multistate(self):
+        buff = [[0, 1, 2], [24, 25, 255]]
+        ca = CA(buff, life_rules, self.empty_cell)
+        text = dumps(ca, 'Generations')
+        self.assertEqual('x = 3, y = 2, rule = Generations\n.AB$XpAyO!\n',
+                         text)
+        self.assertEqual((buff, 'Generations'), loads(text))
+
+    def test_round_trip(self):
+        for i in range(5):
+            buff = [[int(random() < 0.4) for i in range(80)]
+                    for j in range(30)]
+            ca = CA(buff, life_rules, self.empty_cell)
+            text = dumps(ca, Rule.from_rulestring('B36/S23'))
+            self.assertTrue(all(len(line) <= 70
+                                for line in text.splitlines()))
+            self.assertEqual((buff, 'B36/S23'), loads(text))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, loads, 'bo$2bo$3o!')
+        self.assertRaises(ValueError, loads, 'x = 2, y = 1\n3o!')
+        self.assertRaises(ValueError, loads, 'x = 2, y = 1\n2o$o!')
+        self.assertRaises(ValueError, loads, 'x = 2, y = 1\n2z!')
+        ca = CA([[0, 256]], life_rules, self.empty_cell)
+        self.assertRaises(ValueError, dumps, ca)
+
+    def test_read(self):
+        buff = [[int(random() < 0.4) for i in range(50)] for j in range(20)]
+        buff[3][7] = 0
+        text = dumps(CA(buff, life_rules, self.empty_cell), life_rules)
+        # runs and counts are split between the chunks
+        for chunk_size in (1, 2, 3, 7, 1000):
+            ca, rule = read(io.StringIO('#C comment\n' + text), life_rules,
+                            self.empty_cell, chunk_size=chunk_size)
+            self.assertEqual('B3/S23', rule)
+            self.assertEqual(buff, [row[1:-1] for row in ca._buffer[1:-1]])
+
+    def test_read_engines(self):
+        text = 'x = 5, y = 4\n$b3o$4bo!\n'
+        expected = CA(loads(text)[0], life_rules, self.empty_cell)
+        for engine, kwargs in ((SparseCA, {}), (CompactCA, {'bits': 1}),
+                               (CA, {'bounded': False})):
+            ca, rule = read(io.StringIO(text), life_rules, self.empty_cell,
+                            engine, **kwargs)
+            self.assertIsInstance(ca, engine)
+            self.assertEqual(list(expected), list(ca))
+
+    def test_read_invalid(self):
+        text = 'x = 3, y = 1\n' + 'b' * 100 + 'z!'
+        self.assertRaises(ValueError, read, io.StringIO(text), life_rules,
+                          self.empty_cell, chunk_size=8)
+        self.assertRaises(ValueError, read, io.StringIO('x = 2, y = 1\n3o!'),
+                          life_rules, self.empty_cell)
+
+    def test_write(self):
+        glider = [[0, 1, 0],
+                  [0, 0, 1],
+                  [1, 1, 1]]
+        text = io.StringIO()
+        write(SparseCA(glider, life_rules, self.empty_cell), text, 'B3/S23',
+              multistate=True)
+        self.assertEqual('x = 3, y = 3, rule = B3/S23\n.A$2.A$3A!\n',
+                         text.getvalue())
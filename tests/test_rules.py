@@ -0,0 +1,134 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.neighborhood import Neighborhood
+from pycella.automaton.rules import Memoized, Rule, life_rules, seeds_rules
+from pycella.automaton.sparse import SparseCA
+
+
+class TestRule(unittest.TestCase):
+    def setUp(self):
+        self.MAX = 30
+        self.empty_cell = lambda: 0
+
+    def test_rulestrings(self):
+        life = Rule.from_rulestring("B3/S23")
+        self.assertEqual({3}, life.birth)
+        self.assertEqual({2, 3}, life.survive)
+        self.assertEqual(life, Rule.from_rulestring("b3/s23"))
+        self.assertEqual(life, Rule.from_rulestring("S23/B3"))
+        self.assertEqual(life, Rule.from_rulestring("23/3"))
+        self.assertEqual(life, Rule.from_rulestring("B3S23"))
+        seeds = Rule.from_rulestring("B2/S")
+        self.assertEqual({2}, seeds.birth)
+        self.assertEqual(set(), seeds.survive)
+        self.assertEqual("B2/S", seeds.rulestring)
+
+    def test_invalid_rulestrings(self):
+        for rulestring in ["B9/S23", "X3/S23", "B3/S2/3", ""]:
+            self.assertRaises(ValueError, Rule.from_rulestring, rulestring)
+
+    def test_table(self):
+        table = [[0, 1, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                 [1] * 17,
+                 [2] * 17]
+        rule = Rule(table)
+        self.assertEqual(3, rule.states)
+        self.assertEqual(2, rule.table[0][2])
+        self.assertRaises(AttributeError, lambda: rule.birth)
+        self.assertRaises(ValueError, Rule, [[0] * 9])
+        self.assertRaises(ValueError, Rule, [[0] * 9, [1] * 8])
+        self.assertRaises(ValueError, Rule, [[0] * 9, [2] * 9])
+
+    def test_declared_functions(self):
+        self.assertEqual(Rule.from_rulestring("B3/S23").table,
+                         life_rules.table)
+        self.assertEqual(Rule.from_rulestring("B2/S").table,
+                         seeds_rules.table)
+
+    def test_same_evolution_as_functions(self):
+        for rules, rulestring in [(life_rules, "B3/S23"),
+                                  (seeds_rules, "B2/S")]:
+            width = randint(2, self.MAX)
+            height = randint(2, self.MAX)
+            buff = [[int(random() < 0.3) for i in range(width)]
+                    for j in range(height)]
+            expected = CA(buff, rules, self.empty_cell)
+            calculated = CA(buff, Rule.from_rulestring(rulestring),
+                            self.empty_cell)
+            for i in range(5):
+                expected.step()
+                calculated.step()
+                self.assertEqual(list(expected), list(calculated))
+
+
+class TestMemoized(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def counted(self, proxy):
+        self.calls += 1
+        return life_rules(proxy)
+
+    def soup(self, size=20):
+        return [[int(random() < 0.4) for j in range(size)]
+                for i in range(size)]
+
+    def test_same_evolution(self):
+        for engine in (CA, SparseCA):
+            buff = self.soup()
+            expected = engine([row[:] for row in buff], life_rules,
+                              lambda: 0)
+            rules = Memoized(self.counted)
+            memoized = engine(buff, rules, lambda: 0)
+            for i in range(5):
+                expected.step()
+                memoized.step()
+                self.assertEqual(list(expected), list(memoized))
+            self.assertEqual(self.calls, rules.misses)
+            self.assertLessEqual(rules.misses, 512)
+            self.assertGreater(rules.hits, rules.misses)
+            self.calls = 0
+
+    def test_neighborhoods(self):
+        def bigger(proxy):
+            return int(proxy.neighbor_sum in (3, 4, 6))
+        neighborhood = Neighborhood.von_neumann(2)
+        buff = self.soup()
+        expected = CA([row[:] for row in buff], bigger, lambda: 0,
+                      neighborhood=neighborhood)
+        rules = Memoized(bigger)
+        memoized = CA(buff, rules, lambda: 0, neighborhood=neighborhood)
+        for i in range(4):
+            expected.step()
+            memoized.step()
+            self.assertEqual(list(expected), list(memoized))
+        self.assertLessEqual(len(rules), 1 << 13)
+
+    def test_least_recently_used(self):
+        rules = Memoized(self.counted, size=2)
+        ca = CA([[0, 1], [1, 1]], rules, lambda: 0)
+        proxy = ca._proxy
+        keys = []
+        for i, j in ((1, 1), (1, 2), (1, 1), (2, 1), (1, 2)):
+            proxy._i = i
+            proxy._j = j
+            keys.append(proxy.key)
+            rules(proxy)
+        # (1, 2) was dropped for (2, 1) rather than the reused (1, 1),
+        # which was dropped for (1, 2) in turn
+        self.assertEqual(4, rules.misses)
+        self.assertEqual(1, rules.hits)
+        self.assertEqual(2, len(rules))
+        self.assertEqual(0.2, rules.hit_rate)
+        self.assertEqual([keys[3], keys[4]], list(rules._cache))
+        rules.clear()
+        self.assertEqual((0, 0, 0), (len(rules), rules.hits, rules.misses))
+        self.assertRaises(ValueError, Memoized, life_rules, 0)
+
+    def test_declarations(self):
+        rules = Memoized(life_rules)
+        self.assertEqual(life_rules.table, rules.table)
+        self.assertEqual(life_rules.birth, rules.birth)
+        self.assertFalse(hasattr(Memoized(self.counted), 'table'))
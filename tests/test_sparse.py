@@ -0,0 +1,104 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.sparse import SparseCA
+from pycella.automaton.rules import life_rules, seeds_rules
+
+
+def live_shape(ca):
+    """
+    :returns: the coordinates of the living cells of an automaton,
+        translated so that the smallest row and column are 0
+    """
+    cells = [(i // ca.width, i % ca.width)
+             for i, cell in enumerate(ca) if cell]
+    if not cells:
+        return set()
+    top = min(i for i, j in cells)
+    left = min(j for i, j in cells)
+    return {(i - top, j - left) for i, j in cells}
+
+
+class TestSparseCA(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        self.glider = [[0, 1, 0],
+                       [0, 0, 1],
+                       [1, 1, 1]]
+
+    def test_creation(self):
+        buff = [[0, 0, 1],
+                [1, 1, 0],
+                [0, 1, 0]]
+        ca = SparseCA(buff, life_rules, self.empty_cell)
+        self.assertEqual(3, ca.width)
+        self.assertEqual(3, ca.height)
+        self.assertEqual(4, ca.population)
+        self.assertEqual(1, ca[1, 3])
+        self.assertEqual(0, ca[0, 0])
+        self.assertEqual(0, ca[-100, 100])
+        self.assertEqual([0, 0, 1, 1, 1, 0, 0, 1, 0], list(ca))
+
+    def test_setitem(self):
+        buff = [[0, 0, 0],
+                [0, 0, 0]]
+        ca = SparseCA(buff, life_rules, self.empty_cell)
+        ca[1, 1] = 1
+        ca[0, 4] = 1
+        self.assertEqual(2, ca.population)
+        self.assertEqual(4, ca.width)
+        self.assertEqual(3, ca.height)
+        # the window grew upwards, so the first cell moved a row down
+        self.assertEqual(1, ca[2, 1])
+        self.assertEqual(1, ca[1, 4])
+        ca[2, 1] = 0
+        self.assertEqual(1, ca.population)
+
+    def test_rejects_rules_creating_cells(self):
+        self.assertRaises(ValueError, SparseCA, self.glider,
+                          lambda proxy: 1, self.empty_cell)
+
+    def test_same_evolution_as_unbounded(self):
+        for rules in (life_rules, seeds_rules):
+            for i in range(5):
+                width = randint(5, 20)
+                height = randint(5, 20)
+                buff = [[int(random() < 0.3) for i in range(width)]
+                        for j in range(height)]
+                expected = CA(buff, rules, self.empty_cell, bounded=False)
+                calculated = SparseCA(buff, rules, self.empty_cell)
+                for j in range(8):
+                    expected.step()
+                    calculated.step()
+                    self.assertEqual(live_shape(expected),
+                                     live_shape(calculated))
+                self.assertEqual(expected.generation, calculated.generation)
+
+    def test_glider_memory(self):
+        ca = SparseCA(self.glider, life_rules, self.empty_cell)
+        for i in range(400):
+            ca.step()
+        self.assertEqual(5, ca.population)
+        self.assertEqual(5, len(ca._cells))
+        self.assertEqual(live_shape(SparseCA(self.glider, life_rules,
+                                             self.empty_cell)),
+                         live_shape(ca))
+        self.assertGreaterEqual(ca.width, 100)
+        self.assertEqual(5, sum(ca))
+
+    def test_expand(self):
+        ca = SparseCA(self.glider, life_rules, self.empty_cell)
+        ca._expand()
+        self.assertGreater(ca.width, 3)
+        self.assertGreater(ca.height, 3)
+        self.assertEqual(live_shape(SparseCA(self.glider, life_rules,
+                                             self.empty_cell)),
+                         live_shape(ca))
+
+    def test_run(self):
+        ca = SparseCA(self.glider, life_rules, self.empty_cell)
+        self.assertIsNone(ca.run(30, detect_cycles=True))
+        self.assertEqual(30, ca.generation)
+        blinker = SparseCA([[1, 1, 1]], life_rules, self.empty_cell)
+        self.assertEqual(2, blinker.run(30, detect_cycles=True))
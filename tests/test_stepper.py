@@ -0,0 +1,176 @@
+import time
+import unittest
+from random import random
+
+from pycella.GUI.stepper import Stepper
+from pycella.automaton.automaton import CA
+from pycella.automaton.history import History
+from pycella.automaton.rules import life_rules
+
+
+class TestStepper(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        self.buff = [[int(random() < 0.3) for i in range(12)]
+                     for j in range(9)]
+
+    def wait_for(self, condition, timeout=5):
+        end = time.time() + timeout
+        while not condition():
+            self.assertLess(time.time(), end)
+            time.sleep(0.001)
+
+    def test_frames(self):
+        expected = CA(self.buff, life_rules, self.empty_cell, bounded=False)
+        ca = CA(self.buff, life_rules, self.empty_cell, bounded=False)
+        stepper = Stepper(ca, History(), queue_size=3)
+        try:
+            stepper.start()
+            shown = list(expected)
+            width = expected.width
+            frames = []
+            while len(frames) < 20:
+                new = stepper.frames()
+                self.assertLessEqual(len(new), 3)
+                frames += new
+            stepper.pause()
+            frames += stepper.frames()
+            self.assertEqual(ca.generation, frames[-1][0])
+            for generation, changes in frames:
+                expected.step()
+                self.assertEqual(expected.generation, generation)
+                if changes is None:
+                    # expanded, the whole generation is drawn again
+                    width = expected.width
+                    shown = list(expected)
+                else:
+                    for i, j, old, new in changes:
+                        shown[(i - 1) * width + j - 1] = new
+                self.assertEqual(list(expected), shown)
+        finally:
+            stepper.close()
+
+    def test_latest(self):
+        expected = CA(self.buff, life_rules, self.empty_cell)
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        stepper = Stepper(ca, History())
+        try:
+            self.assertIsNone(stepper.latest())
+            shown = list(ca)
+            for n in range(5):
+                stepper.step()
+                expected.step()
+            generation, changes, snapshot = stepper.latest()
+            self.assertEqual(5, generation)
+            self.assertIsNone(snapshot)
+            self.assertEqual(len(changes), len({change[:2]
+                                                for change in changes}))
+            for i, j, old, new in changes:
+                self.assertNotEqual(old, new)
+                self.assertEqual(shown[(i - 1) * ca.width + j - 1], old)
+                shown[(i - 1) * ca.width + j - 1] = new
+            self.assertEqual(list(expected), shown)
+            self.assertIsNone(stepper.latest())
+        finally:
+            stepper.close()
+
+    def test_latest_snapshot(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        stepper = Stepper(ca, History())
+        try:
+            stepper.step()
+            stepper.step()
+            generation, changes, snapshot = stepper.latest(max_changes=0)
+            self.assertEqual(2, generation)
+            self.assertIsNone(changes)
+            self.assertEqual(list(ca), list(snapshot[2]))
+        finally:
+            stepper.close()
+        # without a history the changes aren't known
+        stepper = Stepper(ca)
+        try:
+            stepper.step()
+            generation, changes, snapshot = stepper.latest()
+            self.assertIsNone(changes)
+            self.assertEqual(list(ca), list(snapshot[2]))
+        finally:
+            stepper.close()
+
+    def test_changes_without_history(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        ca.track_changes = True
+        stepper = Stepper(ca)
+        try:
+            for n in range(4):
+                stepper.step()
+            frames = stepper.frames()
+            # the cells of the first generation were set
+            self.assertIsNone(frames[0][1])
+            expected = CA(self.buff, life_rules, self.empty_cell)
+            expected.step()
+            shown = list(expected)
+            for generation, changes in frames[1:]:
+                expected.step()
+                for i, j, old, new in changes:
+                    self.assertEqual(shown[(i - 1) * ca.width + j - 1], old)
+                    shown[(i - 1) * ca.width + j - 1] = new
+                self.assertEqual(list(expected), shown)
+            self.assertEqual(list(ca), shown)
+        finally:
+            stepper.close()
+
+    def test_pause(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        stepper = Stepper(ca, queue_size=2)
+        try:
+            stepper.start()
+            self.wait_for(lambda: ca.generation >= 2)
+            stepper.pause()
+            self.assertFalse(stepper.running)
+            generation = ca.generation
+            self.assertEqual(generation, stepper.frames()[-1][0])
+            time.sleep(0.05)
+            self.assertEqual(generation, ca.generation)
+            self.assertEqual([], stepper.frames())
+        finally:
+            stepper.close()
+
+    def test_bounded_queue(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        stepper = Stepper(ca, queue_size=2)
+        try:
+            stepper.start()
+            self.wait_for(lambda: ca.generation >= 2)
+            time.sleep(0.05)
+            # nobody takes the frames, so the stepper waits
+            self.assertEqual(2, ca.generation)
+            self.assertEqual(2, len(stepper.frames()))
+            self.wait_for(lambda: ca.generation >= 4)
+        finally:
+            stepper.close()
+
+    def test_step_and_rewind(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        start = list(ca)
+        stepper = Stepper(ca, History())
+        try:
+            stepper.step()
+            stepper.step()
+            self.assertEqual([1, 2], [frame[0] for frame in stepper.frames()])
+            self.assertEqual(0, stepper.rewind(2))
+            self.assertEqual(start, list(ca))
+        finally:
+            stepper.close()
+
+    def test_interval(self):
+        ca = CA(self.buff, life_rules, self.empty_cell)
+        stepper = Stepper(ca, interval=10)
+        try:
+            stepper.start()
+            self.wait_for(lambda: ca.generation >= 1)
+            time.sleep(0.05)
+            self.assertEqual(1, ca.generation)
+        finally:
+            start = time.time()
+            stepper.close()
+            self.assertLess(time.time() - start, 1)
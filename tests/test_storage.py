@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from random import random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.compact import CompactCA
+from pycella.automaton.rules import life_rules
+from pycella.automaton.sparse import SparseCA
+from pycella.automaton.storage import HEADER, load, open_mapped, \
+    read_header, save
+
+try:
+    import numpy
+    from pycella.automaton.vectorized import VectorizedCA
+except ImportError:
+    numpy = None
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.empty_cell = lambda: 0
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def soup(self, width=13, height=7):
+        return [[int(random() < 0.3) for i in range(width)]
+                for j in range(height)]
+
+    def test_round_trip(self):
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        ca.run(3)
+        self.assertEqual('B', save(ca, self.path))
+        self.assertEqual(HEADER.size + 15 * 9, os.path.getsize(self.path))
+        loaded = load(self.path, life_rules, self.empty_cell)
+        self.assertEqual(3, loaded.generation)
+        self.assertEqual(ca._buffer, loaded._buffer)
+        ca.step()
+        loaded.step()
+        self.assertEqual(list(ca), list(loaded))
+
+    def test_typecodes(self):
+        buff = [[0, 255, 1], [2, 3, 0]]
+        ca = CA(buff, life_rules, self.empty_cell)
+        self.assertEqual('B', save(ca, self.path))
+        buff[0][0] = 256
+        ca = CA(buff, life_rules, self.empty_cell)
+        self.assertEqual('H', save(ca, self.path))
+        loaded = load(self.path, life_rules, self.empty_cell)
+        self.assertEqual(buff, [row[1:-1] for row in loaded._buffer[1:-1]])
+        self.assertEqual('Q', save(ca, self.path, 'Q'))
+        with open(self.path, 'rb') as file:
+            self.assertEqual((3, 2, 0, 'Q', [3, 2, 2, 1]), read_header(file))
+        buff[0][0] = -1
+        ca = CA(buff, life_rules, self.empty_cell)
+        self.assertRaises(ValueError, save, ca, self.path)
+
+    def test_engines(self):
+        buff = self.soup()
+        expected = CA(buff, life_rules, self.empty_cell)
+        automata = [CompactCA(buff, life_rules, self.empty_cell),
+                    CompactCA(buff, life_rules, self.empty_cell, bits=1),
+                    SparseCA(buff, life_rules, self.empty_cell)]
+        if numpy is not None:
+            automata.append(VectorizedCA(buff, life_rules, self.empty_cell))
+        for ca in automata:
+            save(ca, self.path)
+            loaded = load(self.path, life_rules, self.empty_cell)
+            self.assertEqual(list(expected), list(loaded))
+            self.assertEqual(expected._edges, loaded._edges)
+
+    def test_load_engine(self):
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        save(ca, self.path)
+        loaded = load(self.path, life_rules, self.empty_cell,
+                      engine=CompactCA, bounded=False, bits=1)
+        self.assertIsInstance(loaded, CompactCA)
+        self.assertEqual(list(ca), list(loaded))
+
+    def test_open_mapped(self):
+        buff = self.soup()
+        ca = CA(buff, life_rules, self.empty_cell, bounded=False)
+        ca.generation = 12
+        save(ca, self.path)
+        mapped = open_mapped(self.path, life_rules, self.empty_cell,
+                             bounded=False)
+        self.assertEqual(12, mapped.generation)
+        self.assertEqual(list(ca), list(mapped))
+        self.assertEqual(ca._edges, mapped._edges)
+        for i in range(10):
+            ca.step()
+            mapped.step()
+            self.assertEqual(ca.width, mapped.width)
+            self.assertEqual(list(ca), list(mapped))
+        mapped[1, 1] = 1
+        # the file is not changed
+        self.assertEqual(buff, [row[1:-1] for row in load(
+            self.path, life_rules, self.empty_cell)._buffer[1:-1]])
+
+    def test_toroidal(self):
+        # a blinker on the top edge, whose neighbors on the bottom edge
+        # are copied into the padding by the step
+        buff = [[0] * 6 for i in range(5)]
+        buff[0][1:4] = [1, 1, 1]
+        ca = CA(buff, life_rules, self.empty_cell, toroidal=True)
+        ca.step()
+        save(ca, self.path)
+        loaded = load(self.path, life_rules, self.empty_cell)
+        mapped = open_mapped(self.path, life_rules, self.empty_cell)
+        self.assertEqual(list(ca), list(loaded))
+        self.assertEqual(list(ca), list(mapped))
+        self.assertEqual(ca._edges, mapped._edges)
+        loaded.step()
+        mapped.step()
+        self.assertEqual(list(loaded), list(mapped))
+
+    def test_open_mapped_wide_cells(self):
+        ca = CA([[0, 300]], life_rules, self.empty_cell)
+        save(ca, self.path)
+        self.assertRaises(ValueError, open_mapped, self.path, life_rules,
+                          self.empty_cell)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not an automaton' * 10)
+        self.assertRaises(ValueError, load, self.path, life_rules,
+                          self.empty_cell)
+        with open(self.path, 'wb') as file:
+            file.write(b'PY')
+        self.assertRaises(ValueError, load, self.path, life_rules,
+                          self.empty_cell)
+        ca = CA(self.soup(), life_rules, self.empty_cell)
+        save(ca, self.path)
+        with open(self.path, 'r+b') as file:
+            file.truncate(HEADER.size + 40)
+        self.assertRaises(ValueError, load, self.path, life_rules,
+                          self.empty_cell)
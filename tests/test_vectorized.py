@@ -0,0 +1,141 @@
+import unittest
+from random import randint, random
+
+from pycella.automaton.automaton import CA
+from pycella.automaton.rules import Rule, life_rules, seeds_rules
+
+try:
+    import numpy
+    from pycella.automaton.vectorized import VectorizedCA
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestVectorizedCA(unittest.TestCase):
+    def setUp(self):
+        self.MAX = 40
+        self.empty_cell = lambda: 0
+
+    def random_buffer(self, density=0.3):
+        width = randint(2, self.MAX)
+        height = randint(2, self.MAX)
+        return [[int(random() < density) for i in range(width)]
+                for j in range(height)]
+
+    def assert_same_evolution(self, rules, bounded, generations=10):
+        buff = self.random_buffer()
+        expected = CA(buff, rules, self.empty_cell, bounded)
+        calculated = VectorizedCA(buff, rules, self.empty_cell, bounded)
+        for i in range(generations):
+            expected.step()
+            calculated.step()
+            self.assertEqual(expected.width, calculated.width)
+            self.assertEqual(expected.height, calculated.height)
+            self.assertEqual(list(expected), list(calculated))
+        self.assertEqual(expected.generation, calculated.generation)
+
+    def test_creation(self):
+        buff = [[0, 0, 1],
+                [1, 1, 0],
+                [0, 1, 0]]
+        ca = VectorizedCA(buff, life_rules, self.empty_cell)
+        self.assertEqual(3, ca.width)
+        self.assertEqual(3, ca.height)
+        self.assertEqual(1, ca[1, 3])
+        self.assertEqual(0, ca[0, 0])
+        self.assertEqual([0, 0, 1, 1, 1, 0, 0, 1, 0], list(ca))
+
+    def test_rejects_opaque_rules(self):
+        buff = [[0, 1], [1, 0]]
+        self.assertRaises(ValueError, VectorizedCA, buff,
+                          lambda proxy: proxy[0, 0], self.empty_cell)
+
+    def test_rejects_non_binary_cells(self):
+        buff = [[0, 2], [1, 0]]
+        self.assertRaises(ValueError, VectorizedCA, buff, life_rules,
+                          self.empty_cell)
+
+    def test_life_bounded(self):
+        for i in range(10):
+            self.assert_same_evolution(life_rules, True)
+
+    def test_life_unbounded(self):
+        for i in range(10):
+            self.assert_same_evolution(life_rules, False)
+
+    def test_seeds_bounded(self):
+        for i in range(10):
+            self.assert_same_evolution(seeds_rules, True)
+
+    def test_seeds_unbounded(self):
+        for i in range(5):
+            self.assert_same_evolution(seeds_rules, False, generations=6)
+
+    def test_setitem(self):
+        buff = [[0, 0, 0],
+                [0, 0, 0],
+                [0, 0, 0]]
+        ca = VectorizedCA(buff, life_rules, self.empty_cell)
+        for j in range(1, 4):
+            ca[2, j] = 1
+        ca.step()
+        self.assertEqual([0, 1, 0, 0, 1, 0, 0, 1, 0], list(ca))
+
+    def test_multi_state_rule(self):
+        # a cell counts up to 2 while it has neighbors and dies otherwise
+        table = [[0] + [1] * 16,
+                 [0] + [2] * 16,
+                 [0] + [2] * 16]
+        rule = Rule(table)
+        buff = [[randint(0, 2) for i in range(12)] for j in range(10)]
+        expected = CA(buff, rule, self.empty_cell, bounded=False)
+        calculated = VectorizedCA(buff, rule, self.empty_cell, bounded=False)
+        for i in range(5):
+            expected.step()
+            calculated.step()
+            self.assertEqual(list(expected), list(calculated))
+
+    def test_rulestring(self):
+        buff = self.random_buffer()
+        expected = CA(buff, life_rules, self.empty_cell)
+        calculated = VectorizedCA(buff, Rule.from_rulestring("B3/S23"),
+                                  self.empty_cell)
+        for i in range(5):
+            expected.step()
+            calculated.step()
+        self.assertEqual(list(expected), list(calculated))
+
+    def test_directional(self):
+        for i in range(5):
+            buff = self.random_buffer()
+            expected = CA(buff, life_rules, self.empty_cell, False, True)
+            calculated = VectorizedCA(buff, life_rules, self.empty_cell,
+                                      False, True)
+            for j in range(10):
+                expected.step()
+                calculated.step()
+                self.assertEqual(expected.width, calculated.width)
+                self.assertEqual(expected.height, calculated.height)
+                self.assertEqual(list(expected), list(calculated))
+
+    def test_run(self):
+        buff = [[0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0],
+                [0, 0, 1, 0, 0],
+                [0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0]]
+        ca = VectorizedCA(buff, life_rules, self.empty_cell)
+        self.assertEqual(2, ca.run(100, detect_cycles=True))
+        self.assertEqual(3, ca.generation)
+
+    def test_toroidal(self):
+        for rules in (life_rules, seeds_rules):
+            buff = self.random_buffer()
+            expected = CA(buff, rules, self.empty_cell, toroidal=True)
+            calculated = VectorizedCA(buff, rules, self.empty_cell,
+                                      toroidal=True)
+            for i in range(10):
+                expected.step()
+                calculated.step()
+                self.assertEqual(list(expected), list(calculated))
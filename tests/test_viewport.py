@@ -0,0 +1,144 @@
+import unittest
+from random import random
+
+from pycella.GUI.viewport import Pyramid, Viewport
+
+
+class TestViewport(unittest.TestCase):
+    def test_cell_at(self):
+        view = Viewport(zoom=10, top=2, left=3.5)
+        self.assertEqual((2, 3), view.cell_at(0, 0))
+        self.assertEqual((3, 4), view.cell_at(5, 10))
+        self.assertEqual((50, 30), view.position(5, 8.5))
+
+    def test_zoom_at(self):
+        view = Viewport(zoom=10)
+        before = view.cell_at(155, 73)
+        view.zoom_at(4, 155, 73)
+        self.assertEqual(40, view.zoom)
+        self.assertEqual(before, view.cell_at(155, 73))
+        view.zoom_at(1 / 1000, 155, 73)
+        self.assertEqual(before, view.cell_at(155, 73))
+        view.zoom_at(1 / 10 ** 9, 0, 0)
+        self.assertEqual(Viewport.MIN_ZOOM, view.zoom)
+
+    def test_pan(self):
+        view = Viewport(zoom=10)
+        view.pan(-30, 20)
+        self.assertEqual((-2, 3), view.cell_at(0, 0))
+
+    def test_visible(self):
+        view = Viewport(zoom=10, top=-5, left=4.5)
+        self.assertEqual((0, 4, 5, 15), view.visible(20, 20, 100, 100))
+        self.assertEqual((0, 4, 6, 16), view.visible(20, 20, 100, 100, 2))
+        self.assertEqual((0, 0, 8, 16), view.visible(20, 20, 100, 100, 8))
+        view.pan(0, -500)
+        top, left, bottom, right = view.visible(20, 20, 100, 100)
+        self.assertEqual(top, bottom)
+
+    def test_fit(self):
+        view = Viewport()
+        view.fit(100, 50, 400, 400)
+        self.assertEqual(4, view.zoom)
+        self.assertEqual((0, 0, 50, 100), view.visible(100, 50, 400, 400))
+        self.assertEqual((25, 50), view.cell_at(200, 200))
+
+    def test_resized(self):
+        view = Viewport(zoom=10, top=1, left=2)
+        view.resized(10, 10, 15, 16)
+        self.assertEqual((4, 5), (view.top, view.left))
+
+    def test_level(self):
+        self.assertEqual(0, Viewport(zoom=3).level(5))
+        self.assertEqual(0, Viewport(zoom=1).level(5))
+        self.assertEqual(1, Viewport(zoom=0.5).level(5))
+        self.assertEqual(2, Viewport(zoom=0.3).level(5))
+        self.assertEqual(4, Viewport(zoom=0.001).level(5))
+
+
+class TestPyramid(unittest.TestCase):
+    def test_levels(self):
+        cells = [1, 0, 0, 1, 1,
+                 1, 1, 0, 0, 0,
+                 0, 0, 0, 0, 1]
+        pyramid = Pyramid(5, 3, cells)
+        self.assertEqual(4, len(pyramid))
+        self.assertEqual([(5, 3), (3, 2), (2, 1), (1, 1)],
+                         [pyramid.size(k) for k in range(4)])
+        self.assertEqual(bytes([255 if cell else 0 for cell in cells]),
+                         pyramid.shades(0))
+        self.assertEqual(bytes([64 + 3 * 191 // 4, 64 + 191 // 4,
+                                64 + 191 // 4, 0, 0, 64 + 191 // 4]),
+                         pyramid.shades(1))
+        self.assertEqual(bytes([64 + 4 * 191 // 16, 64 + 2 * 191 // 16]),
+                         pyramid.shades(2))
+        self.assertEqual(bytes([64 + 6 * 191 // 64]), pyramid.shades(3))
+
+    def toggle(self, cells, width, count):
+        changes = []
+        for k in range(count):
+            index = int(random() * len(cells))
+            new = 1 - cells[index]
+            changes.append((index // width + 1, index % width + 1,
+                            cells[index], new))
+            cells[index] = new
+        return changes
+
+    def draw(self, pyramid, images, level, blocks):
+        if blocks is None:
+            images[level] = bytearray(pyramid.shades(level))
+            return
+        for x, y, shade in blocks:
+            images[level][y * pyramid.size(level)[0] + x] = shade
+
+    def assert_synced(self, pyramid, images, cells):
+        expected = Pyramid(pyramid.width, pyramid.height, cells)
+        for k in range(len(pyramid)):
+            self.draw(pyramid, images, k, pyramid.sync(k))
+            self.assertEqual(expected.shades(k), pyramid.shades(k))
+            self.assertEqual(expected.shades(k), images[k])
+
+    def test_apply(self):
+        width, height = 13, 9
+        cells = [int(random() < 0.3) for i in range(width * height)]
+        pyramid = Pyramid(width, height, cells)
+        images = [bytearray(pyramid.shades(k)) for k in range(len(pyramid))]
+        for level in (0, 2, 2, 1):
+            changes = self.toggle(cells, width, 10)
+            self.draw(pyramid, images, level, pyramid.apply(changes, 0, level))
+        self.assert_synced(pyramid, images, cells)
+
+    def test_lazy_levels(self):
+        width, height = 16, 16
+        cells = [0] * (width * height)
+        pyramid = Pyramid(width, height, cells)
+        images = [bytearray(pyramid.shades(k)) for k in range(len(pyramid))]
+        blocks = pyramid.apply([(1, 1, 0, 1)], 0, 2)
+        self.assertEqual([(0, 0, 64 + 191 // 16)], blocks)
+        self.draw(pyramid, images, 2, blocks)
+        # the other levels are left behind until they are synced
+        self.assertEqual(0, pyramid._counts[1][0])
+        self.assertEqual(0, pyramid._counts[4][0])
+        self.assert_synced(pyramid, images, [1] + cells[1:])
+
+    def test_remerge(self):
+        width, height = 13, 9
+        cells = [int(random() < 0.3) for i in range(width * height)]
+        pyramid = Pyramid(width, height, cells)
+        images = [bytearray(pyramid.shades(k)) for k in range(len(pyramid))]
+        top = len(pyramid) - 1
+        # more changes than blocks: the level is merged from below
+        self.assertIsNone(pyramid.apply(self.toggle(cells, width, 20), 0, top))
+        images[top] = bytearray(pyramid.shades(top))
+        self.assert_synced(pyramid, images, cells)
+
+    def test_compact(self):
+        width, height = 7, 5
+        cells = [int(random() < 0.3) for i in range(width * height)]
+        pyramid = Pyramid(width, height, cells)
+        images = [bytearray(pyramid.shades(k)) for k in range(len(pyramid))]
+        for n in range(8):
+            self.draw(pyramid, images, 1,
+                      pyramid.apply(self.toggle(cells, width, 10), 0, 1))
+            self.assertLessEqual(len(pyramid._log), width * height)
+        self.assert_synced(pyramid, images, cells)